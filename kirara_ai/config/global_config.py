@@ -1,4 +1,4 @@
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Literal
 
 from pydantic import BaseModel, ConfigDict, Field
 
@@ -12,6 +12,27 @@ class IMConfig(BaseModel):
     config: Dict[str, Any] = Field(default={}, description="IM的配置")
 
 
+class LLMTransportConfig(BaseModel):
+    """LLM后端的 HTTP 连接池配置"""
+
+    pool_size: int = Field(default=100, description="连接池的最大连接数，0 表示不限制")
+    pool_size_per_host: int = Field(default=0, description="每个主机的最大连接数，0 表示不限制")
+    keepalive_timeout: float = Field(default=30, description="空闲连接保持的时间（秒）")
+    connect_timeout: float = Field(default=10, description="建立连接的超时时间（秒），0 表示不限制")
+    read_timeout: float = Field(default=0, description="两次读取响应数据之间的超时时间（秒），0 表示不限制")
+    timeout: float = Field(default=300, description="单次请求的总超时时间（秒），0 表示不限制")
+
+
+class LLMRateLimitConfig(BaseModel):
+    """LLM后端的客户端限流配置，按模型分别计算配额"""
+
+    rpm: int = Field(default=0, description="每个模型每分钟的请求数上限，0 表示不限制")
+    tpm: int = Field(default=0, description="每个模型每分钟的 token 数上限，按提示词估算长度加 max_tokens 预支，0 表示不限制")
+    max_wait: float = Field(
+        default=30, description="请求等待配额的最长时间（秒），超过时换用其他后端或失败，0 表示不限制"
+    )
+
+
 class LLMBackendConfig(BaseModel):
     """LLM后端配置"""
 
@@ -20,12 +41,49 @@ class LLMBackendConfig(BaseModel):
     config: Dict[str, Any] = Field(default={}, description="后端配置")
     enable: bool = Field(default=True, description="是否启用")
     models: List[str] = Field(default=[], description="支持的模型列表")
+    weight: int = Field(default=1, description="负载均衡时的权重")
+    transport: LLMTransportConfig = LLMTransportConfig()
+    rate_limit: LLMRateLimitConfig = LLMRateLimitConfig()
+    model_rate_limits: Dict[str, LLMRateLimitConfig] = Field(
+        default={}, description="按模型单独配置的限流，未配置的模型使用 rate_limit"
+    )
+
+
+class LLMBalancerConfig(BaseModel):
+    """同一模型有多个后端时的负载均衡配置"""
+
+    strategy: Literal["random", "weighted_round_robin", "least_in_flight", "ewma_latency"] = Field(
+        default="random",
+        description="后端选择策略：随机、加权轮询、最少进行中请求或最低延迟（EWMA）",
+    )
+    ewma_alpha: float = Field(default=0.3, description="延迟 EWMA 的平滑系数，越大越偏重最近的请求")
+    failure_threshold: int = Field(
+        default=5, description="后端连续失败多少次后暂时摘除，0 表示不摘除"
+    )
+    recovery_timeout: float = Field(
+        default=30, description="后端被摘除多少秒后放行一个探测请求，成功后恢复"
+    )
+    max_retries: int = Field(
+        default=1, description="请求失败后换用同一模型的其他后端重试的次数，0 表示不重试"
+    )
+    retry_backoff: float = Field(
+        default=0.5, description="重试前等待的基础时间（秒），每次重试翻倍并加入随机抖动"
+    )
+    retry_backoff_max: float = Field(default=5, description="重试前等待时间的上限（秒）")
+    hedge: bool = Field(
+        default=False,
+        description="是否启用对冲请求：首个后端超过其 p95 延迟仍未返回时，向另一个后端发出相同请求并采用先返回的结果",
+    )
+    hedge_min_samples: int = Field(
+        default=20, description="后端至少有多少个成功请求的延迟样本后才对其启用对冲"
+    )
 
 
 class LLMConfig(BaseModel):
     api_backends: List[LLMBackendConfig] = Field(
         default=[], description="LLM API后端列表"
     )
+    balancer: LLMBalancerConfig = LLMBalancerConfig()
 
 
 class DefaultConfig(BaseModel):
@@ -35,22 +93,106 @@ class DefaultConfig(BaseModel):
 
 
 class MemoryPersistenceConfig(BaseModel):
-    type: str = Field(default="file", description="持久化类型: file/redis")
+    type: str = Field(default="file", description="持久化类型: file/redis/sqlite")
     file: Dict[str, Any] = Field(
-        default={"storage_dir": "./data/memory"}, description="文件持久化配置"
+        default={"storage_dir": "./data/memory", "mode": "json", "codec": "json"},
+        description="文件持久化配置，mode 为 json 或 log（追加日志），json 模式下 codec 为 json 或 binary",
     )
     redis: Dict[str, Any] = Field(
         default={"host": "localhost", "port": 6379, "db": 0},
         description="Redis持久化配置",
     )
+    sqlite: Dict[str, Any] = Field(
+        default={"database": "./data/memory.db"}, description="SQLite持久化配置"
+    )
+    write_batch_size: int = Field(
+        default=100, description="等待写入的作用域数达到该值时批量写入"
+    )
+    write_interval: float = Field(
+        default=1.0, description="写操作最长等待时间（秒），同一作用域在此期间的多次写入会合并"
+    )
+
+
+class MemoryCacheConfig(BaseModel):
+    """记忆内存缓存配置"""
+
+    max_scopes: int = Field(default=0, description="缓存的作用域数量上限，0 表示不限制")
+    max_entries: int = Field(default=0, description="缓存的记忆总条数上限，0 表示不限制")
+    max_bytes: int = Field(default=0, description="缓存的记忆估算总字节数上限，0 表示不限制")
+    ttl: float = Field(default=0, description="作用域未被访问多少秒后从缓存中淘汰，0 表示不淘汰")
+
+
+class MemoryDecomposerConfig(BaseModel):
+    """记忆解析配置，限制注入到提示词中的记忆长度"""
+
+    budget_unit: Literal["tokens", "chars"] = Field(
+        default="tokens", description="长度预算的单位：tokens（离线估算）或 chars（字符数）"
+    )
+    default_budget: int = Field(default=2000, description="默认的记忆长度预算，0 表示不限制")
+    model_budgets: Dict[str, int] = Field(
+        default={}, description="按模型 ID 单独配置的记忆长度预算"
+    )
+
+
+class MemorySummaryConfig(BaseModel):
+    """记忆摘要配置，超出最大条目数的旧记忆由 LLM 合并为摘要"""
+
+    enable: bool = Field(default=False, description="是否启用记忆摘要")
+    model_name: str = Field(default="", description="生成摘要使用的模型 ID，留空使用默认的对话模型")
+    batch_size: int = Field(default=20, description="累计多少条被截断的旧记忆后生成一次摘要")
+    max_pending: int = Field(
+        default=200, description="摘要生成失败时最多保留多少条等待重试的旧记忆"
+    )
+    max_length: int = Field(default=500, description="摘要的最大字数")
+    prompt: str = Field(
+        default=(
+            "你是对话记录整理助手。请将之前的摘要和新的对话记录合并为一份新的摘要，"
+            "保留人物、事实、约定和尚未结束的话题，不超过 {max_length} 字。只输出摘要内容。"
+        ),
+        description="生成摘要的系统提示词，{max_length} 会被替换为摘要的最大字数",
+    )
 
 
 class MemoryConfig(BaseModel):
     persistence: MemoryPersistenceConfig = MemoryPersistenceConfig()
+    cache: MemoryCacheConfig = MemoryCacheConfig()
+    decomposer: MemoryDecomposerConfig = MemoryDecomposerConfig()
+    summary: MemorySummaryConfig = MemorySummaryConfig()
     max_entries: int = Field(default=100, description="每个作用域最大记忆条目数")
     default_scope: str = Field(default="member", description="默认作用域类型")
 
 
+class WorkflowConfig(BaseModel):
+    """工作流执行配置"""
+
+    max_block_workers: int = Field(default=32, description="执行同步 block 的共享线程池大小")
+    default_block_quota: int = Field(
+        default=0, description="单个工作流同时占用的线程数上限，0 表示不限制"
+    )
+    block_quotas: Dict[str, int] = Field(
+        default={}, description="按工作流 ID 单独配置的线程数上限"
+    )
+    default_timeout: float = Field(
+        default=0, description="工作流的默认执行超时时间（秒），0 表示不限制"
+    )
+    default_block_timeout: float = Field(
+        default=0, description="单个 block 的默认执行超时时间（秒），0 表示不限制"
+    )
+
+
+class DispatchConfig(BaseModel):
+    """消息调度配置"""
+
+    max_concurrency: int = Field(default=16, description="同时处理的消息数上限，0 表示不限制")
+    max_pending: int = Field(
+        default=20, description="单个会话等待处理的消息数上限，0 表示不限制"
+    )
+    overflow_policy: Literal["drop_newest", "drop_oldest", "merge"] = Field(
+        default="drop_newest",
+        description="会话积压超过上限时的处理策略：丢弃新消息、丢弃最早的消息或合并同一发送者的消息",
+    )
+
+
 class WebConfig(BaseModel):
     host: str = Field(default="127.0.0.1", description="Web服务绑定的IP地址")
     port: int = Field(default=8080, description="Web服务端口号")
@@ -94,6 +236,8 @@ class GlobalConfig(BaseModel):
     llms: LLMConfig = LLMConfig()
     defaults: DefaultConfig = DefaultConfig()
     memory: MemoryConfig = MemoryConfig()
+    workflow: WorkflowConfig = WorkflowConfig()
+    dispatch: DispatchConfig = DispatchConfig()
     web: WebConfig = WebConfig()
     plugins: PluginConfig = PluginConfig()
     update: UpdateConfig = UpdateConfig()
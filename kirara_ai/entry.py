@@ -24,6 +24,8 @@ from kirara_ai.web.api.system.utils import get_installed_version, get_latest_pyp
 from kirara_ai.web.app import WebServer
 from kirara_ai.workflow.core.block import BlockRegistry
 from kirara_ai.workflow.core.dispatch import DispatchRuleRegistry, WorkflowDispatcher
+from kirara_ai.workflow.core.execution.metrics import WorkflowMetrics
+from kirara_ai.workflow.core.execution.thread_pool import BlockThreadPool
 from kirara_ai.workflow.core.workflow import WorkflowRegistry
 from kirara_ai.workflow.implementations.blocks import register_system_blocks
 from kirara_ai.workflow.implementations.workflows import register_system_workflows
@@ -104,6 +106,17 @@ def init_application() -> DependencyContainer:
     container.register(EventBus, EventBus())
     container.register(GlobalConfig, config)
     container.register(BlockRegistry, BlockRegistry())
+    container.register(
+        BlockThreadPool,
+        BlockThreadPool(
+            max_workers=config.workflow.max_block_workers,
+            default_quota=config.workflow.default_block_quota,
+            quotas=config.workflow.block_quotas,
+        ),
+    )
+    workflow_metrics = WorkflowMetrics()
+    workflow_metrics.register_listeners(container.resolve(EventBus))
+    container.register(WorkflowMetrics, workflow_metrics)
     
     # 注册工作流注册表
     workflow_registry = WorkflowRegistry(container)
@@ -195,6 +208,16 @@ def run_application(container: DependencyContainer):
         loop.run_until_complete(shutdown_event.wait())
     finally:
         event_bus.post(ApplicationStopping())
+        # 取消仍在执行的工作流，并等待它们退出，工作流退出前写入的记忆需要在关闭记忆系统之前保存
+        dispatcher = container.resolve(WorkflowDispatcher)
+        cancelled = dispatcher.cancel_all()
+        if cancelled:
+            logger.info(f"Cancelled {cancelled} running workflows")
+        try:
+            loop.run_until_complete(asyncio.wait_for(dispatcher.wait_all(), timeout=10))
+        except asyncio.TimeoutError:
+            logger.warning("Timed out waiting for cancelled workflows to exit")
+
         # 关闭记忆系统
         memory_manager = container.resolve(MemoryManager)
         logger.info("Shutting down memory system...")
@@ -206,6 +229,12 @@ def run_application(container: DependencyContainer):
         # 停止Web服务器
         loop.run_until_complete(web_server.stop())
         logger.info("Web server terminated.")
+
+        # 关闭 LLM 后端的连接池
+        loop.run_until_complete(container.resolve(LLMManager).shutdown())
+
+        # 关闭 block 线程池
+        container.resolve(BlockThreadPool).shutdown(wait=False)
         try:
             # 停止所有 adapter
             im_manager.stop_adapters(loop=loop)
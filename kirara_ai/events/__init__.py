@@ -4,7 +4,7 @@ from .im import IMAdapterStarted, IMAdapterStopped
 from .listen import listen
 from .llm import LLMAdapterLoaded, LLMAdapterUnloaded
 from .plugin import PluginLoaded, PluginStarted, PluginStopped
-from .workflow import WorkflowExecutionBegin, WorkflowExecutionEnd
+from .workflow import BlockExecutionEnd, WorkflowExecutionBegin, WorkflowExecutionEnd, WorkflowExecutionTimeout
 
 __all__ = [
     "listen",
@@ -20,4 +20,6 @@ __all__ = [
     "LLMAdapterUnloaded",
     "WorkflowExecutionBegin",
     "WorkflowExecutionEnd",
+    "BlockExecutionEnd",
+    "WorkflowExecutionTimeout",
 ]
@@ -1,6 +1,7 @@
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 from kirara_ai.workflow.core.execution.executor import WorkflowExecutor
+from kirara_ai.workflow.core.execution.metrics import BlockSpan
 from kirara_ai.workflow.core.workflow.base import Workflow
 
 
@@ -20,3 +21,34 @@ class WorkflowExecutionEnd:
         self.results = results
 
 
+class BlockExecutionEnd:
+    """单个 block 执行结束（无论成功与否）时发布，携带该次执行的耗时记录"""
+
+    def __init__(self, workflow: Workflow, executor: WorkflowExecutor, span: BlockSpan):
+        self.workflow = workflow
+        self.executor = executor
+        self.span = span
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(workflow={self.workflow}, span={self.span})"
+
+
+class WorkflowExecutionTimeout:
+    """工作流或其中的 block 执行超时时发布"""
+
+    def __init__(
+        self,
+        workflow: Workflow,
+        executor: WorkflowExecutor,
+        timeout: float,
+        block_name: Optional[str] = None,
+    ):
+        self.workflow = workflow
+        self.executor = executor
+        # 触发的超时时间（秒）
+        self.timeout = timeout
+        # 超时的 block，为空表示整个工作流超时
+        self.block_name = block_name
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(workflow={self.workflow}, block={self.block_name}, timeout={self.timeout})"
@@ -1,7 +1,7 @@
 import base64
 import tempfile
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import AsyncIterator, Callable, List, Optional
 
 import aiofiles
 import aiohttp
@@ -376,6 +376,33 @@ class IMMessage:
         }
 
 
+class IMMessageStream(IMMessage):
+    """
+    逐段生成的 IM 消息。
+
+    segments() 在每个消息元素生成后立即返回它，每次调用都从第一个元素开始。
+    message_elements 在 wait() 完成之前为空，读取消息内容的 block 需要先等待 wait() 完成。
+    """
+
+    def __init__(
+        self,
+        sender: ChatSender,
+        segments: Callable[[], AsyncIterator[MessageElement]],
+        raw_message: dict = None,
+    ):
+        super().__init__(sender, [], raw_message)
+        self._segments = segments
+
+    def segments(self) -> AsyncIterator[MessageElement]:
+        """按生成顺序返回消息元素"""
+        return self._segments()
+
+    async def wait(self) -> "IMMessageStream":
+        """等待所有消息元素生成完毕"""
+        self.message_elements = [element async for element in self.segments()]
+        return self
+
+
 # 示例用法
 if __name__ == "__main__":
     # 创建消息元素
@@ -1,8 +1,10 @@
+import asyncio
 from abc import ABC, abstractmethod
-from typing import Protocol, runtime_checkable
+from typing import AsyncIterator, Protocol, runtime_checkable
 
 from kirara_ai.llm.format.request import LLMChatRequest
-from kirara_ai.llm.format.response import LLMChatResponse
+from kirara_ai.llm.format.response import LLMChatResponse, LLMChatResponseDelta
+from kirara_ai.llm.transport import LLMTransport
 
 
 @runtime_checkable
@@ -14,3 +16,35 @@ class LLMBackendAdapter(ABC):
     @abstractmethod
     def chat(self, req: LLMChatRequest) -> LLMChatResponse:
         raise NotImplementedError("Unsupported model method")
+
+    async def achat(self, req: LLMChatRequest) -> LLMChatResponse:
+        """
+        异步调用对话接口。
+        默认在线程中执行 chat，基于 HTTP 的适配器应重写此方法并通过 transport 复用连接。
+        """
+        return await asyncio.to_thread(self.chat, req)
+
+    async def achat_stream(self, req: LLMChatRequest) -> AsyncIterator[LLMChatResponseDelta]:
+        """
+        流式调用对话接口，逐段返回增量内容。
+        默认等待完整的响应后作为一段返回，支持流式输出的适配器应重写此方法。
+        """
+        resp = await self.achat(req)
+        choice = resp.choices[0] if resp.choices else None
+        yield LLMChatResponseDelta(
+            content=(choice.message.content or "") if choice and choice.message else "",
+            finish_reason=choice.finish_reason if choice else None,
+            usage=resp.usage,
+        )
+
+    @property
+    def transport(self) -> LLMTransport:
+        """后端共享的 HTTP 连接池，由 LLMManager 加载后端时设置，未设置时使用默认配置创建"""
+        transport = self.__dict__.get("_transport")
+        if transport is None:
+            transport = self._transport = LLMTransport()
+        return transport
+
+    @transport.setter
+    def transport(self, transport: LLMTransport):
+        self._transport = transport
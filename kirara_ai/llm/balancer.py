@@ -0,0 +1,444 @@
+import asyncio
+import random
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Deque, Dict, List, Optional, Set, Tuple, Type
+
+from kirara_ai.llm.adapter import LLMBackendAdapter
+from kirara_ai.llm.format.request import LLMChatRequest
+from kirara_ai.llm.format.response import LLMChatResponse, LLMChatResponseDelta, Usage
+from kirara_ai.llm.rate_limiter import RateLimiter, estimate_request_tokens
+from kirara_ai.llm.transport import LLMTransport
+from kirara_ai.logger import get_logger
+
+# 计算延迟分位数时保留的最近成功请求数
+LATENCY_SAMPLES = 200
+
+
+class BackendHealth:
+    """
+    单个后端的实时健康统计，同时维护熔断状态。
+
+    连续失败达到阈值后进入 open 状态，不再参与选择；冷却时间结束后进入 half_open 状态，
+    放行一个探测请求，成功则恢复为 closed，失败则重新进入 open 状态。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        weight: int = 1,
+        ewma_alpha: float = 0.3,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30,
+    ):
+        """
+        :param name: 后端名称
+        :param weight: 负载均衡权重
+        :param ewma_alpha: 延迟 EWMA 的平滑系数
+        :param failure_threshold: 连续失败多少次后熔断，0 表示不熔断
+        :param recovery_timeout: 熔断多少秒后放行探测请求
+        """
+        self.name = name
+        self.weight = max(weight, 1)
+        self.ewma_alpha = ewma_alpha
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ewma_latency: Optional[float] = None
+        self._latencies: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self.last_error: Optional[str] = None
+        self.state = self.CLOSED
+        self.opened_at = 0.0
+        # 正在进行的探测请求的开始时间，探测请求没有被发出时超过冷却时间后允许重新探测
+        self._probe_started_at: Optional[float] = None
+
+    @property
+    def available(self) -> bool:
+        """是否可以正常参与选择"""
+        return self.state == self.CLOSED
+
+    def try_probe(self) -> bool:
+        """熔断冷却结束时占用探测名额，返回是否可以发出探测请求"""
+        now = time.monotonic()
+        with self._lock:
+            if self.state == self.CLOSED or now - self.opened_at < self.recovery_timeout:
+                return False
+            if self._probe_started_at is not None and now - self._probe_started_at < self.recovery_timeout:
+                return False
+            self.state = self.HALF_OPEN
+            self._probe_started_at = now
+            return True
+
+    def begin(self) -> float:
+        """记录请求开始，返回开始时间"""
+        with self._lock:
+            self.in_flight += 1
+            self.requests += 1
+        return time.monotonic()
+
+    def end(self, started_at: float, error: Optional[BaseException] = None):
+        """
+        记录请求结束
+        :param started_at: begin 返回的开始时间
+        :param error: 请求失败时的异常，被取消的请求不计入成功或失败
+        """
+        now = time.monotonic()
+        with self._lock:
+            self.in_flight -= 1
+            if error is not None and not isinstance(error, Exception):
+                # 请求被取消，释放探测名额让下一个请求继续探测
+                if self.state == self.HALF_OPEN:
+                    self._probe_started_at = None
+                return
+            self._probe_started_at = None
+            if error is None:
+                latency = now - started_at
+                self._latencies.append(latency)
+                if self.ewma_latency is None:
+                    self.ewma_latency = latency
+                else:
+                    self.ewma_latency += self.ewma_alpha * (latency - self.ewma_latency)
+                self.consecutive_failures = 0
+                self.state = self.CLOSED
+                return
+            self.failures += 1
+            self.consecutive_failures += 1
+            self.last_error = f"{type(error).__name__}: {error}"
+            if self.state == self.HALF_OPEN or (
+                self.failure_threshold and self.consecutive_failures >= self.failure_threshold
+            ):
+                self.state = self.OPEN
+                self.opened_at = now
+
+    def latency_percentile(self, q: float, min_samples: int = 1) -> Optional[float]:
+        """
+        最近成功请求延迟的分位数
+        :param q: 分位，例如 0.95
+        :param min_samples: 样本数不足时返回 None
+        """
+        with self._lock:
+            samples = sorted(self._latencies)
+        if not samples or len(samples) < min_samples:
+            return None
+        return samples[min(int(q * len(samples)), len(samples) - 1)]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """获取统计数据"""
+        p95_latency = self.latency_percentile(0.95)
+        with self._lock:
+            return {
+                "state": self.state,
+                "weight": self.weight,
+                "in_flight": self.in_flight,
+                "requests": self.requests,
+                "failures": self.failures,
+                "consecutive_failures": self.consecutive_failures,
+                "error_rate": self.failures / self.requests if self.requests else 0.0,
+                "ewma_latency": self.ewma_latency,
+                "p95_latency": p95_latency,
+                "last_error": self.last_error,
+            }
+
+
+class SelectionStrategy(ABC):
+    """后端选择策略，从同一模型的可用后端中选出一个"""
+
+    @abstractmethod
+    def select(self, model_id: str, candidates: List[BackendHealth]) -> BackendHealth:
+        pass
+
+
+class RandomStrategy(SelectionStrategy):
+    """随机选择"""
+
+    def select(self, model_id: str, candidates: List[BackendHealth]) -> BackendHealth:
+        return random.choice(candidates)
+
+
+class WeightedRoundRobinStrategy(SelectionStrategy):
+    """平滑加权轮询，权重高的后端被选中的次数按比例更多，且不会连续集中选中"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._current_weights: Dict[Tuple[str, str], int] = {}
+
+    def select(self, model_id: str, candidates: List[BackendHealth]) -> BackendHealth:
+        with self._lock:
+            total = 0
+            best, best_weight = None, 0
+            for health in candidates:
+                key = (model_id, health.name)
+                current = self._current_weights.get(key, 0) + health.weight
+                self._current_weights[key] = current
+                total += health.weight
+                if best is None or current > best_weight:
+                    best, best_weight = health, current
+            self._current_weights[(model_id, best.name)] -= total
+            return best
+
+
+class LeastInFlightStrategy(SelectionStrategy):
+    """选择进行中请求数与权重之比最小的后端"""
+
+    def select(self, model_id: str, candidates: List[BackendHealth]) -> BackendHealth:
+        shuffled = random.sample(candidates, len(candidates))
+        return min(shuffled, key=lambda health: health.in_flight / health.weight)
+
+
+class EWMALatencyStrategy(SelectionStrategy):
+    """
+    选择预计延迟最低的后端。
+    以延迟的 EWMA 乘以进行中请求数加一作为预计延迟，避免所有请求集中到同一个后端；
+    还没有延迟数据的后端优先被选中。
+    """
+
+    def select(self, model_id: str, candidates: List[BackendHealth]) -> BackendHealth:
+        shuffled = random.sample(candidates, len(candidates))
+        return min(shuffled, key=lambda health: (health.ewma_latency or 0.0) * (health.in_flight + 1))
+
+
+SELECTION_STRATEGIES: Dict[str, Type[SelectionStrategy]] = {
+    "random": RandomStrategy,
+    "weighted_round_robin": WeightedRoundRobinStrategy,
+    "least_in_flight": LeastInFlightStrategy,
+    "ewma_latency": EWMALatencyStrategy,
+}
+
+
+def get_strategy(name: str) -> SelectionStrategy:
+    """按名称创建选择策略"""
+    strategy_class = SELECTION_STRATEGIES.get(name)
+    if strategy_class is None:
+        raise ValueError(f"Unknown backend selection strategy: {name}")
+    return strategy_class()
+
+
+class TrackedLLMBackend(LLMBackendAdapter):
+    """
+    记录调用统计的后端适配器包装，由 LLMManager.get_llm 返回。
+    配置了限流时先排队等待配额，对话接口的耗时和结果写入后端的健康统计，其余属性转发给原适配器。
+    """
+
+    def __init__(
+        self, adapter: LLMBackendAdapter, health: BackendHealth, limiter: Optional[RateLimiter] = None
+    ):
+        self.adapter = adapter
+        self.health = health
+        self.limiter = limiter
+
+    def chat(self, req: LLMChatRequest) -> LLMChatResponse:
+        tokens = 0
+        if self.limiter is not None:
+            tokens = estimate_request_tokens(req)
+            self.limiter.acquire_sync(tokens)
+        started_at = self.health.begin()
+        try:
+            resp = self.adapter.chat(req)
+        except BaseException as e:
+            self.health.end(started_at, e)
+            raise
+        self.health.end(started_at)
+        self._settle(tokens, resp.usage)
+        return resp
+
+    async def achat(self, req: LLMChatRequest) -> LLMChatResponse:
+        tokens = await self._acquire(req)
+        started_at = self.health.begin()
+        try:
+            resp = await self.adapter.achat(req)
+        except BaseException as e:
+            self.health.end(started_at, e)
+            raise
+        self.health.end(started_at)
+        self._settle(tokens, resp.usage)
+        return resp
+
+    async def achat_stream(self, req: LLMChatRequest) -> AsyncIterator[LLMChatResponseDelta]:
+        tokens = await self._acquire(req)
+        started_at = self.health.begin()
+        usage = None
+        try:
+            async for delta in self.adapter.achat_stream(req):
+                usage = delta.usage or usage
+                yield delta
+        except BaseException as e:
+            self.health.end(started_at, e)
+            raise
+        self.health.end(started_at)
+        self._settle(tokens, usage)
+
+    async def _acquire(self, req: LLMChatRequest) -> int:
+        """等待限流配额，返回预支的 token 数"""
+        if self.limiter is None:
+            return 0
+        tokens = estimate_request_tokens(req)
+        await self.limiter.acquire(tokens)
+        return tokens
+
+    def _settle(self, tokens: int, usage: Optional[Usage]):
+        if self.limiter is not None:
+            self.limiter.settle(tokens, usage)
+
+    @property
+    def transport(self) -> LLMTransport:
+        return self.adapter.transport
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.adapter, name)
+
+    def __repr__(self):
+        return f"TrackedLLMBackend({self.health.name}, {self.adapter!r})"
+
+
+class LLMBackendRouter(LLMBackendAdapter):
+    """
+    按模型路由请求的适配器，由 LLMManager.get_llm 返回。
+
+    请求首先发往选中的后端，失败时按带随机抖动的指数退避换用同一模型的其他后端重试。
+    开启对冲时，首个后端超过其 p95 延迟仍未返回，会向另一个后端发出相同的请求并采用先成功的结果。
+    流式请求只在收到第一段内容之前重试，且不进行对冲。其余属性转发给首个后端。
+    """
+
+    def __init__(
+        self,
+        model_id: str,
+        backend: TrackedLLMBackend,
+        select: Callable[[Set[str]], Optional[TrackedLLMBackend]],
+        max_retries: int = 1,
+        retry_backoff: float = 0.5,
+        retry_backoff_max: float = 5,
+        hedge: bool = False,
+        hedge_min_samples: int = 20,
+    ):
+        """
+        :param model_id: 模型 ID
+        :param backend: 首个后端
+        :param select: 选择后端的函数，参数为需要排除的后端名称，没有可选的后端时返回 None
+        :param max_retries: 换用其他后端重试的次数
+        :param retry_backoff: 重试前等待的基础时间（秒）
+        :param retry_backoff_max: 重试前等待时间的上限（秒）
+        :param hedge: 是否启用对冲请求
+        :param hedge_min_samples: 启用对冲所需的最少延迟样本数
+        """
+        self.model_id = model_id
+        self.backend = backend
+        self.select = select
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self.retry_backoff_max = retry_backoff_max
+        self.hedge = hedge
+        self.hedge_min_samples = hedge_min_samples
+        self.logger = get_logger("LLMBackendRouter")
+
+    def _backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.retry_backoff_max, self.retry_backoff * 2**attempt))
+
+    def _next_backend(
+        self, tried: Set[str], attempt: int, failed: TrackedLLMBackend, error: Exception
+    ) -> Optional[TrackedLLMBackend]:
+        """选择重试的后端，没有重试次数或其他后端时返回 None"""
+        if attempt >= self.max_retries:
+            return None
+        backend = self.select(tried)
+        if backend is not None:
+            self.logger.warning(
+                f"Backend {failed.health.name} failed for model {self.model_id}: {error}, "
+                f"retrying on {backend.health.name}"
+            )
+        return backend
+
+    def chat(self, req: LLMChatRequest) -> LLMChatResponse:
+        backend, tried, attempt = self.backend, set(), 0
+        while True:
+            tried.add(backend.health.name)
+            try:
+                return backend.chat(req)
+            except Exception as e:
+                next_backend = self._next_backend(tried, attempt, backend, e)
+                if next_backend is None:
+                    raise
+            time.sleep(self._backoff(attempt))
+            backend, attempt = next_backend, attempt + 1
+
+    async def achat(self, req: LLMChatRequest) -> LLMChatResponse:
+        backend, tried, attempt = self.backend, set(), 0
+        while True:
+            tried.add(backend.health.name)
+            try:
+                return await self._achat_hedged(backend, req, tried)
+            except Exception as e:
+                next_backend = self._next_backend(tried, attempt, backend, e)
+                if next_backend is None:
+                    raise
+            await asyncio.sleep(self._backoff(attempt))
+            backend, attempt = next_backend, attempt + 1
+
+    async def _achat_hedged(
+        self, backend: TrackedLLMBackend, req: LLMChatRequest, tried: Set[str]
+    ) -> LLMChatResponse:
+        delay = backend.health.latency_percentile(0.95, self.hedge_min_samples) if self.hedge else None
+        if delay is None:
+            return await backend.achat(req)
+
+        primary = asyncio.ensure_future(backend.achat(req))
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if not done:
+                hedge_backend = self.select(tried)
+                if hedge_backend is not None:
+                    tried.add(hedge_backend.health.name)
+                    self.logger.info(
+                        f"Backend {backend.health.name} exceeded p95 latency {delay:.2f}s for model "
+                        f"{self.model_id}, hedging on {hedge_backend.health.name}"
+                    )
+                    tasks.add(asyncio.ensure_future(hedge_backend.achat(req)))
+            # 采用先成功的结果，全部失败时抛出首个后端的异常
+            pending = tasks
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+            return primary.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def achat_stream(self, req: LLMChatRequest) -> AsyncIterator[LLMChatResponseDelta]:
+        backend, tried, attempt = self.backend, set(), 0
+        while True:
+            tried.add(backend.health.name)
+            started = False
+            try:
+                async for delta in backend.achat_stream(req):
+                    started = True
+                    yield delta
+                return
+            except Exception as e:
+                # 已经输出的内容无法撤回，只能在收到第一段内容之前重试
+                next_backend = None if started else self._next_backend(tried, attempt, backend, e)
+                if next_backend is None:
+                    raise
+            await asyncio.sleep(self._backoff(attempt))
+            backend, attempt = next_backend, attempt + 1
+
+    @property
+    def transport(self) -> LLMTransport:
+        return self.backend.transport
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self.backend, name)
+
+    def __repr__(self):
+        return f"LLMBackendRouter({self.model_id}, {self.backend!r})"
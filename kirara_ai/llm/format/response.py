@@ -54,3 +54,11 @@ class LLMChatResponse(BaseModel):
     choices: Optional[List[LLMChatResponseContent]] = None
     model: Optional[str] = None
     usage: Optional[Usage] = None
+
+
+class LLMChatResponseDelta(BaseModel):
+    """流式响应中的一段增量内容"""
+
+    content: str = ""
+    finish_reason: Optional[str] = None
+    usage: Optional[Usage] = None
@@ -1,5 +1,5 @@
 import random
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 from kirara_ai.config.global_config import GlobalConfig
 from kirara_ai.events.event_bus import EventBus
@@ -7,7 +7,10 @@ from kirara_ai.events.llm import LLMAdapterLoaded, LLMAdapterUnloaded
 from kirara_ai.ioc.container import DependencyContainer
 from kirara_ai.ioc.inject import Inject
 from kirara_ai.llm.adapter import LLMBackendAdapter
+from kirara_ai.llm.balancer import BackendHealth, LLMBackendRouter, TrackedLLMBackend, get_strategy
 from kirara_ai.llm.llm_registry import LLMAbility, LLMBackendRegistry
+from kirara_ai.llm.rate_limiter import RateLimiter
+from kirara_ai.llm.transport import LLMTransport
 from kirara_ai.logger import get_logger
 
 
@@ -37,6 +40,11 @@ class LLMManager:
         self.logger = get_logger("LLMAdapter")
         self.active_backends = {}
         self.backends: Dict[str, LLMBackendAdapter] = {}
+        # 后端名称 -> 实时健康统计
+        self.backend_health: Dict[str, BackendHealth] = {}
+        # (后端名称, 模型 ID) -> 限流器，只包含配置了限流的模型
+        self.rate_limiters: Dict[Tuple[str, str], RateLimiter] = {}
+        self.strategy = get_strategy(config.llms.balancer.strategy)
 
     def load_config(self):
         """加载配置文件中的所有启用的后端"""
@@ -75,10 +83,27 @@ class LLMManager:
         with self.container.scoped() as scoped_container:
             scoped_container.register(config_class, config_class(**backend.config))
             adapter = Inject(scoped_container).create(adapter_class)()
+            adapter.transport = LLMTransport(backend.transport)
             self.backends[backend_name] = adapter
+            balancer_config = self.config.llms.balancer
+            self.backend_health[backend_name] = BackendHealth(
+                backend_name,
+                weight=backend.weight,
+                ewma_alpha=balancer_config.ewma_alpha,
+                failure_threshold=balancer_config.failure_threshold,
+                recovery_timeout=balancer_config.recovery_timeout,
+            )
 
             # 注册到每个支持的模型
             for model in backend.models:
+                rate_limit = backend.model_rate_limits.get(model, backend.rate_limit)
+                if rate_limit.rpm > 0 or rate_limit.tpm > 0:
+                    self.rate_limiters[(backend_name, model)] = RateLimiter(
+                        f"{backend_name}/{model}",
+                        rpm=rate_limit.rpm,
+                        tpm=rate_limit.tpm,
+                        max_wait=rate_limit.max_wait,
+                    )
                 if model not in self.active_backends:
                     self.active_backends[model] = []
                 self.active_backends[model].append(adapter)
@@ -105,7 +130,12 @@ class LLMManager:
             if len(self.active_backends[model]) == 0:
                 self.active_backends.pop(model)
         backend = self.backends.pop(backend_name)
+        self.backend_health.pop(backend_name, None)
+        for key in [key for key in self.rate_limiters if key[0] == backend_name]:
+            self.rate_limiters.pop(key)
+        await backend.transport.close()
         self.event_bus.post(LLMAdapterUnloaded(backend))
+
     async def reload_backend(self, backend_name: str):
         """
         重新加载指定的后端
@@ -114,6 +144,14 @@ class LLMManager:
         await self.unload_backend(backend_name)
         self.load_backend(backend_name)
 
+    async def shutdown(self):
+        """关闭所有后端的连接池"""
+        for backend_name, backend in self.backends.items():
+            try:
+                await backend.transport.close()
+            except Exception as e:
+                self.logger.error(f"Failed to close transport of backend {backend_name}: {e}")
+
     def is_backend_available(self, backend_name: str) -> bool:
         """
         检查后端是否可用
@@ -145,18 +183,76 @@ class LLMManager:
 
     def get_llm(self, model_id: str) -> Optional[LLMBackendAdapter]:
         """
-        从指定模型的活跃后端中随机返回一个适配器实例
+        按负载均衡策略从指定模型的活跃后端中选择一个适配器实例。
+        返回的适配器会记录调用的耗时和结果，用于后续的选择和熔断，配置了限流时请求先排队等待配额；
+        请求失败时换用该模型的其他后端重试，并按配置对慢请求发出对冲请求。
         :param model_id: 模型ID
         :return: LLM适配器实例,如果没有找到则返回None
         """
-        if model_id not in self.active_backends:
+        backend = self._select_tracked(model_id, set())
+        if backend is None:
             return None
+        balancer_config = self.config.llms.balancer
+        return LLMBackendRouter(
+            model_id,
+            backend,
+            lambda exclude: self._select_tracked(model_id, exclude),
+            max_retries=balancer_config.max_retries,
+            retry_backoff=balancer_config.retry_backoff,
+            retry_backoff_max=balancer_config.retry_backoff_max,
+            hedge=balancer_config.hedge,
+            hedge_min_samples=balancer_config.hedge_min_samples,
+        )
 
-        backends = self.active_backends[model_id]
+    def _select_tracked(self, model_id: str, exclude: Set[str]) -> Optional[TrackedLLMBackend]:
+        """选择模型的一个后端，exclude 中的后端不参与选择"""
+        backends = self.active_backends.get(model_id)
         if not backends:
             return None
-        # TODO: 后续考虑支持更多的选择策略
-        return random.choice(backends)
+        names = {id(adapter): name for name, adapter in self.backends.items()}
+        candidates = [
+            self.backend_health[names[id(adapter)]]
+            for adapter in backends
+            if names[id(adapter)] not in exclude
+        ]
+        if not candidates:
+            return None
+        # 有可以立即获得限流配额的后端时，不选择需要排队的后端
+        ready = [health for health in candidates if self._rate_limit_ready(health.name, model_id)]
+        if ready:
+            candidates = ready
+        health = self.select_backend(model_id, candidates)
+        return TrackedLLMBackend(
+            self.backends[health.name], health, self.rate_limiters.get((health.name, model_id))
+        )
+
+    def _rate_limit_ready(self, backend_name: str, model_id: str) -> bool:
+        limiter = self.rate_limiters.get((backend_name, model_id))
+        return limiter is None or limiter.ready()
+
+    def select_backend(self, model_id: str, candidates: List[BackendHealth]) -> BackendHealth:
+        """
+        从候选后端中选出一个。
+        熔断冷却结束的后端优先放行一个探测请求，其余请求只在未熔断的后端中按策略选择，
+        所有后端都已熔断时仍按策略从全部后端中选择，而不是直接失败。
+        """
+        for health in candidates:
+            if not health.available and health.try_probe():
+                self.logger.info(f"Probing ejected backend {health.name} for model {model_id}")
+                return health
+        available = [health for health in candidates if health.available]
+        if not available:
+            self.logger.warning(f"All backends of model {model_id} are ejected, selecting from all of them")
+            available = candidates
+        return self.strategy.select(model_id, available)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """获取每个后端的健康统计，配置了限流的后端附带每个模型的排队统计"""
+        metrics = {name: health.snapshot() for name, health in self.backend_health.items()}
+        for (backend_name, model), limiter in self.rate_limiters.items():
+            if backend_name in metrics:
+                metrics[backend_name].setdefault("rate_limits", {})[model] = limiter.snapshot()
+        return metrics
     
     def get_supported_models(self, ability: LLMAbility) -> List[str]:
         """
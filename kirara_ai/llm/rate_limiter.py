@@ -0,0 +1,182 @@
+import asyncio
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from kirara_ai.llm.format.request import LLMChatRequest
+from kirara_ai.llm.format.response import Usage
+from kirara_ai.memory.composes.budget import estimate_tokens
+from kirara_ai.workflow.core.execution.metrics import DURATION_BUCKETS, Histogram
+
+
+class RateLimitExceeded(Exception):
+    """请求无法在最长等待时间内获得配额"""
+
+
+def estimate_request_tokens(req: LLMChatRequest) -> int:
+    """估算请求占用的 token 数：提示词的估算长度加上 max_tokens，与服务商计算 TPM 配额的方式一致"""
+    prompt = sum(estimate_tokens(message.content) for message in req.messages or [])
+    return prompt + (req.max_tokens or 0)
+
+
+class TokenBucket:
+    """
+    令牌桶，按每分钟的配额匀速补充，容量为一分钟的配额。
+    允许预支令牌使余额为负，后续的预约需要等待余额补回。
+    """
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+
+    def refill(self, now: float):
+        """按经过的时间补充令牌"""
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def delay(self, amount: float, now: float) -> float:
+        """预支指定数量的令牌后需要等待的时间，超过容量的数量按容量计算"""
+        self.refill(now)
+        balance = self.tokens - min(amount, self.capacity)
+        return 0.0 if balance >= 0 else -balance / self.rate
+
+    def take(self, amount: float):
+        self.tokens -= min(amount, self.capacity)
+
+    def give(self, amount: float):
+        self.tokens = min(self.capacity, self.tokens + amount)
+
+
+class RateLimiter:
+    """
+    单个后端上单个模型的客户端限流，同时限制每分钟请求数（RPM）和 token 数（TPM）。
+
+    请求按到达顺序预约配额，预约后等待到配额补足再发出，先到的请求总是先发出，
+    大请求不会被后到的小请求一直插队。预计等待时间超过 max_wait 的请求立即抛出 RateLimitExceeded，
+    由调用方换用其他后端。请求完成后按实际用量校正预支的 token 数。
+    """
+
+    def __init__(self, name: str, rpm: int = 0, tpm: int = 0, max_wait: float = 30):
+        """
+        :param name: 限流器名称，用于日志和统计
+        :param rpm: 每分钟请求数上限，0 表示不限制
+        :param tpm: 每分钟 token 数上限，0 表示不限制
+        :param max_wait: 最长排队时间（秒），0 表示不限制
+        """
+        self.name = name
+        self.rpm = rpm
+        self.tpm = tpm
+        self.max_wait = max_wait
+        self._requests = TokenBucket(rpm) if rpm > 0 else None
+        self._tokens = TokenBucket(tpm) if tpm > 0 else None
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.acquired = 0
+        self.rejected = 0
+        self.queue_time = Histogram(DURATION_BUCKETS)
+
+    def _reserve(self, tokens: int) -> float:
+        """预约配额并返回需要等待的时间，超过最长等待时间时不预约并抛出异常"""
+        with self._lock:
+            now = time.monotonic()
+            delay = max(
+                self._requests.delay(1, now) if self._requests else 0.0,
+                self._tokens.delay(tokens, now) if self._tokens else 0.0,
+            )
+            if self.max_wait and delay > self.max_wait:
+                self.rejected += 1
+                raise RateLimitExceeded(
+                    f"Rate limit of {self.name} exceeded, estimated wait {delay:.2f}s > {self.max_wait}s"
+                )
+            if self._requests:
+                self._requests.take(1)
+            if self._tokens:
+                self._tokens.take(tokens)
+            self.acquired += 1
+            self.queue_time.observe(delay)
+            if delay > 0:
+                self.waiting += 1
+            return delay
+
+    def _cancel(self, tokens: int):
+        """请求在等待中被取消时归还预约的配额"""
+        with self._lock:
+            if self._requests:
+                self._requests.give(1)
+            if self._tokens:
+                self._tokens.give(tokens)
+
+    def _done_waiting(self):
+        with self._lock:
+            self.waiting -= 1
+
+    async def acquire(self, tokens: int = 0) -> float:
+        """
+        等待获得一次请求的配额
+        :param tokens: 请求预计占用的 token 数
+        :return: 排队等待的时间（秒）
+        """
+        delay = self._reserve(tokens)
+        if delay <= 0:
+            return 0.0
+        try:
+            await asyncio.sleep(delay)
+        except BaseException:
+            self._cancel(tokens)
+            raise
+        finally:
+            self._done_waiting()
+        return delay
+
+    def acquire_sync(self, tokens: int = 0) -> float:
+        """在当前线程中阻塞等待配额，参数和返回值同 acquire"""
+        delay = self._reserve(tokens)
+        if delay <= 0:
+            return 0.0
+        try:
+            time.sleep(delay)
+        finally:
+            self._done_waiting()
+        return delay
+
+    def settle(self, estimated: int, usage: Optional[Usage]):
+        """
+        按实际用量校正预支的 token 数
+        :param estimated: 获得配额时预支的 token 数
+        :param usage: 响应中的用量，没有用量时保留预支的数量
+        """
+        # 部分适配器（如 Gemini、Claude）总是返回 0，视为用量未知
+        if self._tokens is None or usage is None or not usage.total_tokens:
+            return
+        with self._lock:
+            self._tokens.give(estimated - usage.total_tokens)
+
+    def ready(self) -> bool:
+        """当前是否可以立即获得一次请求的配额"""
+        with self._lock:
+            now = time.monotonic()
+            if self._requests and self._requests.delay(1, now) > 0:
+                return False
+            return not (self._tokens and self._tokens.delay(0, now) > 0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """获取统计数据"""
+        with self._lock:
+            now = time.monotonic()
+            available: Dict[str, Optional[float]] = {}
+            for key, bucket in (("available_requests", self._requests), ("available_tokens", self._tokens)):
+                if bucket is not None:
+                    bucket.refill(now)
+                available[key] = bucket.tokens if bucket is not None else None
+            return {
+                "rpm": self.rpm,
+                "tpm": self.tpm,
+                "waiting": self.waiting,
+                "acquired": self.acquired,
+                "rejected": self.rejected,
+                **available,
+                "queue_time": self.queue_time.to_dict(),
+            }
+
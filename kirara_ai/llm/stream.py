@@ -0,0 +1,92 @@
+import asyncio
+from typing import AsyncIterator, List, Optional
+
+from pydantic import PrivateAttr
+
+from kirara_ai.llm.format.response import (LLMChatResponse, LLMChatResponseContent, LLMChatResponseDelta,
+                                           Message)
+from kirara_ai.logger import get_logger
+
+logger = get_logger("LLMChatStream")
+
+
+class LLMChatStream(LLMChatResponse):
+    """
+    流式对话响应。
+
+    后台任务持续读取后端返回的增量内容，多个下游 block 可以同时读取，每次遍历都从第一段增量开始。
+    读取结束前只有 model 字段，结束后 choices 和 usage 会填充为完整的响应。
+    """
+
+    _deltas: List[LLMChatResponseDelta] = PrivateAttr(default_factory=list)
+    _done: bool = PrivateAttr(default=False)
+    _error: Optional[BaseException] = PrivateAttr(default=None)
+    _updated: Optional[asyncio.Event] = PrivateAttr(default=None)
+    _task: Optional[asyncio.Task] = PrivateAttr(default=None)
+
+    @classmethod
+    def start(cls, model: Optional[str], deltas: AsyncIterator[LLMChatResponseDelta]) -> "LLMChatStream":
+        """
+        在当前事件循环中开始读取增量内容
+        :param model: 模型 ID
+        :param deltas: 适配器返回的增量内容
+        """
+        stream = cls(model=model)
+        stream._updated = asyncio.Event()
+        stream._task = asyncio.get_running_loop().create_task(stream._consume(deltas))
+        return stream
+
+    async def _consume(self, deltas: AsyncIterator[LLMChatResponseDelta]):
+        try:
+            async for delta in deltas:
+                self._deltas.append(delta)
+                self._notify()
+        except BaseException as e:
+            self._error = e
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            logger.error(f"Failed to read streaming response from {self.model}: {e}")
+        finally:
+            self._finish()
+
+    def _notify(self):
+        # 替换事件而不是清除，保证所有等待中的读取方都能被唤醒
+        event, self._updated = self._updated, asyncio.Event()
+        event.set()
+
+    def _finish(self):
+        finish_reason = next((d.finish_reason for d in reversed(self._deltas) if d.finish_reason), None)
+        self.usage = next((d.usage for d in reversed(self._deltas) if d.usage), None)
+        self.choices = [
+            LLMChatResponseContent(
+                index=0,
+                message=Message(role="assistant", content="".join(d.content for d in self._deltas)),
+                finish_reason=finish_reason,
+            )
+        ]
+        self._done = True
+        self._notify()
+
+    @property
+    def done(self) -> bool:
+        """是否已经读取结束"""
+        return self._done
+
+    async def deltas(self) -> AsyncIterator[LLMChatResponseDelta]:
+        """从第一段开始返回增量内容，尚未生成的增量会等待生成后返回"""
+        index = 0
+        while True:
+            while index < len(self._deltas):
+                yield self._deltas[index]
+                index += 1
+            if self._done:
+                if self._error is not None:
+                    raise self._error
+                return
+            await self._updated.wait()
+
+    async def wait(self) -> "LLMChatStream":
+        """等待读取结束，读取失败时抛出对应的异常"""
+        async for _ in self.deltas():
+            pass
+        return self
@@ -0,0 +1,107 @@
+import asyncio
+from typing import Any, AsyncIterator, Dict, Optional
+
+import aiohttp
+
+from kirara_ai.config.global_config import LLMTransportConfig
+from kirara_ai.logger import get_logger
+
+
+class LLMTransport:
+    """
+    LLM 后端的异步 HTTP 连接池。
+
+    每个后端持有一个实例，请求之间复用 keep-alive 连接，避免每次请求都重新建立 TCP 和 TLS 连接。
+    会话在首次请求时于当前事件循环中创建，之后只能在该事件循环中使用，直到调用 close。
+    """
+
+    def __init__(self, config: Optional[LLMTransportConfig] = None):
+        self.config = config or LLMTransportConfig()
+        self.logger = get_logger("LLMTransport")
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        connector = aiohttp.TCPConnector(
+            limit=self.config.pool_size,
+            limit_per_host=self.config.pool_size_per_host,
+            keepalive_timeout=self.config.keepalive_timeout,
+        )
+        timeout = aiohttp.ClientTimeout(
+            total=self.config.timeout or None,
+            connect=self.config.connect_timeout or None,
+            sock_read=self.config.read_timeout or None,
+        )
+        return aiohttp.ClientSession(connector=connector, timeout=timeout, trust_env=True)
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        """
+        获取共享会话，会话尚未创建或已关闭时在当前事件循环中创建。
+        会话只能在创建它的事件循环中使用，切换事件循环前需要先在原事件循环中调用 close，
+        否则旧会话的连接无法被关闭，因此直接抛出异常。
+        """
+        loop = asyncio.get_running_loop()
+        if self._session is not None and not self._session.closed:
+            if self._loop is not loop:
+                raise RuntimeError(
+                    "LLMTransport is bound to another event loop, close it in that loop before switching loops"
+                )
+            return self._session
+        self._session = self._create_session()
+        self._loop = loop
+        return self._session
+
+    async def post_json(
+        self, url: str, data: Dict[str, Any], headers: Optional[Dict[str, str]] = None
+    ) -> Any:
+        """
+        发送 JSON 请求并解析 JSON 响应
+        :param url: 请求地址
+        :param data: 请求体
+        :param headers: 请求头
+        :return: 解析后的响应
+        """
+        async with self.session.post(url, json=data, headers=headers) as response:
+            if response.status >= 400:
+                self.logger.error(f"API Response: {await response.text()}")
+                response.raise_for_status()
+            return await response.json(content_type=None)
+
+    async def stream_lines(
+        self, url: str, data: Dict[str, Any], headers: Optional[Dict[str, str]] = None
+    ) -> AsyncIterator[str]:
+        """
+        发送 JSON 请求并逐行读取响应，用于 SSE 和 NDJSON 格式的流式接口
+        :param url: 请求地址
+        :param data: 请求体
+        :param headers: 请求头
+        :return: 去除首尾空白后的非空行
+        """
+        async with self.session.post(url, json=data, headers=headers) as response:
+            if response.status >= 400:
+                self.logger.error(f"API Response: {await response.text()}")
+                response.raise_for_status()
+            async for raw_line in response.content:
+                line = raw_line.decode("utf-8").strip()
+                if line:
+                    yield line
+
+    async def stream_sse(
+        self, url: str, data: Dict[str, Any], headers: Optional[Dict[str, str]] = None
+    ) -> AsyncIterator[str]:
+        """读取 SSE 响应中每个事件的 data 字段，遇到 [DONE] 时结束"""
+        async for line in self.stream_lines(url, data, headers):
+            if not line.startswith("data:"):
+                continue
+            payload = line[len("data:"):].strip()
+            if payload == "[DONE]":
+                return
+            yield payload
+
+    async def close(self):
+        """关闭连接池"""
+        session, self._session = self._session, None
+        self._loop = None
+        if session is not None and not session.closed:
+            await session.close()
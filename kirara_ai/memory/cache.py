@@ -0,0 +1,192 @@
+import sys
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterator, List, MutableMapping, Optional, Set
+
+from kirara_ai.logger import get_logger
+
+from .entry import MemoryEntry
+
+# 单条记忆除内容之外的大致开销（字节）
+_ENTRY_OVERHEAD = 256
+
+
+def estimate_entries_size(entries: List[MemoryEntry]) -> int:
+    """估算一组记忆占用的字节数"""
+    return sum(sys.getsizeof(entry.content) + _ENTRY_OVERHEAD for entry in entries)
+
+
+class MemoryCache(MutableMapping[str, List[MemoryEntry]]):
+    """
+    记忆的内存缓存，按作用域键索引。
+
+    超过作用域数量、记忆条数或字节数预算时按 LRU 淘汰，长时间未访问的作用域按 TTL 淘汰。
+    未写入持久化层的作用域在淘汰前会通过 on_evict 回写，淘汰后再次访问时由调用方重新加载。
+    """
+
+    def __init__(
+        self,
+        max_scopes: int = 0,
+        max_entries: int = 0,
+        max_bytes: int = 0,
+        ttl: float = 0,
+        on_evict: Optional[Callable[[str, List[MemoryEntry]], None]] = None,
+    ):
+        """
+        :param max_scopes: 缓存的作用域数量上限，0 表示不限制
+        :param max_entries: 缓存的记忆总条数上限，0 表示不限制
+        :param max_bytes: 缓存的记忆估算总字节数上限，0 表示不限制
+        :param ttl: 作用域未被访问多少秒后淘汰，0 表示不淘汰
+        :param on_evict: 淘汰未持久化的作用域前调用，用于回写
+        """
+        self.max_scopes = max_scopes
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.on_evict = on_evict
+        self.logger = get_logger("MemoryCache")
+        self._lock = threading.RLock()
+        # 按访问时间排序，最久未访问的在前
+        self._data: "OrderedDict[str, List[MemoryEntry]]" = OrderedDict()
+        self._accessed_at: Dict[str, float] = {}
+        self._entry_counts: Dict[str, int] = {}
+        self._sizes: Dict[str, int] = {}
+        self._dirty: Set[str] = set()
+        self._total_entries = 0
+        self._total_bytes = 0
+        # 统计数据
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, scope_key: str, default: Any = None) -> Any:
+        """获取作用域的记忆并记录命中情况"""
+        with self._lock:
+            self._evict_expired()
+            if scope_key not in self._data:
+                self._misses += 1
+                return default
+            self._hits += 1
+            self._touch(scope_key)
+            return self._data[scope_key]
+
+    def put(self, scope_key: str, entries: List[MemoryEntry], dirty: bool = True):
+        """
+        写入作用域的记忆。
+
+        :param dirty: 记忆是否尚未写入持久化层，从持久化层加载或已保存的记忆应传入 False
+        """
+        with self._lock:
+            self._set(scope_key, entries)
+            if dirty:
+                self._dirty.add(scope_key)
+            else:
+                self._dirty.discard(scope_key)
+            self._evict(keep=scope_key)
+
+    def mark_clean(self, scope_key: str):
+        """标记作用域的记忆已写入持久化层"""
+        with self._lock:
+            self._dirty.discard(scope_key)
+
+    def _set(self, scope_key: str, entries: List[MemoryEntry]):
+        self._discard(scope_key)
+        count = len(entries)
+        size = estimate_entries_size(entries) if self.max_bytes else 0
+        self._data[scope_key] = entries
+        self._entry_counts[scope_key] = count
+        self._sizes[scope_key] = size
+        self._total_entries += count
+        self._total_bytes += size
+        self._accessed_at[scope_key] = time.monotonic()
+
+    def _discard(self, scope_key: str) -> Optional[List[MemoryEntry]]:
+        entries = self._data.pop(scope_key, None)
+        if entries is not None:
+            self._total_entries -= self._entry_counts.pop(scope_key)
+            self._total_bytes -= self._sizes.pop(scope_key)
+            self._accessed_at.pop(scope_key)
+        return entries
+
+    def _touch(self, scope_key: str):
+        self._data.move_to_end(scope_key)
+        self._accessed_at[scope_key] = time.monotonic()
+
+    def _over_budget(self) -> bool:
+        return bool(
+            (self.max_scopes and len(self._data) > self.max_scopes)
+            or (self.max_entries and self._total_entries > self.max_entries)
+            or (self.max_bytes and self._total_bytes > self.max_bytes)
+        )
+
+    def _evict(self, keep: Optional[str] = None):
+        """淘汰过期的作用域，再按 LRU 淘汰直到满足预算，keep 指定的作用域不会被淘汰"""
+        self._evict_expired()
+        while self._over_budget():
+            scope_key = next((key for key in self._data if key != keep), None)
+            if scope_key is None:
+                break
+            self._evict_one(scope_key)
+
+    def _evict_expired(self):
+        if not self.ttl:
+            return
+        deadline = time.monotonic() - self.ttl
+        while self._data:
+            scope_key = next(iter(self._data))
+            if self._accessed_at[scope_key] > deadline:
+                break
+            self._evict_one(scope_key)
+
+    def _evict_one(self, scope_key: str):
+        entries = self._discard(scope_key)
+        self._evictions += 1
+        if scope_key in self._dirty:
+            self._dirty.discard(scope_key)
+            if self.on_evict is not None:
+                try:
+                    self.on_evict(scope_key, entries)
+                except Exception as e:
+                    self.logger.error(f"Failed to write back memory {scope_key} before eviction: {e}")
+
+    def __getitem__(self, scope_key: str) -> List[MemoryEntry]:
+        with self._lock:
+            entries = self._data[scope_key]
+            self._touch(scope_key)
+            return entries
+
+    def __setitem__(self, scope_key: str, entries: List[MemoryEntry]):
+        self.put(scope_key, entries)
+
+    def __delitem__(self, scope_key: str):
+        with self._lock:
+            if self._discard(scope_key) is None:
+                raise KeyError(scope_key)
+            self._dirty.discard(scope_key)
+
+    def __contains__(self, scope_key: object) -> bool:
+        with self._lock:
+            return scope_key in self._data
+
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            return iter(list(self._data))
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """获取缓存的统计数据"""
+        with self._lock:
+            lookups = self._hits + self._misses
+            return {
+                "scopes": len(self._data),
+                "entries": self._total_entries,
+                "bytes": self._total_bytes,
+                "dirty": len(self._dirty),
+                "hits": self._hits,
+                "misses": self._misses,
+                "hit_rate": self._hits / lookups if lookups else 0.0,
+                "evictions": self._evictions,
+            }
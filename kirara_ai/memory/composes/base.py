@@ -24,6 +24,16 @@ class MemoryComposer(ABC):
 class MemoryDecomposer(ABC):
     """记忆解析器抽象类"""
 
+    # 输出的长度预算，0 表示不限制；budget_unit 为 tokens 或 chars
+    budget: int = 0
+    budget_unit: str = "tokens"
+
+    def with_budget(self, budget: int, unit: str = "tokens") -> "MemoryDecomposer":
+        """设置输出的长度预算，不支持预算的解析器会忽略该设置"""
+        self.budget = budget
+        self.budget_unit = unit
+        return self
+
     @abstractmethod
     def decompose(self, entries: List[MemoryEntry]) -> str:
         """将记忆条目转换为字符串"""
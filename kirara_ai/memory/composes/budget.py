@@ -0,0 +1,68 @@
+import re
+import threading
+import weakref
+from typing import Any, Dict, Tuple
+
+# CJK 字符、假名和全角标点通常每个字符至少占一个 token
+_WIDE_CHAR = re.compile(r"[\u2e80-\u9fff\uac00-\ud7af\uf900-\ufaff\uff00-\uffef]")
+_WHITESPACE = re.compile(r"\s+")
+
+# 英文等文本平均每个 token 约 4 个字符
+_CHARS_PER_TOKEN = 4
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    离线估算文本的 token 数，不依赖具体模型的分词器。
+    宽字符按每个一个 token 计算，其余字符按每 4 个一个 token 计算，结果略偏保守。
+    """
+    if not text:
+        return 0
+    wide = len(_WIDE_CHAR.findall(text))
+    narrow = len(_WHITESPACE.sub("", text)) - wide
+    return wide + (narrow + _CHARS_PER_TOKEN - 1) // _CHARS_PER_TOKEN
+
+
+def measure(text: str, unit: str) -> int:
+    """按预算单位计算文本的长度，unit 为 tokens 或 chars"""
+    if unit == "chars":
+        return len(text)
+    return estimate_tokens(text)
+
+
+class RenderCache:
+    """
+    记忆内容长度的缓存，按记忆对象缓存，避免每次查询都重新估算全部历史记忆。
+    只保存记忆对象的弱引用，记忆从内存缓存中淘汰后对应的缓存项随之删除。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._data: Dict[Tuple[int, str], Tuple["weakref.ref[Any]", str, int]] = {}
+
+    def measure(self, entry: Any, unit: str) -> int:
+        """获取记忆内容的长度，内容变化后重新计算"""
+        key = (id(entry), unit)
+        content = entry.content
+        with self._lock:
+            cached = self._data.get(key)
+            if cached is not None and cached[0]() is entry and cached[1] is content:
+                return cached[2]
+
+        size = measure(content, unit)
+        ref = weakref.ref(entry, lambda ref, key=key: self._discard(key, ref))
+        with self._lock:
+            self._data[key] = (ref, content, size)
+        return size
+
+    def _discard(self, key: Tuple[int, str], ref: "weakref.ref[Any]"):
+        # 回调可能在持有锁的线程中由垃圾回收触发，这里不加锁，只删除仍指向该对象的缓存项
+        cached = self._data.get(key)
+        if cached is not None and cached[0] is ref:
+            self._data.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+render_cache = RenderCache()
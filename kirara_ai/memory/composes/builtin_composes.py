@@ -5,9 +5,10 @@ from kirara_ai.im.message import IMMessage
 from kirara_ai.im.sender import ChatSender
 from kirara_ai.llm.format.message import LLMChatMessage
 from kirara_ai.llm.format.response import Message
-from kirara_ai.memory.entry import MemoryEntry
+from kirara_ai.memory.entry import MemoryEntry, is_summary_entry
 
 from .base import ComposableMessageType, MemoryComposer, MemoryDecomposer
+from .budget import measure, render_cache
 
 
 class DefaultMemoryComposer(MemoryComposer):
@@ -31,18 +32,65 @@ class DefaultMemoryComposer(MemoryComposer):
 
 
 class DefaultMemoryDecomposer(MemoryDecomposer):
+    """
+    默认解析器，从最新的记忆开始倒序选取，直到达到条数上限或长度预算，再按时间顺序输出。
+    每条记忆内容的长度按记忆对象缓存，时间描述在一次解析中共用同一个当前时间。
+    摘要记忆输出在最前面。
+    """
+
+    summary_prefix = "更早之前的对话摘要："
+
+    def __init__(self, max_entries: int = 10):
+        self.max_entries = max_entries
+
     def decompose(self, entries: List[MemoryEntry]) -> str:
         if len(entries) == 0:
             return self.empty_message
 
+        now = datetime.now()
+        budget = self.budget
+        # 摘要不计入条数上限，最多占用一半的预算
+        summary_texts = [
+            f"{self.summary_prefix}{entry.content}" for entry in entries if is_summary_entry(entry)
+        ]
+        if summary_texts:
+            entries = [entry for entry in entries if not is_summary_entry(entry)]
+            summary_text = "\n".join(summary_texts)
+            if budget:
+                summary_text = self._truncate(summary_text, budget // 2)
+                budget = max(budget - measure(summary_text, self.budget_unit) - 1, 1)
+            summary_texts = [summary_text]
+            if not entries:
+                return summary_text
+
         # 7秒前，<记忆内容>
-        memory_texts = []
-        for entry in entries[-10:]:
-            time_diff = datetime.now() - entry.timestamp
-            time_str = self.get_time_str(time_diff)
-            memory_texts.append(f"{time_str}，{entry.content}")
+        memory_texts: List[str] = []
+        for entry in reversed(entries[-self.max_entries :] if self.max_entries else entries):
+            prefix = f"{self.get_time_str(now - entry.timestamp)}，"
+            if budget:
+                # 每条记忆额外占用一个换行
+                size = measure(prefix, self.budget_unit) + render_cache.measure(entry, self.budget_unit) + 1
+                if size > budget:
+                    if not memory_texts:
+                        # 最新的一条记忆也超出预算时截断内容，保证至少返回一条
+                        memory_texts.append(self._truncate(prefix + entry.content, budget))
+                    break
+                budget -= size
+            memory_texts.append(prefix + entry.content)
+
+        memory_texts.reverse()
+        return "\n".join(summary_texts + memory_texts)
 
-        return "\n".join(memory_texts)
+    def _truncate(self, text: str, budget: int) -> str:
+        if measure(text, self.budget_unit) <= budget:
+            return text
+        if self.budget_unit == "chars":
+            return text[:budget]
+        # 按估算比例截断，再逐步缩短直到满足预算
+        length = len(text) * budget // max(measure(text, "tokens"), 1)
+        while length > 0 and measure(text[:length], "tokens") > budget:
+            length = length * 9 // 10
+        return text[:length]
 
     def get_time_str(self, time_diff: timedelta) -> str:
         if time_diff.days > 0:
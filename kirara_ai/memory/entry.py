@@ -13,3 +13,12 @@ class MemoryEntry:
     content: str
     timestamp: datetime = field(default_factory=datetime.now)
     metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+# 摘要记忆在 metadata 中的类型标记
+SUMMARY_TYPE = "summary"
+
+
+def is_summary_entry(entry: MemoryEntry) -> bool:
+    """判断记忆是否为由旧记忆合并而成的摘要"""
+    return isinstance(entry.metadata, dict) and entry.metadata.get("type") == SUMMARY_TYPE
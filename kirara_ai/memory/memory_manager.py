@@ -1,15 +1,19 @@
-from typing import Dict, List, Optional, Type
+import bisect
+from typing import List, Optional, Tuple, Type
 
 from kirara_ai.config.global_config import GlobalConfig
 from kirara_ai.ioc.container import DependencyContainer
 from kirara_ai.memory.persistences.base import AsyncMemoryPersistence, MemoryPersistence
-from kirara_ai.memory.persistences.file_persistence import FileMemoryPersistence
+from kirara_ai.memory.persistences.file_persistence import FileMemoryPersistence, LogFileMemoryPersistence
 from kirara_ai.memory.persistences.redis_persistence import RedisMemoryPersistence
+from kirara_ai.memory.persistences.sqlite_persistence import SqliteMemoryPersistence
 
+from .cache import MemoryCache
 from .composes import MemoryComposer, MemoryDecomposer
 from .entry import MemoryEntry
 from .registry import ComposerRegistry, DecomposerRegistry, ScopeRegistry
 from .scopes import MemoryScope
+from .summarizer import MemorySummarizer
 
 
 class MemoryManager:
@@ -39,23 +43,57 @@ class MemoryManager:
         else:
             self.persistence = persistence
 
-        # 内存缓存
-        self.memories: Dict[str, List[MemoryEntry]] = {}
+        # 内存缓存，按作用域键索引，每个作用域内的记忆按时间排序
+        cache_config = self.config.cache
+        self.memories: MemoryCache = MemoryCache(
+            max_scopes=cache_config.max_scopes,
+            max_entries=cache_config.max_entries,
+            max_bytes=cache_config.max_bytes,
+            ttl=cache_config.ttl,
+            on_evict=self.persistence.save,
+        )
+
+        # 记忆摘要，未启用时超出最大条目数的旧记忆直接丢弃
+        self.summarizer: Optional[MemorySummarizer] = (
+            MemorySummarizer(self, self.config.summary) if self.config.summary.enable else None
+        )
 
     def _init_persistence(self):
         """初始化持久化层"""
         persistence_type = self.config.persistence.type
 
         if persistence_type == "file":
-            storage_dir = self.config.persistence.file["storage_dir"]
-            self.persistence = FileMemoryPersistence(storage_dir)
+            file_config = self.config.persistence.file
+            storage_dir = file_config["storage_dir"]
+            mode = file_config.get("mode", "json")
+            if mode == "log":
+                self.persistence = LogFileMemoryPersistence(
+                    storage_dir, max_entries=self.config.max_entries
+                )
+            elif mode == "json":
+                self.persistence = FileMemoryPersistence(
+                    storage_dir, codec=file_config.get("codec", "json")
+                )
+            else:
+                raise ValueError(f"Unsupported file persistence mode: {mode}")
         elif persistence_type == "redis":
             redis_config = self.config.persistence.redis
-            self.persistence = RedisMemoryPersistence(**redis_config)
+            self.persistence = RedisMemoryPersistence(
+                max_entries=self.config.max_entries, **redis_config
+            )
+        elif persistence_type == "sqlite":
+            sqlite_config = self.config.persistence.sqlite
+            self.persistence = SqliteMemoryPersistence(
+                max_entries=self.config.max_entries, **sqlite_config
+            )
         else:
             raise ValueError(f"Unsupported persistence type: {persistence_type}")
 
-        self.persistence = AsyncMemoryPersistence(self.persistence)
+        self.persistence = AsyncMemoryPersistence(
+            self.persistence,
+            max_batch_size=self.config.persistence.write_batch_size,
+            flush_interval=self.config.persistence.write_interval,
+        )
 
     def register_scope(self, name: str, scope_class: Type[MemoryScope]):
         """注册新的作用域类型"""
@@ -69,43 +107,134 @@ class MemoryManager:
         """注册新的解析器"""
         self.decomposer_registry.register(name, decomposer_class)
 
+    def _get_entries(self, scope_key: str) -> List[MemoryEntry]:
+        """获取作用域内缓存的记忆，未缓存时从持久化层加载"""
+        entries = self.memories.get(scope_key)
+        if entries is None:
+            entries = self._cache_loaded(scope_key, self.persistence.load(scope_key))
+        return entries
+
+    async def _aget_entries(self, scope_key: str) -> List[MemoryEntry]:
+        """_get_entries 的异步版本，未缓存时不阻塞事件循环"""
+        entries = self.memories.get(scope_key)
+        if entries is None:
+            loaded = await self.persistence.aload(scope_key)
+            # 等待加载期间其他协程可能已经加载并写入了该作用域
+            entries = self.memories.get(scope_key)
+            if entries is None:
+                entries = self._cache_loaded(scope_key, loaded)
+        return entries
+
+    def _cache_loaded(self, scope_key: str, loaded: List[MemoryEntry]) -> List[MemoryEntry]:
+        entries = list(loaded)
+        entries.sort(key=lambda x: x.timestamp)
+        self.memories.put(scope_key, entries, dirty=False)
+        return entries
+
+    def _insert(
+        self, scope_key: str, entries: List[MemoryEntry], entry: MemoryEntry
+    ) -> Tuple[List[MemoryEntry], bool]:
+        """
+        将记忆按时间顺序插入并截断到最大条目数，启用摘要时截断的旧记忆交给摘要器。
+
+        :return: 插入后的记忆，以及新记忆是否追加在末尾
+        """
+        # 记忆通常按时间顺序到达，只有乱序时才需要插入到对应位置
+        appended = not entries or entry.timestamp >= entries[-1].timestamp
+        if appended:
+            entries.append(entry)
+        else:
+            index = bisect.bisect_right([x.timestamp for x in entries], entry.timestamp)
+            entries.insert(index, entry)
+
+        if len(entries) > self.config.max_entries:
+            if self.summarizer is not None:
+                self.summarizer.submit(scope_key, entries[: -self.config.max_entries])
+            entries = entries[-self.config.max_entries :]
+        return entries, appended
+
     def store(self, scope: MemoryScope, entry: MemoryEntry) -> None:
         """存储新的记忆"""
         scope_key = scope.get_scope_key(entry.sender)
+        entries, appended = self._insert(scope_key, self._get_entries(scope_key), entry)
 
-        if scope_key not in self.memories:
-            self.memories[scope_key] = self.persistence.load(scope_key)
-
-        self.memories[scope_key].append(entry)
+        if appended:
+            # 追加到末尾的记忆可以增量写入
+            self.persistence.append(scope_key, [entry], entries)
+        else:
+            self.persistence.save(scope_key, entries)
+        # 重新放入缓存以更新用量统计，已经保存过的记忆不需要在淘汰时回写
+        self.memories.put(scope_key, entries, dirty=False)
 
-        if len(self.memories[scope_key]) > self.config.max_entries:
-            self.memories[scope_key] = self.memories[scope_key][
-                -self.config.max_entries :
-            ]
+    async def astore(self, scope: MemoryScope, entry: MemoryEntry) -> None:
+        """store 的异步版本"""
+        scope_key = scope.get_scope_key(entry.sender)
+        entries, appended = self._insert(scope_key, await self._aget_entries(scope_key), entry)
+        # 写入前先更新缓存，等待写入期间的查询可以读到新记忆
+        self.memories.put(scope_key, entries, dirty=True)
 
-        self.persistence.save(scope_key, self.memories[scope_key])
+        if appended:
+            await self.persistence.aappend(scope_key, [entry], entries)
+        else:
+            await self.persistence.asave(scope_key, entries)
+        self.memories.mark_clean(scope_key)
 
     def query(self, scope: MemoryScope, sender: str) -> List[MemoryEntry]:
-        """查询历史记忆"""
-        relevant_memories = []
+        """
+        查询历史记忆，只读取发送者所在作用域的记忆，结果按时间排序。
+        启用摘要时，作用域的摘要排在最前面。
+        """
         scope_key = scope.get_scope_key(sender)
+        entries = self._filter(scope, sender, self._get_entries(scope_key))
+        if self.summarizer is None:
+            return entries
+        return self._get_entries(self.get_summary_key(scope_key)) + entries
 
-        if scope_key not in self.memories:
-            self.memories[scope_key] = self.persistence.load(scope_key)
+    async def aquery(self, scope: MemoryScope, sender: str) -> List[MemoryEntry]:
+        """query 的异步版本"""
+        scope_key = scope.get_scope_key(sender)
+        entries = self._filter(scope, sender, await self._aget_entries(scope_key))
+        if self.summarizer is None:
+            return entries
+        return await self._aget_entries(self.get_summary_key(scope_key)) + entries
 
-        # 遍历所有记忆，找出作用域内的记忆
-        for scope_key, entries in self.memories.items():
+    @staticmethod
+    def get_summary_key(scope_key: str) -> str:
+        """作用域的摘要保存在单独的键下"""
+        return f"{scope_key}:summary"
+
+    def get_summary(self, scope_key: str) -> Optional[MemoryEntry]:
+        """获取作用域当前的摘要"""
+        summaries = self._get_entries(self.get_summary_key(scope_key))
+        return summaries[-1] if summaries else None
+
+    def save_summary(self, scope_key: str, summary: MemoryEntry):
+        """保存作用域的摘要，替换之前的摘要"""
+        summary_key = self.get_summary_key(scope_key)
+        self.persistence.save(summary_key, [summary])
+        self.memories.put(summary_key, [summary], dirty=False)
 
-            for entry in entries:
-                if scope.is_in_scope(entry.sender, sender):
-                    relevant_memories.append(entry)
+    @staticmethod
+    def get_summary_backlog_key(scope_key: str) -> str:
+        """关闭时尚未合并到摘要中的旧记忆保存在单独的键下"""
+        return f"{scope_key}:summary_pending"
 
-        # 按时间排序
-        relevant_memories.sort(key=lambda x: x.timestamp)
-        return relevant_memories
+    def get_summary_backlog(self, scope_key: str) -> List[MemoryEntry]:
+        """获取作用域上次关闭时尚未合并到摘要中的旧记忆"""
+        return self.persistence.load(self.get_summary_backlog_key(scope_key))
+
+    def save_summary_backlog(self, scope_key: str, entries: List[MemoryEntry]):
+        """保存作用域尚未合并到摘要中的旧记忆，为空时清除"""
+        self.persistence.save(self.get_summary_backlog_key(scope_key), entries)
+
+    @staticmethod
+    def _filter(scope: MemoryScope, sender: str, entries: List[MemoryEntry]) -> List[MemoryEntry]:
+        return [entry for entry in entries if scope.is_in_scope(entry.sender, sender)]
 
     def shutdown(self):
         """关闭记忆系统，确保数据持久化"""
+        if self.summarizer is not None:
+            self.summarizer.shutdown()
         # 保存所有内存中的数据
         for scope_key, entries in self.memories.items():
             self.persistence.save(scope_key, entries)
@@ -121,8 +250,15 @@ class MemoryManager:
         """
         scope_key = scope.get_scope_key(sender)
 
-        # 清空内存中的记录
-        self.memories[scope_key] = []
-
         # 保存空记录到持久化层
         self.persistence.save(scope_key, [])
+
+        # 清空内存中的记录
+        self.memories.put(scope_key, [], dirty=False)
+
+        if self.summarizer is not None:
+            self.summarizer.discard(scope_key)
+            summary_key = self.get_summary_key(scope_key)
+            self.persistence.save(summary_key, [])
+            self.memories.put(summary_key, [], dirty=False)
+            self.save_summary_backlog(scope_key, [])
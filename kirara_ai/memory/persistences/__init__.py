@@ -1,11 +1,14 @@
 from .base import AsyncMemoryPersistence, MemoryPersistence
-from .file_persistence import FileMemoryPersistence
+from .file_persistence import FileMemoryPersistence, LogFileMemoryPersistence
 from .redis_persistence import RedisMemoryPersistence
+from .sqlite_persistence import SqliteMemoryPersistence
 
 __all__ = [
     "MemoryPersistence",
     "AsyncMemoryPersistence",
     "FileMemoryPersistence",
+    "LogFileMemoryPersistence",
     "RedisMemoryPersistence",
+    "SqliteMemoryPersistence",
     "codecs",
 ]
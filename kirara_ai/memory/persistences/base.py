@@ -1,7 +1,8 @@
+import asyncio
 import threading
+import time
 from abc import ABC, abstractmethod
-from queue import Empty, Queue
-from typing import List
+from typing import Any, Dict, List, Optional, Tuple
 
 from kirara_ai.logger import get_logger
 from kirara_ai.memory.entry import MemoryEntry
@@ -22,37 +23,232 @@ class MemoryPersistence(ABC):
     def flush(self) -> None:
         """确保所有数据都已持久化"""
 
+    def append(
+        self, scope_key: str, new_entries: List[MemoryEntry], entries: List[MemoryEntry]
+    ) -> None:
+        """
+        追加新的记忆，支持增量写入的实现可以只写入新增的部分。
+
+        :param new_entries: 追加到末尾的新记忆
+        :param entries: 追加后作用域内的全部记忆，默认实现直接保存这些记忆
+        """
+        self.save(scope_key, entries)
+
+    def write_batch(self, operations: List[Tuple[str, str, Tuple[Any, ...]]]) -> None:
+        """
+        批量执行写操作，支持事务的实现可以在一次提交中完成。
+
+        :param operations: (方法名, 作用域键, 其余参数) 组成的列表，方法名为 save 或 append
+        """
+        for method, scope_key, args in operations:
+            getattr(self, method)(scope_key, *args)
+
+    # 异步接口，默认在线程中执行对应的同步方法，支持异步客户端的实现可以重写
+
+    async def aload(self, scope_key: str) -> List[MemoryEntry]:
+        return await asyncio.to_thread(self.load, scope_key)
+
+    async def asave(self, scope_key: str, entries: List[MemoryEntry]) -> None:
+        await asyncio.to_thread(self.save, scope_key, entries)
+
+    async def aappend(
+        self, scope_key: str, new_entries: List[MemoryEntry], entries: List[MemoryEntry]
+    ) -> None:
+        await asyncio.to_thread(self.append, scope_key, new_entries, entries)
+
+
 logger = get_logger("MemoryPersistence")
+
+# (方法名, 除作用域键以外的参数)
+_Operation = Tuple[str, Tuple[Any, ...]]
+
+
 class AsyncMemoryPersistence:
-    """异步持久化管理器"""
+    """
+    异步持久化管理器。
 
-    def __init__(self, persistence: MemoryPersistence):
+    写操作按作用域键合并，同一作用域在写入前只保留一次写操作，其中的记忆为最新快照；
+    等待写入的作用域数达到 max_batch_size，或最早的写操作等待超过 flush_interval 秒时，
+    由后台线程批量写入持久化层。
+    """
+
+    def __init__(
+        self,
+        persistence: MemoryPersistence,
+        max_batch_size: int = 100,
+        flush_interval: float = 1.0,
+    ):
+        """
+        :param max_batch_size: 触发批量写入的等待作用域数
+        :param flush_interval: 写操作最长等待时间（秒）
+        """
         self.persistence = persistence
-        self.queue = Queue()
+        self.max_batch_size = max_batch_size
+        self.flush_interval = flush_interval
+        self._condition = threading.Condition()
+        # 按首次入队时间排序，等待写入的操作
+        self._pending: Dict[str, _Operation] = {}
+        self._enqueued_at: Dict[str, float] = {}
+        # 正在写入的操作
+        self._inflight: Dict[str, _Operation] = {}
+        self._flush_requested = False
+        # 统计数据
+        self._enqueued = 0
+        self._coalesced = 0
+        self._batches = 0
+        self._written = 0
+        self._failed = 0
+        self._last_lag = 0.0
+        self._max_lag = 0.0
         self.running = True
         self.worker = threading.Thread(target=self._worker, daemon=True)
         self.worker.start()
 
+    def _enqueue(self, scope_key: str, operation: _Operation):
+        with self._condition:
+            self._enqueued += 1
+            pending = self._pending.get(scope_key)
+            if pending is None:
+                self._pending[scope_key] = operation
+                self._enqueued_at[scope_key] = time.monotonic()
+            else:
+                self._coalesced += 1
+                self._pending[scope_key] = self._coalesce(pending, operation)
+            # 队列由空变为非空时唤醒后台线程，使其开始按 flush_interval 计时
+            if len(self._pending) == 1 or len(self._pending) >= self.max_batch_size:
+                self._condition.notify_all()
+
+    @staticmethod
+    def _coalesce(pending: _Operation, operation: _Operation) -> _Operation:
+        if pending[0] == "append" and operation[0] == "append":
+            (pending_new, _), (new_entries, entries) = pending[1], operation[1]
+            return ("append", (pending_new + new_entries, entries))
+        # 新操作中的快照已经包含了之前所有的写入
+        return ("save", (operation[1][-1],))
+
+    def _batch_ready(self) -> bool:
+        if not self._pending:
+            return False
+        if self._flush_requested or not self.running or len(self._pending) >= self.max_batch_size:
+            return True
+        oldest = next(iter(self._enqueued_at.values()))
+        return time.monotonic() - oldest >= self.flush_interval
+
+    def _wait_time(self) -> Optional[float]:
+        if not self._pending:
+            return None
+        oldest = next(iter(self._enqueued_at.values()))
+        return max(0.0, self.flush_interval - (time.monotonic() - oldest))
+
     def _worker(self):
-        while self.running:
+        while True:
+            with self._condition:
+                while self.running and not self._batch_ready():
+                    self._condition.wait(timeout=self._wait_time())
+                if not self._pending:
+                    # 只有停止时才会在没有待写入操作的情况下退出等待
+                    break
+                batch, enqueued_at = self._pending, self._enqueued_at
+                self._pending, self._enqueued_at = {}, {}
+                self._inflight = batch
+
+            self._write(batch, enqueued_at)
+
+            with self._condition:
+                self._inflight = {}
+                if not self._pending:
+                    self._flush_requested = False
+                self._condition.notify_all()
+
+    def _write(self, batch: Dict[str, _Operation], enqueued_at: Dict[str, float]):
+        operations = [(method, scope_key, args) for scope_key, (method, args) in batch.items()]
+        for i in range(0, len(operations), self.max_batch_size):
+            chunk = operations[i : i + self.max_batch_size]
             try:
-                scope_key, entries = self.queue.get(timeout=1)
-                self.persistence.save(scope_key, entries)
-                self.queue.task_done()
-                print(f"Saved {scope_key} with {len(entries)} entries")
-            except Empty:
-                continue
+                self.persistence.write_batch(chunk)
             except Exception as e:
+                self._failed += len(chunk)
                 logger.error(f"Error saving memory: {e}")
                 continue
+            now = time.monotonic()
+            lag = max(now - enqueued_at[scope_key] for _, scope_key, _ in chunk)
+            self._batches += 1
+            self._written += len(chunk)
+            self._last_lag = lag
+            self._max_lag = max(self._max_lag, lag)
+            logger.debug(f"Saved {len(chunk)} memory scopes, lag {lag:.3f}s")
+
+    def _get_snapshot(self, scope_key: str) -> Optional[List[MemoryEntry]]:
+        with self._condition:
+            # 尚未写入的记忆以待写入的快照为准
+            operation = self._pending.get(scope_key) or self._inflight.get(scope_key)
+            if operation is not None:
+                return list(operation[1][-1])
+        return None
 
     def load(self, scope_key: str) -> List[MemoryEntry]:
+        snapshot = self._get_snapshot(scope_key)
+        if snapshot is not None:
+            return snapshot
         return self.persistence.load(scope_key)
 
+    async def aload(self, scope_key: str) -> List[MemoryEntry]:
+        snapshot = self._get_snapshot(scope_key)
+        if snapshot is not None:
+            return snapshot
+        return await self.persistence.aload(scope_key)
+
     def save(self, scope_key: str, entries: List[MemoryEntry]):
-        self.queue.put((scope_key, entries))
+        self._enqueue(scope_key, ("save", (list(entries),)))
+
+    def append(
+        self, scope_key: str, new_entries: List[MemoryEntry], entries: List[MemoryEntry]
+    ):
+        self._enqueue(scope_key, ("append", (list(new_entries), list(entries))))
+
+    # 写操作只是放入队列，不会阻塞事件循环
+
+    async def asave(self, scope_key: str, entries: List[MemoryEntry]):
+        self.save(scope_key, entries)
+
+    async def aappend(
+        self, scope_key: str, new_entries: List[MemoryEntry], entries: List[MemoryEntry]
+    ):
+        self.append(scope_key, new_entries, entries)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        立即写入所有等待中的操作并等待写入完成。
+
+        :return: 是否在超时前写入完成
+        """
+        with self._condition:
+            self._flush_requested = True
+            self._condition.notify_all()
+            return self._condition.wait_for(
+                lambda: not self._pending and not self._inflight, timeout=timeout
+            )
 
     def stop(self):
-        self.running = False
+        with self._condition:
+            self.running = False
+            self._condition.notify_all()
         self.worker.join()
         self.persistence.flush()
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """获取写入队列的统计数据"""
+        with self._condition:
+            oldest = next(iter(self._enqueued_at.values()), None)
+            return {
+                "queue_depth": len(self._pending),
+                "inflight": len(self._inflight),
+                "enqueued": self._enqueued,
+                "coalesced": self._coalesced,
+                "batches": self._batches,
+                "written": self._written,
+                "failed": self._failed,
+                "pending_lag": time.monotonic() - oldest if oldest is not None else 0.0,
+                "last_lag": self._last_lag,
+                "max_lag": self._max_lag,
+            }
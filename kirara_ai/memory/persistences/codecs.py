@@ -1,8 +1,12 @@
 import json
-from datetime import datetime
+import struct
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
 from types import FunctionType
+from typing import Any, Dict, List, Type
 
 from kirara_ai.im.sender import ChatSender, ChatType
+from kirara_ai.memory.entry import MemoryEntry
 
 
 class MemoryJSONEncoder(json.JSONEncoder):
@@ -43,3 +47,190 @@ def memory_json_decoder(obj):
                 raw_metadata=obj["raw_metadata"],
             )
     return obj
+
+
+def serialize_memory_entry(entry: MemoryEntry) -> Dict[str, Any]:
+    """将记忆条目转换为可以用 MemoryJSONEncoder 编码的字典"""
+    return {
+        "sender": entry.sender,
+        "content": entry.content,
+        "timestamp": entry.timestamp,
+        "metadata": entry.metadata,
+    }
+
+
+def deserialize_memory_entry(entry: Dict[str, Any]) -> MemoryEntry:
+    """将 memory_json_decoder 解码得到的字典还原为记忆条目"""
+    return MemoryEntry(
+        sender=entry["sender"],
+        content=entry["content"],
+        timestamp=(
+            datetime.fromisoformat(entry["timestamp"])
+            if isinstance(entry["timestamp"], str)
+            else entry["timestamp"]
+        ),
+        metadata=entry["metadata"],
+    )
+
+
+class MemoryCodec(ABC):
+    """将一个作用域的全部记忆编码为字节的编解码器"""
+
+    # 使用该编码保存的文件扩展名
+    extension: str = ""
+
+    @abstractmethod
+    def encode(self, entries: List[MemoryEntry]) -> bytes:
+        pass
+
+    @abstractmethod
+    def decode(self, data: bytes) -> List[MemoryEntry]:
+        pass
+
+
+class JSONMemoryCodec(MemoryCodec):
+    """JSON 编码，与旧版本的文件格式相同"""
+
+    extension = ".json"
+
+    def encode(self, entries: List[MemoryEntry]) -> bytes:
+        return json.dumps(
+            [serialize_memory_entry(entry) for entry in entries],
+            ensure_ascii=False,
+            indent=2,
+            cls=MemoryJSONEncoder,
+        ).encode("utf-8")
+
+    def decode(self, data: bytes) -> List[MemoryEntry]:
+        serialized_entries = json.loads(data, object_hook=memory_json_decoder)
+        return [deserialize_memory_entry(entry) for entry in serialized_entries]
+
+
+_BINARY_MAGIC = b"KMEM"
+_BINARY_VERSION = 1
+_UINT32 = struct.Struct("<I")
+# 标志位、发送者序号、时间戳（微秒）、内容长度、元数据长度
+_ENTRY_HEADER = struct.Struct("<BIqII")
+_UTC_OFFSET = struct.Struct("<i")
+_FLAG_AWARE = 1
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+class BinaryMemoryCodec(MemoryCodec):
+    """
+    紧凑的二进制编码。
+
+    数据以魔数和版本号开头，之后是发送者表和记忆列表。每个发送者在一个作用域中只保存一次，
+    记忆中只保存发送者序号；时间戳保存为微秒整数，带时区的时间戳额外保存 UTC 偏移；
+    空的元数据不占用空间。解码时不以魔数开头的数据按旧版本的 JSON 格式读取。
+    """
+
+    extension = ".bin"
+
+    def encode(self, entries: List[MemoryEntry]) -> bytes:
+        senders: List[bytes] = []
+        sender_indexes: Dict[str, int] = {}
+        # 从二进制数据解码出的记忆共用发送者对象，按对象缓存序号可以避免重复序列化
+        object_indexes: Dict[int, int] = {}
+        body: List[bytes] = []
+
+        for entry in entries:
+            index = object_indexes.get(id(entry.sender))
+            if index is None:
+                sender_data = json.dumps(entry.sender, ensure_ascii=False, cls=MemoryJSONEncoder)
+                index = sender_indexes.get(sender_data)
+                if index is None:
+                    index = sender_indexes[sender_data] = len(senders)
+                    senders.append(sender_data.encode("utf-8"))
+                object_indexes[id(entry.sender)] = index
+
+            timestamp = entry.timestamp
+            flags = 0
+            offset = timestamp.utcoffset()
+            if offset is not None:
+                flags |= _FLAG_AWARE
+                timestamp = timestamp.replace(tzinfo=None) - offset
+            content = entry.content.encode("utf-8")
+            metadata = (
+                json.dumps(entry.metadata, ensure_ascii=False, cls=MemoryJSONEncoder).encode("utf-8")
+                if entry.metadata
+                else b""
+            )
+            body.append(
+                _ENTRY_HEADER.pack(
+                    flags, index, (timestamp - _EPOCH) // _MICROSECOND, len(content), len(metadata)
+                )
+            )
+            if offset is not None:
+                body.append(_UTC_OFFSET.pack(int(offset.total_seconds())))
+            body.append(content)
+            body.append(metadata)
+
+        header = [_BINARY_MAGIC, bytes([_BINARY_VERSION]), _UINT32.pack(len(senders))]
+        for sender_data in senders:
+            header.append(_UINT32.pack(len(sender_data)))
+            header.append(sender_data)
+        header.append(_UINT32.pack(len(entries)))
+        return b"".join(header + body)
+
+    def decode(self, data: bytes) -> List[MemoryEntry]:
+        if not data.startswith(_BINARY_MAGIC):
+            return JSONMemoryCodec().decode(data)
+        version = data[len(_BINARY_MAGIC)]
+        if version != _BINARY_VERSION:
+            raise ValueError(f"Unsupported memory binary format version: {version}")
+
+        position = len(_BINARY_MAGIC) + 1
+        (sender_count,) = _UINT32.unpack_from(data, position)
+        position += _UINT32.size
+        senders = []
+        for _ in range(sender_count):
+            (length,) = _UINT32.unpack_from(data, position)
+            position += _UINT32.size
+            senders.append(
+                json.loads(data[position : position + length], object_hook=memory_json_decoder)
+            )
+            position += length
+
+        (entry_count,) = _UINT32.unpack_from(data, position)
+        position += _UINT32.size
+        entries = []
+        for _ in range(entry_count):
+            flags, index, micros, content_length, metadata_length = _ENTRY_HEADER.unpack_from(
+                data, position
+            )
+            position += _ENTRY_HEADER.size
+            timestamp = _EPOCH + micros * _MICROSECOND
+            if flags & _FLAG_AWARE:
+                (offset,) = _UTC_OFFSET.unpack_from(data, position)
+                position += _UTC_OFFSET.size
+                timestamp = timestamp.replace(tzinfo=timezone.utc).astimezone(
+                    timezone(timedelta(seconds=offset))
+                )
+            content = data[position : position + content_length].decode("utf-8")
+            position += content_length
+            metadata = (
+                json.loads(data[position : position + metadata_length], object_hook=memory_json_decoder)
+                if metadata_length
+                else {}
+            )
+            position += metadata_length
+            entries.append(
+                MemoryEntry(sender=senders[index], content=content, timestamp=timestamp, metadata=metadata)
+            )
+        return entries
+
+
+MEMORY_CODECS: Dict[str, Type[MemoryCodec]] = {
+    "json": JSONMemoryCodec,
+    "binary": BinaryMemoryCodec,
+}
+
+
+def get_codec(name: str) -> MemoryCodec:
+    """根据名称创建编解码器，插件可以向 MEMORY_CODECS 注册新的编解码器"""
+    codec_class = MEMORY_CODECS.get(name)
+    if codec_class is None:
+        raise ValueError(f"Unsupported memory codec: {name}")
+    return codec_class()
@@ -1,76 +1,229 @@
 import json
 import os
-from datetime import datetime
-from typing import List
+import threading
+from collections import OrderedDict
+from typing import List, Tuple
 
+from kirara_ai.logger import get_logger
 from kirara_ai.memory.entry import MemoryEntry
 
 from .base import MemoryPersistence
-from .codecs import MemoryJSONEncoder, memory_json_decoder
+from .codecs import (
+    JSONMemoryCodec,
+    MemoryJSONEncoder,
+    deserialize_memory_entry,
+    get_codec,
+    memory_json_decoder,
+    serialize_memory_entry,
+)
+
+
+def _load_json_file(file_path: str) -> List[MemoryEntry]:
+    with open(file_path, "rb") as f:
+        return JSONMemoryCodec().decode(f.read())
 
 
 class FileMemoryPersistence(MemoryPersistence):
     """文件持久化实现"""
 
-    def __init__(self, data_dir: str):
+    def __init__(self, data_dir: str, codec: str = "json"):
+        """
+        :param codec: 文件的编码格式，见 codecs.MEMORY_CODECS
+        """
         if not os.path.isabs(data_dir):
             data_dir = os.path.abspath(data_dir)
 
         self.data_dir = data_dir
+        self.codec = get_codec(codec)
         os.makedirs(data_dir, exist_ok=True)
 
     def _get_file_path(self, scope_key: str) -> str:
+        scope_key = scope_key.replace(":", "_")
+        return os.path.join(self.data_dir, f"{scope_key}{self.codec.extension}")
+
+    def _get_json_file_path(self, scope_key: str) -> str:
         scope_key = scope_key.replace(":", "_")
         return os.path.join(self.data_dir, f"{scope_key}.json")
 
     def save(self, scope_key: str, entries: List[MemoryEntry]) -> None:
         file_path = self._get_file_path(scope_key)
 
-        # 序列化记忆条目
-        serialized_entries = [
-            {
-                "sender": entry.sender,
-                "content": entry.content,
-                "timestamp": entry.timestamp,
-                "metadata": entry.metadata,
-            }
-            for entry in entries
-        ]
-
         # 写入文件
-        with open(file_path, "w", encoding="utf-8") as f:
-            json.dump(
-                serialized_entries,
-                f,
-                ensure_ascii=False,
-                indent=2,
-                cls=MemoryJSONEncoder,
-            )
+        with open(file_path, "wb") as f:
+            f.write(self.codec.encode(entries))
+
+        # 使用其他编码时，旧的 JSON 文件已经被新文件取代
+        json_file_path = self._get_json_file_path(scope_key)
+        if json_file_path != file_path and os.path.exists(json_file_path):
+            os.replace(json_file_path, json_file_path + ".bak")
 
     def load(self, scope_key: str) -> List[MemoryEntry]:
         file_path = self._get_file_path(scope_key)
 
         if not os.path.exists(file_path):
-            return []
-
-        # 读取并反序列化
-        with open(file_path, "r", encoding="utf-8") as f:
-            serialized_entries = json.load(f, object_hook=memory_json_decoder)
-
-        return [
-            MemoryEntry(
-                sender=entry["sender"],
-                content=entry["content"],
-                timestamp=(
-                    datetime.fromisoformat(entry["timestamp"])
-                    if isinstance(entry["timestamp"], str)
-                    else entry["timestamp"]
-                ),
-                metadata=entry["metadata"],
-            )
-            for entry in serialized_entries
-        ]
+            # 切换编码前保存的 JSON 文件
+            file_path = self._get_json_file_path(scope_key)
+            if not os.path.exists(file_path):
+                return []
+            return _load_json_file(file_path)
+
+        with open(file_path, "rb") as f:
+            return self.codec.decode(f.read())
 
     def flush(self) -> None:
         # 文件系统实现不需要特别的flush操作
         pass
+
+
+class LogFileMemoryPersistence(FileMemoryPersistence):
+    """
+    追加日志形式的文件持久化实现。
+
+    每个作用域对应一个 JSON Lines 文件，每行一条记忆。新记忆只追加到文件末尾，
+    写入开销与历史记忆条数无关；记录数超过 max_entries 的 compact_ratio 倍后重写文件，
+    只保留最新的 max_entries 条。进程崩溃时写了一半的末尾记录会在下次加载时被截断，
+    中间无法解析的记录会被跳过，不影响之后的记录。
+    """
+
+    def __init__(
+        self, data_dir: str, max_entries: int = 0, compact_ratio: float = 2, max_tails: int = 4096
+    ):
+        """
+        :param max_entries: 每个作用域保留的记忆条数，0 表示不限制且不压缩
+        :param compact_ratio: 日志记录数超过 max_entries 的多少倍时压缩
+        :param max_tails: 缓存日志末尾位置的作用域数上限，超出时淘汰最久未写入的作用域，下次写入时重新读取日志
+        """
+        super().__init__(data_dir)
+        self.max_entries = max_entries
+        self.compact_ratio = compact_ratio
+        self.max_tails = max_tails
+        self.logger = get_logger("LogFileMemoryPersistence")
+        self._lock = threading.RLock()
+        # 作用域键 -> (有效数据的末尾偏移, 日志中的记录数)
+        self._tails: "OrderedDict[str, Tuple[int, int]]" = OrderedDict()
+
+    def _get_file_path(self, scope_key: str) -> str:
+        return self._get_json_file_path(scope_key) + "l"
+
+    @staticmethod
+    def _encode(entries: List[MemoryEntry]) -> bytes:
+        return "".join(
+            json.dumps(serialize_memory_entry(entry), ensure_ascii=False, cls=MemoryJSONEncoder) + "\n"
+            for entry in entries
+        ).encode("utf-8")
+
+    def _set_tail(self, scope_key: str, offset: int, count: int):
+        self._tails[scope_key] = (offset, count)
+        self._tails.move_to_end(scope_key)
+        while len(self._tails) > self.max_tails:
+            self._tails.popitem(last=False)
+
+    def _read_log(self, scope_key: str) -> List[MemoryEntry]:
+        """读取日志并截断末尾不完整的记录，同时记录日志末尾的位置"""
+        file_path = self._get_file_path(scope_key)
+        entries: List[MemoryEntry] = []
+        offset = 0
+        with open(file_path, "rb") as f:
+            data = f.read()
+        for line_number, line in enumerate(data.splitlines(keepends=True), 1):
+            # 每条记录写入时都以换行结尾，没有换行的只能是写了一半的末尾记录
+            if not line.endswith(b"\n"):
+                break
+            offset += len(line)
+            try:
+                entries.append(
+                    deserialize_memory_entry(json.loads(line, object_hook=memory_json_decoder))
+                )
+            except (ValueError, KeyError, TypeError) as e:
+                self.logger.warning(f"Skipping invalid record at line {line_number} of {file_path}: {e}")
+
+        if offset < len(data):
+            self.logger.warning(
+                f"Truncating {len(data) - offset} bytes of incomplete records in {file_path}"
+            )
+            with open(file_path, "r+b") as f:
+                f.truncate(offset)
+        self._set_tail(scope_key, offset, len(entries))
+        return entries
+
+    def _migrate_legacy(self, scope_key: str) -> bool:
+        """将旧的 JSON 文件转换为日志文件，旧文件保留为 .bak"""
+        legacy_path = self._get_json_file_path(scope_key)
+        if not os.path.exists(legacy_path):
+            return False
+        entries = _load_json_file(legacy_path)
+        if self.max_entries:
+            entries = entries[-self.max_entries :]
+        self._rewrite(scope_key, entries)
+        os.replace(legacy_path, legacy_path + ".bak")
+        return True
+
+    def _ensure_tail(self, scope_key: str):
+        if scope_key in self._tails:
+            self._tails.move_to_end(scope_key)
+            return
+        if os.path.exists(self._get_file_path(scope_key)):
+            self._read_log(scope_key)
+        elif not self._migrate_legacy(scope_key):
+            self._set_tail(scope_key, 0, 0)
+
+    def _rewrite(self, scope_key: str, entries: List[MemoryEntry]):
+        """原子地重写整个日志"""
+        file_path = self._get_file_path(scope_key)
+        data = self._encode(entries)
+        temp_path = file_path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(data)
+        os.replace(temp_path, file_path)
+        self._set_tail(scope_key, len(data), len(entries))
+
+    def save(self, scope_key: str, entries: List[MemoryEntry]) -> None:
+        with self._lock:
+            if self.max_entries:
+                entries = entries[-self.max_entries :]
+            self._rewrite(scope_key, entries)
+            legacy_path = self._get_json_file_path(scope_key)
+            if os.path.exists(legacy_path):
+                os.replace(legacy_path, legacy_path + ".bak")
+
+    def append(
+        self, scope_key: str, new_entries: List[MemoryEntry], entries: List[MemoryEntry]
+    ) -> None:
+        if not new_entries:
+            return
+        with self._lock:
+            self._ensure_tail(scope_key)
+            offset, count = self._tails[scope_key]
+            file_path = self._get_file_path(scope_key)
+            data = self._encode(new_entries)
+            # 从记录的末尾位置写入，覆盖之前写入失败残留的数据
+            with open(file_path, "r+b" if os.path.exists(file_path) else "wb") as f:
+                f.seek(offset)
+                f.write(data)
+                f.truncate()
+            count += len(new_entries)
+            self._set_tail(scope_key, offset + len(data), count)
+
+            if self.max_entries and count > self.max_entries * self.compact_ratio:
+                self._compact(scope_key, new_entries[-1], entries)
+
+    def _compact(self, scope_key: str, last_entry: MemoryEntry, entries: List[MemoryEntry]):
+        # 异步持久化时 entries 可能已经包含了之后才会追加的记忆，只保留到本次追加的最后一条
+        for index in range(len(entries) - 1, -1, -1):
+            if entries[index] is last_entry:
+                entries = entries[: index + 1]
+                break
+        else:
+            entries = self._read_log(scope_key)
+        self.logger.debug(f"Compacting memory log {scope_key}")
+        self._rewrite(scope_key, entries[-self.max_entries :])
+
+    def load(self, scope_key: str) -> List[MemoryEntry]:
+        with self._lock:
+            if not os.path.exists(self._get_file_path(scope_key)):
+                if not self._migrate_legacy(scope_key):
+                    return []
+            entries = self._read_log(scope_key)
+        if self.max_entries:
+            entries = entries[-self.max_entries :]
+        return entries
@@ -1,70 +1,155 @@
 import json
-from datetime import datetime
-from typing import List
+from typing import Any, List, Optional, Tuple
 
+from kirara_ai.logger import get_logger
 from kirara_ai.memory.entry import MemoryEntry
 
 from .base import MemoryPersistence
-from .codecs import MemoryJSONEncoder, memory_json_decoder
+from .codecs import (
+    MemoryJSONEncoder,
+    deserialize_memory_entry,
+    memory_json_decoder,
+    serialize_memory_entry,
+)
+
+logger = get_logger("RedisMemoryPersistence")
 
 
 class RedisMemoryPersistence(MemoryPersistence):
-    """Redis持久化实现"""
+    """
+    Redis持久化实现
+
+    每个作用域的记忆保存为一个列表，每个元素是一条 JSON 编码的记忆。
+    同时提供基于 redis.asyncio 的异步接口，在事件循环中读写时不会阻塞线程。
+    追加记忆时只 RPUSH 新记忆并 LTRIM 到 max_entries 条，读取时只 LRANGE 最新的 max_entries 条。
+    旧版本将整个作用域保存为一个 JSON 字符串，读取时会自动迁移到列表中。
+    """
 
     def __init__(
         self,
-        redis_url: str = None,
+        redis_url: Optional[str] = None,
         host: str = "localhost",
         port: int = 6379,
         db: int = 0,
+        max_entries: int = 0,
+        key_prefix: str = "memory:list:",
     ):
+        """
+        :param max_entries: 每个作用域保留的记忆条数，0 表示不限制
+        :param key_prefix: 记忆列表键的前缀，旧版本的键即为作用域键本身
+        """
         import redis
+        import redis.asyncio as aioredis
 
+        # 同步客户端供异步持久化的工作线程使用，异步客户端供事件循环中的读写使用
         if redis_url:
-            self.redis = redis.from_url(redis_url)
+            pool = redis.ConnectionPool.from_url(redis_url)
+            async_pool = aioredis.ConnectionPool.from_url(redis_url)
         else:
-            self.redis = redis.Redis(host=host, port=port, db=db)
+            pool = redis.ConnectionPool(host=host, port=port, db=db)
+            async_pool = aioredis.ConnectionPool(host=host, port=port, db=db)
+        self.redis = redis.Redis(connection_pool=pool)
+        self.aredis = aioredis.Redis(connection_pool=async_pool)
+        self.max_entries = max_entries
+        self.key_prefix = key_prefix
+
+    def _get_list_key(self, scope_key: str) -> str:
+        return f"{self.key_prefix}{scope_key}"
+
+    @staticmethod
+    def _encode(entry: MemoryEntry) -> str:
+        return json.dumps(serialize_memory_entry(entry), ensure_ascii=False, cls=MemoryJSONEncoder)
+
+    @staticmethod
+    def _decode(data: Any) -> MemoryEntry:
+        return deserialize_memory_entry(json.loads(data, object_hook=memory_json_decoder))
+
+    def _push(self, pipe: Any, scope_key: str, entries: List[MemoryEntry]):
+        list_key = self._get_list_key(scope_key)
+        if entries:
+            pipe.rpush(list_key, *[self._encode(entry) for entry in entries])
+        if self.max_entries:
+            pipe.ltrim(list_key, -self.max_entries, -1)
+
+    def _queue_operation(self, pipe: Any, method: str, scope_key: str, args: Tuple[Any, ...]):
+        if method == "save":
+            (entries,) = args
+            if self.max_entries:
+                entries = entries[-self.max_entries :]
+            pipe.delete(self._get_list_key(scope_key), scope_key)
+            self._push(pipe, scope_key, entries)
+        elif method == "append":
+            new_entries, _ = args
+            self._push(pipe, scope_key, new_entries)
+        else:
+            raise ValueError(f"Unsupported memory operation: {method}")
 
     def save(self, scope_key: str, entries: List[MemoryEntry]) -> None:
-        # 序列化记忆条目
-        serialized_entries = [
-            {
-                "sender": entry.sender,
-                "content": entry.content,
-                "timestamp": entry.timestamp,
-                "metadata": entry.metadata,
-            }
-            for entry in entries
-        ]
+        self.write_batch([("save", scope_key, (entries,))])
 
-        # 存储到Redis
-        self.redis.set(
-            scope_key,
-            json.dumps(serialized_entries, ensure_ascii=False, cls=MemoryJSONEncoder),
-        )
+    def append(
+        self, scope_key: str, new_entries: List[MemoryEntry], entries: List[MemoryEntry]
+    ) -> None:
+        self.write_batch([("append", scope_key, (new_entries, entries))])
+
+    def write_batch(self, operations: List[Tuple[str, str, Tuple[Any, ...]]]) -> None:
+        # 所有写操作通过一次管道请求提交
+        pipe = self.redis.pipeline()
+        for method, scope_key, args in operations:
+            self._queue_operation(pipe, method, scope_key, args)
+        pipe.execute()
+
+    async def asave(self, scope_key: str, entries: List[MemoryEntry]) -> None:
+        await self.awrite_batch([("save", scope_key, (entries,))])
+
+    async def aappend(
+        self, scope_key: str, new_entries: List[MemoryEntry], entries: List[MemoryEntry]
+    ) -> None:
+        await self.awrite_batch([("append", scope_key, (new_entries, entries))])
+
+    async def awrite_batch(self, operations: List[Tuple[str, str, Tuple[Any, ...]]]) -> None:
+        pipe = self.aredis.pipeline()
+        for method, scope_key, args in operations:
+            self._queue_operation(pipe, method, scope_key, args)
+        await pipe.execute()
+
+    def _queue_load(self, pipe: Any, scope_key: str):
+        # 同时读取列表和旧版本的键，迁移完成后旧键不存在，不会带来额外开销
+        pipe.lrange(self._get_list_key(scope_key), -self.max_entries if self.max_entries else 0, -1)
+        pipe.get(scope_key)
 
     def load(self, scope_key: str) -> List[MemoryEntry]:
-        # 从Redis读取
-        data = self.redis.get(scope_key)
-        if not data:
-            return []
-
-        # 反序列化
-        serialized_entries = json.loads(data, object_hook=memory_json_decoder)
-
-        return [
-            MemoryEntry(
-                sender=entry["sender"],
-                content=entry["content"],
-                timestamp=(
-                    datetime.fromisoformat(entry["timestamp"])
-                    if isinstance(entry["timestamp"], str)
-                    else entry["timestamp"]
-                ),
-                metadata=entry["metadata"],
-            )
-            for entry in serialized_entries
+        pipe = self.redis.pipeline(transaction=False)
+        self._queue_load(pipe, scope_key)
+        items, legacy_data = pipe.execute()
+
+        if not legacy_data:
+            return [self._decode(item) for item in items]
+        entries = self._merge_legacy(scope_key, items, legacy_data)
+        self.save(scope_key, entries)
+        return entries[-self.max_entries :] if self.max_entries else entries
+
+    async def aload(self, scope_key: str) -> List[MemoryEntry]:
+        pipe = self.aredis.pipeline(transaction=False)
+        self._queue_load(pipe, scope_key)
+        items, legacy_data = await pipe.execute()
+
+        if not legacy_data:
+            return [self._decode(item) for item in items]
+        entries = self._merge_legacy(scope_key, items, legacy_data)
+        await self.asave(scope_key, entries)
+        return entries[-self.max_entries :] if self.max_entries else entries
+
+    def _merge_legacy(self, scope_key: str, items: List[Any], legacy_data: Any) -> List[MemoryEntry]:
+        """合并旧版本 JSON 字符串中的记忆和列表中的记忆，调用方负责保存以完成迁移"""
+        logger.info(f"Migrating memory {scope_key} to list layout")
+        entries = [
+            deserialize_memory_entry(entry)
+            for entry in json.loads(legacy_data, object_hook=memory_json_decoder)
         ]
+        # 迁移前已经追加到列表中的记忆排在旧记忆之后
+        entries.extend(self._decode(item) for item in items)
+        return entries
 
     def flush(self) -> None:
         self.redis.save()
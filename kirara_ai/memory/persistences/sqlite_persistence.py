@@ -0,0 +1,134 @@
+import json
+import os
+import sqlite3
+import threading
+from typing import Any, List, Tuple
+
+from kirara_ai.memory.entry import MemoryEntry
+
+from .base import MemoryPersistence
+from .codecs import (
+    MemoryJSONEncoder,
+    deserialize_memory_entry,
+    memory_json_decoder,
+    serialize_memory_entry,
+)
+
+
+class SqliteMemoryPersistence(MemoryPersistence):
+    """
+    SQLite 持久化实现。
+
+    所有作用域的记忆保存在同一个数据库的同一张表中，按 (scope_key, timestamp) 建立索引，
+    读取时只取最新的 max_entries 条。数据库使用 WAL 模式，批量写入在一个事务中提交。
+    """
+
+    def __init__(self, database: str = "./data/memory.db", max_entries: int = 0):
+        """
+        :param database: 数据库文件路径
+        :param max_entries: 每个作用域保留的记忆条数，0 表示不限制
+        """
+        if database != ":memory:":
+            database = os.path.abspath(database)
+            os.makedirs(os.path.dirname(database), exist_ok=True)
+
+        self.database = database
+        self.max_entries = max_entries
+        self._lock = threading.RLock()
+        # 写入由异步持久化的工作线程完成，读取在调用方线程中进行，共用一个连接并加锁
+        self.conn = sqlite3.connect(database, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS memories (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                scope_key TEXT NOT NULL,
+                timestamp REAL NOT NULL,
+                data TEXT NOT NULL
+            )
+            """
+        )
+        self.conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_memories_scope_timestamp ON memories (scope_key, timestamp)"
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def _to_row(scope_key: str, entry: MemoryEntry) -> Tuple[str, float, str]:
+        data = json.dumps(serialize_memory_entry(entry), ensure_ascii=False, cls=MemoryJSONEncoder)
+        return scope_key, entry.timestamp.timestamp(), data
+
+    def _save(self, scope_key: str, entries: List[MemoryEntry]):
+        if self.max_entries:
+            entries = entries[-self.max_entries :]
+        self.conn.execute("DELETE FROM memories WHERE scope_key = ?", (scope_key,))
+        self._insert(scope_key, entries)
+
+    def _append(self, scope_key: str, new_entries: List[MemoryEntry], entries: List[MemoryEntry]):
+        self._insert(scope_key, new_entries)
+        if self.max_entries:
+            self._trim(scope_key)
+
+    def _insert(self, scope_key: str, entries: List[MemoryEntry]):
+        self.conn.executemany(
+            "INSERT INTO memories (scope_key, timestamp, data) VALUES (?, ?, ?)",
+            [self._to_row(scope_key, entry) for entry in entries],
+        )
+
+    def _trim(self, scope_key: str):
+        """删除超出 max_entries 的旧记忆"""
+        cutoff = self.conn.execute(
+            """
+            SELECT timestamp, id FROM memories WHERE scope_key = ?
+            ORDER BY timestamp DESC, id DESC LIMIT 1 OFFSET ?
+            """,
+            (scope_key, self.max_entries),
+        ).fetchone()
+        if cutoff is None:
+            return
+        timestamp, row_id = cutoff
+        self.conn.execute(
+            """
+            DELETE FROM memories
+            WHERE scope_key = ? AND (timestamp < ? OR (timestamp = ? AND id <= ?))
+            """,
+            (scope_key, timestamp, timestamp, row_id),
+        )
+
+    def save(self, scope_key: str, entries: List[MemoryEntry]) -> None:
+        self.write_batch([("save", scope_key, (entries,))])
+
+    def append(
+        self, scope_key: str, new_entries: List[MemoryEntry], entries: List[MemoryEntry]
+    ) -> None:
+        self.write_batch([("append", scope_key, (new_entries, entries))])
+
+    def write_batch(self, operations: List[Tuple[str, str, Tuple[Any, ...]]]) -> None:
+        with self._lock, self.conn:
+            for method, scope_key, args in operations:
+                if method == "save":
+                    self._save(scope_key, *args)
+                elif method == "append":
+                    self._append(scope_key, *args)
+                else:
+                    raise ValueError(f"Unsupported memory operation: {method}")
+
+    def load(self, scope_key: str) -> List[MemoryEntry]:
+        with self._lock:
+            rows = self.conn.execute(
+                """
+                SELECT data FROM memories WHERE scope_key = ?
+                ORDER BY timestamp DESC, id DESC LIMIT ?
+                """,
+                (scope_key, self.max_entries or -1),
+            ).fetchall()
+        return [
+            deserialize_memory_entry(json.loads(data, object_hook=memory_json_decoder))
+            for (data,) in reversed(rows)
+        ]
+
+    def flush(self) -> None:
+        with self._lock:
+            self.conn.commit()
+            self.conn.execute("PRAGMA wal_checkpoint(PASSIVE)")
@@ -0,0 +1,155 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Optional, Set
+
+from kirara_ai.config.global_config import MemorySummaryConfig
+from kirara_ai.logger import get_logger
+
+from .entry import SUMMARY_TYPE, MemoryEntry
+
+if TYPE_CHECKING:
+    from .memory_manager import MemoryManager
+
+
+class MemorySummarizer:
+    """
+    记忆摘要器。
+
+    作用域的记忆超过最大条目数时，被截断的旧记忆不会直接丢弃，而是交给摘要器；
+    累计到 batch_size 条后，在后台线程中调用 LLM 将其与之前的摘要合并为新的摘要，
+    不会阻塞消息的回复。摘要作为一条记忆保存在作用域对应的摘要键下。
+    关闭时尚未合并的旧记忆保存在作用域的待摘要键下，重启后在下一次生成摘要时一并合并。
+    """
+
+    def __init__(self, manager: "MemoryManager", config: MemorySummaryConfig):
+        self.manager = manager
+        self.config = config
+        self.logger = get_logger("MemorySummarizer")
+        self._lock = threading.Lock()
+        # 作用域键 -> 等待合并到摘要中的旧记忆
+        self._pending: Dict[str, List[MemoryEntry]] = {}
+        self._scheduled: Set[str] = set()
+        # 作用域键 -> 正在生成的摘要的令牌，清空记忆时作废，作废后生成的摘要不会保存
+        self._running: Dict[str, object] = {}
+        self._closed = False
+        # 单线程依次生成摘要，避免同一作用域的摘要并发更新
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="MemorySummarizer")
+
+    def submit(self, scope_key: str, entries: List[MemoryEntry]):
+        """提交被截断的旧记忆"""
+        if not entries:
+            return
+        with self._lock:
+            pending = self._pending.setdefault(scope_key, [])
+            pending.extend(entries)
+            if len(pending) < self.config.batch_size or scope_key in self._scheduled or self._closed:
+                return
+            self._scheduled.add(scope_key)
+        self._executor.submit(self._run, scope_key)
+
+    def discard(self, scope_key: str):
+        """丢弃作用域中等待合并的记忆，并作废正在生成的摘要，清空记忆时调用"""
+        with self._lock:
+            self._pending.pop(scope_key, None)
+            self._running.pop(scope_key, None)
+
+    def _run(self, scope_key: str):
+        token = object()
+        with self._lock:
+            entries = self._pending.pop(scope_key, [])
+            self._scheduled.discard(scope_key)
+            self._running[scope_key] = token
+        try:
+            # 上次关闭时保存的待摘要记忆排在本次的旧记忆之前
+            backlog = self.manager.get_summary_backlog(scope_key)
+            entries = backlog + entries
+            if not entries:
+                return
+            try:
+                previous = self.manager.get_summary(scope_key)
+                summary = self.summarize(previous, entries)
+            except Exception as e:
+                self.logger.error(f"Failed to summarize memory {scope_key}: {e}")
+                # 放回队列等待下次重试，最多保留 max_pending 条
+                with self._lock:
+                    if self._running.get(scope_key) is token:
+                        pending = entries + self._pending.get(scope_key, [])
+                        self._pending[scope_key] = pending[-self.config.max_pending :]
+                        if backlog:
+                            self.manager.save_summary_backlog(scope_key, [])
+                return
+            with self._lock:
+                # 生成期间记忆被清空时丢弃本次的摘要
+                if self._running.get(scope_key) is not token:
+                    self.logger.debug(f"Memory {scope_key} was cleared, discarding its summary")
+                    return
+                self.manager.save_summary(scope_key, summary)
+                if backlog:
+                    self.manager.save_summary_backlog(scope_key, [])
+            self.logger.debug(f"Summarized {len(entries)} entries of memory {scope_key}")
+        finally:
+            with self._lock:
+                if self._running.get(scope_key) is token:
+                    self._running.pop(scope_key)
+
+    def summarize(self, previous: Optional[MemoryEntry], entries: List[MemoryEntry]) -> MemoryEntry:
+        """调用 LLM 将之前的摘要和新的旧记忆合并为新的摘要"""
+        from kirara_ai.llm.format.message import LLMChatMessage
+        from kirara_ai.llm.format.request import LLMChatRequest
+        from kirara_ai.llm.llm_manager import LLMManager
+        from kirara_ai.llm.llm_registry import LLMAbility
+
+        llm_manager = self.manager.container.resolve(LLMManager)
+        model_id = self.config.model_name or llm_manager.get_llm_id_by_ability(LLMAbility.TextChat)
+        if not model_id:
+            raise ValueError("No available LLM models found")
+        llm = llm_manager.get_llm(model_id)
+        if not llm:
+            raise ValueError(f"LLM {model_id} not found, please check the model name")
+
+        history = "\n".join(entry.content for entry in entries)
+        req = LLMChatRequest(
+            messages=[
+                LLMChatMessage(
+                    role="system",
+                    content=self.config.prompt.format(max_length=self.config.max_length),
+                ),
+                LLMChatMessage(
+                    role="user",
+                    content=f"之前的摘要：\n{previous.content if previous else '无'}\n\n新的对话记录：\n{history}",
+                ),
+            ],
+            model=model_id,
+        )
+        resp = llm.chat(req)
+        content = resp.choices[0].message.content if resp.choices and resp.choices[0].message else None
+        if not content:
+            raise ValueError("LLM returned an empty summary")
+
+        summarized = len(entries) + (previous.metadata.get("summarized", 0) if previous else 0)
+        return MemoryEntry(
+            sender=entries[-1].sender,
+            content=content.strip(),
+            timestamp=entries[-1].timestamp,
+            metadata={"type": SUMMARY_TYPE, "summarized": summarized},
+        )
+
+    def shutdown(self):
+        """
+        停止生成摘要：取消尚未开始的任务，等待正在生成的摘要保存完成，
+        再将尚未合并的旧记忆追加到待摘要键下，避免重启后丢失。
+        """
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+        self._executor.shutdown(wait=True, cancel_futures=True)
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._scheduled.clear()
+        for scope_key, entries in pending.items():
+            if not entries:
+                continue
+            backlog = self.manager.get_summary_backlog(scope_key) + entries
+            self.manager.save_summary_backlog(scope_key, backlog[-self.config.max_pending :])
+            self.logger.debug(f"Saved {len(entries)} pending entries of memory {scope_key}")
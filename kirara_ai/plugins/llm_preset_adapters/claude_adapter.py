@@ -1,10 +1,13 @@
+import json
+from typing import Any, AsyncIterator, Dict, Tuple
+
 import aiohttp
 import requests
 from pydantic import BaseModel, ConfigDict
 
 from kirara_ai.llm.adapter import AutoDetectModelsProtocol, LLMBackendAdapter
 from kirara_ai.llm.format.request import LLMChatRequest
-from kirara_ai.llm.format.response import LLMChatResponse
+from kirara_ai.llm.format.response import LLMChatResponse, LLMChatResponseDelta
 from kirara_ai.logger import get_logger
 
 
@@ -35,7 +38,7 @@ class ClaudeAdapter(LLMBackendAdapter, AutoDetectModelsProtocol):
         self.config = config
         self.logger = get_logger("ClaudeAdapter")
 
-    def chat(self, req: LLMChatRequest) -> LLMChatResponse:
+    def _build_request(self, req: LLMChatRequest) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
         api_url = f"{self.config.api_base}/messages"
         headers = {
             "x-api-key": self.config.api_key,
@@ -71,7 +74,10 @@ class ClaudeAdapter(LLMBackendAdapter, AutoDetectModelsProtocol):
 
         # Remove None fields
         data = {k: v for k, v in data.items() if v is not None}
+        return api_url, headers, data
 
+    def chat(self, req: LLMChatRequest) -> LLMChatResponse:
+        api_url, headers, data = self._build_request(req)
         response = requests.post(api_url, json=data, headers=headers)
         try:
             response.raise_for_status()
@@ -79,7 +85,25 @@ class ClaudeAdapter(LLMBackendAdapter, AutoDetectModelsProtocol):
         except Exception as e:
             self.logger.error(f"API Response: {response.text}")
             raise e
+        return self._parse_response(req, response_data)
+
+    async def achat(self, req: LLMChatRequest) -> LLMChatResponse:
+        api_url, headers, data = self._build_request(req)
+        response_data = await self.transport.post_json(api_url, data, headers)
+        return self._parse_response(req, response_data)
+
+    async def achat_stream(self, req: LLMChatRequest) -> AsyncIterator[LLMChatResponseDelta]:
+        api_url, headers, data = self._build_request(req)
+        data["stream"] = True
+        async for payload in self.transport.stream_sse(api_url, data, headers):
+            event = json.loads(payload)
+            # 只关心文本增量和结束原因，其余事件（message_start、ping 等）忽略
+            if event.get("type") == "content_block_delta":
+                yield LLMChatResponseDelta(content=event["delta"].get("text", ""))
+            elif event.get("type") == "message_delta":
+                yield LLMChatResponseDelta(finish_reason=event.get("delta", {}).get("stop_reason"))
 
+    def _parse_response(self, req: LLMChatRequest, response_data: Dict[str, Any]) -> LLMChatResponse:
         # 转换 Claude 响应格式为标准的 LLMChatResponse 格式
         transformed_response = {
             "id": response_data.get("id", ""),
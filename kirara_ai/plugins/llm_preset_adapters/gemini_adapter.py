@@ -1,3 +1,6 @@
+import json
+from typing import Any, AsyncIterator, Dict, Tuple
+
 import aiohttp
 import requests
 from pydantic import BaseModel, ConfigDict
@@ -5,7 +8,7 @@ from pydantic import BaseModel, ConfigDict
 from kirara_ai.llm.adapter import AutoDetectModelsProtocol, LLMBackendAdapter
 from kirara_ai.llm.format.message import LLMChatMessage
 from kirara_ai.llm.format.request import LLMChatRequest
-from kirara_ai.llm.format.response import LLMChatResponse
+from kirara_ai.llm.format.response import LLMChatResponse, LLMChatResponseDelta
 from kirara_ai.logger import get_logger
 
 
@@ -27,7 +30,7 @@ class GeminiAdapter(LLMBackendAdapter, AutoDetectModelsProtocol):
         self.config = config
         self.logger = get_logger("GeminiAdapter")
 
-    def chat(self, req: LLMChatRequest) -> LLMChatResponse:
+    def _build_request(self, req: LLMChatRequest) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
         api_url = f"{self.config.api_base}/models/{req.model}:generateContent"
         headers = {
             "x-goog-api-key": self.config.api_key,
@@ -51,7 +54,10 @@ class GeminiAdapter(LLMBackendAdapter, AutoDetectModelsProtocol):
         self.logger.debug(f"Contents: {data['contents']}")
         # Remove None fields
         data = {k: v for k, v in data.items() if v is not None}
+        return api_url, headers, data
 
+    def chat(self, req: LLMChatRequest) -> LLMChatResponse:
+        api_url, headers, data = self._build_request(req)
         response = requests.post(api_url, json=data, headers=headers)
         try:
             response.raise_for_status()
@@ -60,7 +66,26 @@ class GeminiAdapter(LLMBackendAdapter, AutoDetectModelsProtocol):
             print(f"API Response: {response.text}")
             raise e
         print(response_data)
+        return self._parse_response(req, response_data)
+
+    async def achat(self, req: LLMChatRequest) -> LLMChatResponse:
+        api_url, headers, data = self._build_request(req)
+        response_data = await self.transport.post_json(api_url, data, headers)
+        return self._parse_response(req, response_data)
+
+    async def achat_stream(self, req: LLMChatRequest) -> AsyncIterator[LLMChatResponseDelta]:
+        api_url, headers, data = self._build_request(req)
+        api_url = api_url.replace(":generateContent", ":streamGenerateContent") + "?alt=sse"
+        async for payload in self.transport.stream_sse(api_url, data, headers):
+            chunk = json.loads(payload)
+            candidate = (chunk.get("candidates") or [{}])[0]
+            parts = candidate.get("content", {}).get("parts", [])
+            yield LLMChatResponseDelta(
+                content="".join(part.get("text", "") for part in parts),
+                finish_reason=candidate.get("finishReason"),
+            )
 
+    def _parse_response(self, req: LLMChatRequest, response_data: Dict[str, Any]) -> LLMChatResponse:
         # Transform Gemini response format to match expected LLMChatResponse format
         transformed_response = {
             "id": response_data.get("promptFeedback", {}).get("blockReason", ""),
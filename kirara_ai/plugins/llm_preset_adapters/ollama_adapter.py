@@ -1,10 +1,13 @@
+import json
+from typing import Any, AsyncIterator, Dict, Tuple
+
 import aiohttp
 import requests
 from pydantic import BaseModel, ConfigDict
 
 from kirara_ai.llm.adapter import AutoDetectModelsProtocol, LLMBackendAdapter
 from kirara_ai.llm.format.request import LLMChatRequest
-from kirara_ai.llm.format.response import LLMChatResponse
+from kirara_ai.llm.format.response import LLMChatResponse, LLMChatResponseDelta
 from kirara_ai.logger import get_logger
 
 
@@ -18,7 +21,7 @@ class OllamaAdapter(LLMBackendAdapter, AutoDetectModelsProtocol):
         self.config = config
         self.logger = get_logger("OllamaAdapter")
 
-    def chat(self, req: LLMChatRequest) -> LLMChatResponse:
+    def _build_request(self, req: LLMChatRequest) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
         api_url = f"{self.config.api_base}/api/chat"
         headers = {"Content-Type": "application/json"}
 
@@ -45,7 +48,10 @@ class OllamaAdapter(LLMBackendAdapter, AutoDetectModelsProtocol):
             data["options"] = {
                 k: v for k, v in data["options"].items() if v is not None
             }
+        return api_url, headers, data
 
+    def chat(self, req: LLMChatRequest) -> LLMChatResponse:
+        api_url, headers, data = self._build_request(req)
         response = requests.post(api_url, json=data, headers=headers)
         try:
             response.raise_for_status()
@@ -53,7 +59,35 @@ class OllamaAdapter(LLMBackendAdapter, AutoDetectModelsProtocol):
         except Exception as e:
             print(f"API Response: {response.text}")
             raise e
+        return self._parse_response(req, response_data)
+
+    async def achat(self, req: LLMChatRequest) -> LLMChatResponse:
+        api_url, headers, data = self._build_request(req)
+        response_data = await self.transport.post_json(api_url, data, headers)
+        return self._parse_response(req, response_data)
+
+    async def achat_stream(self, req: LLMChatRequest) -> AsyncIterator[LLMChatResponseDelta]:
+        api_url, headers, data = self._build_request(req)
+        data["stream"] = True
+        # Ollama 的流式响应每行是一个 JSON 对象，最后一行 done 为 true 并带有 token 统计
+        async for line in self.transport.stream_lines(api_url, data, headers):
+            chunk = json.loads(line)
+            usage = None
+            if chunk.get("done"):
+                prompt_tokens = chunk.get("prompt_eval_count", 0)
+                completion_tokens = chunk.get("eval_count", 0)
+                usage = {
+                    "prompt_tokens": prompt_tokens,
+                    "completion_tokens": completion_tokens,
+                    "total_tokens": prompt_tokens + completion_tokens,
+                }
+            yield LLMChatResponseDelta(
+                content=chunk.get("message", {}).get("content", ""),
+                finish_reason="stop" if chunk.get("done") else None,
+                usage=usage,
+            )
 
+    def _parse_response(self, req: LLMChatRequest, response_data: Dict[str, Any]) -> LLMChatResponse:
         # 转换 Ollama 响应格式为标准的 LLMChatResponse 格式
         transformed_response = {
             "id": "ollama-" + req.model,
@@ -1,10 +1,13 @@
+import json
+from typing import Any, AsyncIterator, Dict, Tuple
+
 import aiohttp
 import requests
 from pydantic import BaseModel, ConfigDict
 
 from kirara_ai.llm.adapter import AutoDetectModelsProtocol, LLMBackendAdapter
 from kirara_ai.llm.format.request import LLMChatRequest
-from kirara_ai.llm.format.response import LLMChatResponse
+from kirara_ai.llm.format.response import LLMChatResponse, LLMChatResponseDelta
 
 
 class OpenAIConfig(BaseModel):
@@ -17,7 +20,7 @@ class OpenAIAdapter(LLMBackendAdapter, AutoDetectModelsProtocol):
     def __init__(self, config: OpenAIConfig):
         self.config = config
 
-    def chat(self, req: LLMChatRequest) -> LLMChatResponse:
+    def _build_request(self, req: LLMChatRequest) -> Tuple[str, Dict[str, str], Dict[str, Any]]:
         api_url = f"{self.config.api_base}/chat/completions"
         headers = {
             "Authorization": f"Bearer {self.config.api_key}",
@@ -44,7 +47,10 @@ class OpenAIAdapter(LLMBackendAdapter, AutoDetectModelsProtocol):
 
         # Remove None fields
         data = {k: v for k, v in data.items() if v is not None}
+        return api_url, headers, data
 
+    def chat(self, req: LLMChatRequest) -> LLMChatResponse:
+        api_url, headers, data = self._build_request(req)
         response = requests.post(api_url, json=data, headers=headers)
         try:
             response.raise_for_status()
@@ -55,6 +61,23 @@ class OpenAIAdapter(LLMBackendAdapter, AutoDetectModelsProtocol):
         print(response_data)
         return LLMChatResponse(**response_data)
 
+    async def achat(self, req: LLMChatRequest) -> LLMChatResponse:
+        api_url, headers, data = self._build_request(req)
+        response_data = await self.transport.post_json(api_url, data, headers)
+        return LLMChatResponse(**response_data)
+
+    async def achat_stream(self, req: LLMChatRequest) -> AsyncIterator[LLMChatResponseDelta]:
+        api_url, headers, data = self._build_request(req)
+        data["stream"] = True
+        async for payload in self.transport.stream_sse(api_url, data, headers):
+            chunk = json.loads(payload)
+            choice = (chunk.get("choices") or [{}])[0]
+            yield LLMChatResponseDelta(
+                content=(choice.get("delta") or {}).get("content") or "",
+                finish_reason=choice.get("finish_reason"),
+                usage=chunk.get("usage"),
+            )
+
     async def auto_detect_models(self) -> list[str]:
         api_url = f"{self.config.api_base}/models"
         async with aiohttp.ClientSession(trust_env=True) as session:
@@ -1,4 +1,4 @@
-from typing import Dict, Optional
+from typing import Any, Dict, Optional
 
 from pydantic import BaseModel
 
@@ -22,6 +22,23 @@ class SystemStatusResponse(BaseModel):
     status: SystemStatus
 
 
+class SystemMetricsResponse(BaseModel):
+    """运行指标响应"""
+
+    # 工作流 ID -> 工作流及其 block 的耗时、排队和结果大小直方图
+    workflows: Dict[str, Any]
+    # block 线程池的统计数据
+    thread_pool: Dict[str, Any]
+    # 消息调度队列的统计数据
+    dispatch: Dict[str, Any]
+    # 记忆缓存的统计数据
+    memory: Dict[str, Any]
+    # 记忆异步写入队列的统计数据
+    memory_persistence: Dict[str, Any]
+    # 后端名称 -> LLM 后端的健康统计
+    llm_backends: Dict[str, Any]
+
+
 class UpdateStatus(BaseModel):
     status: str
     message: str
@@ -15,13 +15,18 @@ from kirara_ai.config.global_config import GlobalConfig
 from kirara_ai.im.manager import IMManager
 from kirara_ai.internal import set_restart_flag, shutdown_event
 from kirara_ai.llm.llm_manager import LLMManager
+from kirara_ai.memory.memory_manager import MemoryManager
+from kirara_ai.memory.persistences import AsyncMemoryPersistence
 from kirara_ai.plugin_manager.plugin_loader import PluginLoader
 from kirara_ai.web.api.system.utils import (download_file, get_installed_version, get_latest_npm_version,
                                             get_latest_pypi_version)
+from kirara_ai.workflow.core.dispatch import WorkflowDispatcher
+from kirara_ai.workflow.core.execution.metrics import WorkflowMetrics
+from kirara_ai.workflow.core.execution.thread_pool import BlockThreadPool
 from kirara_ai.workflow.core.workflow import WorkflowRegistry
 
 from ...auth.middleware import require_auth
-from .models import SystemStatus, SystemStatusResponse, UpdateCheckResponse
+from .models import SystemMetricsResponse, SystemStatus, SystemStatusResponse, UpdateCheckResponse
 
 system_bp = Blueprint("system", __name__)
 
@@ -181,6 +186,29 @@ async def get_system_status():
     return SystemStatusResponse(status=status).model_dump()
 
 
+@system_bp.route("/metrics", methods=["GET"])
+@require_auth
+async def get_system_metrics():
+    """获取工作流执行指标"""
+    workflow_metrics: WorkflowMetrics = g.container.resolve(WorkflowMetrics)
+    thread_pool: BlockThreadPool = g.container.resolve(BlockThreadPool)
+    dispatcher: WorkflowDispatcher = g.container.resolve(WorkflowDispatcher)
+    memory_manager: MemoryManager = g.container.resolve(MemoryManager)
+    persistence = memory_manager.persistence
+    llm_manager: LLMManager = g.container.resolve(LLMManager)
+
+    return SystemMetricsResponse(
+        workflows=workflow_metrics.snapshot(),
+        thread_pool=thread_pool.get_metrics(),
+        dispatch=dispatcher.queue.get_metrics(),
+        memory=memory_manager.memories.get_metrics(),
+        memory_persistence=(
+            persistence.get_metrics() if isinstance(persistence, AsyncMemoryPersistence) else {}
+        ),
+        llm_backends=llm_manager.get_metrics(),
+    ).model_dump()
+
+
 @system_bp.route("/check-update", methods=["GET"])
 @require_auth
 async def check_update():
@@ -4,7 +4,13 @@ from kirara_ai.workflow.core.block.input_output import Input, Output
 
 
 class Block:
-    """block 的基类"""
+    """
+    block 的基类
+
+    execute 既可以是普通函数，也可以声明为 async def。
+    异步的 execute 会直接在事件循环上执行，不占用线程；
+    同步的 execute 会被放到线程池中执行。
+    """
 
     # block 的 id
     id: str
@@ -14,6 +20,10 @@ class Block:
     inputs: Dict[str, Input] = {}
     # block 的输出
     outputs: Dict[str, Output] = {}
+    # 是否为 CPU 密集型 block，为 True 时使用进程内共享的有界线程池执行
+    cpu_bound: bool = False
+    # 单次执行的超时时间（秒），为空时使用工作流的 block_timeout
+    timeout: Optional[float] = None
 
     def __init__(
         self,
@@ -1,7 +1,11 @@
+from typing import Set
+
+from kirara_ai.config.global_config import DispatchConfig, GlobalConfig
 from kirara_ai.im.adapter import IMAdapter
 from kirara_ai.im.message import IMMessage
 from kirara_ai.ioc.container import DependencyContainer
 from kirara_ai.logger import get_logger
+from kirara_ai.workflow.core.dispatch.queue import DispatchQueue
 from kirara_ai.workflow.core.dispatch.registry import DispatchRuleRegistry
 from kirara_ai.workflow.core.dispatch.rules.base import DispatchRule
 from kirara_ai.workflow.core.execution.executor import WorkflowExecutor
@@ -19,6 +23,20 @@ class WorkflowDispatcher:
         # 从容器获取注册表
         self.workflow_registry = container.resolve(WorkflowRegistry)
         self.dispatch_registry = container.resolve(DispatchRuleRegistry)
+        # 正在执行的工作流，用于统一取消
+        self.running_executors: Set[WorkflowExecutor] = set()
+
+        try:
+            dispatch_config = container.resolve(GlobalConfig).dispatch
+        except KeyError:
+            dispatch_config = DispatchConfig()
+        # 按会话排队的消息队列，同一会话的消息依次处理
+        self.queue = DispatchQueue(
+            self._dispatch,
+            max_concurrency=dispatch_config.max_concurrency,
+            max_pending=dispatch_config.max_pending,
+            overflow_policy=dispatch_config.overflow_policy,
+        )
 
     def register_rule(self, rule: DispatchRule):
         """注册一个调度规则"""
@@ -26,13 +44,20 @@ class WorkflowDispatcher:
         self.logger.info(f"Registered dispatch rule: {rule}")
 
     async def dispatch(self, source: IMAdapter, message: IMMessage):
+        """
+        将消息加入所属会话的队列，等待处理完成后返回工作流的执行结果。
+        消息因会话积压被丢弃时返回 None。
+        """
+        return await self.queue.submit(source, message)
+
+    async def _dispatch(self, source: IMAdapter, message: IMMessage):
         """
         根据消息内容选择第一个匹配的规则进行处理
         """
-        # 获取所有已启用的规则，按优先级排序
-        active_rules = self.dispatch_registry.get_active_rules()
+        # 获取可能匹配的已启用规则，按优先级排序
+        candidate_rules = self.dispatch_registry.get_candidate_rules(message)
 
-        for rule in active_rules:
+        for rule in candidate_rules:
             if rule.match(message, self.workflow_registry):
                 try:
                     self.logger.debug(f"Matched rule {rule}, executing workflow")
@@ -46,10 +71,28 @@ class WorkflowDispatcher:
                         if workflow is None:
                             self.logger.error(f"Workflow {rule} not found")
                             continue
-                        return await executor.run()
+                        self.running_executors.add(executor)
+                        try:
+                            return await executor.run()
+                        finally:
+                            self.running_executors.discard(executor)
                 except Exception as e:
                     self.logger.exception(e)
                     self.logger.error(f"Workflow execution failed: {e}")
                     raise e
         self.logger.debug("No matching rule found for message")
         return None
+
+    def cancel_all(self) -> int:
+        """
+        取消所有正在执行的工作流
+
+        :return: 被取消的工作流数量
+        """
+        cancelled = sum(1 for executor in list(self.running_executors) if executor.cancel())
+        self.queue.cancel_all()
+        return cancelled
+
+    async def wait_all(self):
+        """等待所有会话中的消息处理完毕，通常在 cancel_all 之后调用，确保被取消的工作流已经退出"""
+        await self.queue.join()
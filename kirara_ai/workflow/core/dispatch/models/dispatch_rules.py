@@ -1,6 +1,6 @@
-from typing import Any, Dict, List, Literal
+from typing import TYPE_CHECKING, Any, Dict, List, Literal, Optional, Tuple
 
-from pydantic import BaseModel
+from pydantic import BaseModel, PrivateAttr
 
 from kirara_ai.im.message import IMMessage
 from kirara_ai.ioc.container import DependencyContainer
@@ -8,6 +8,9 @@ from kirara_ai.logger import get_logger
 from kirara_ai.workflow.core.workflow import Workflow
 from kirara_ai.workflow.core.workflow.registry import WorkflowRegistry
 
+if TYPE_CHECKING:
+    from ..rules.base import DispatchRule
+
 logger = get_logger("DispatchRule")
 
 class SimpleDispatchRule(BaseModel):
@@ -31,6 +34,40 @@ class CombinedDispatchRule(BaseModel):
     rule_groups: List[RuleGroup]  # 规则组之间是 AND 关系
     metadata: Dict[str, Any] = {}
 
+    # 预先创建的规则实例，与 rule_groups 一一对应
+    _compiled_groups: Optional[List[Tuple[RuleGroup, List["DispatchRule"]]]] = PrivateAttr(default=None)
+
+    def compile(self, workflow_registry: WorkflowRegistry):
+        """
+        根据配置创建所有简单规则的实例，匹配时直接复用，避免每条消息都重新校验配置。
+        修改 rule_groups 后需要重新调用。
+        """
+        from ..rules.base import DispatchRule
+
+        compiled_groups = []
+        for group in self.rule_groups:
+            instances = []
+            for rule in group.rules:
+                try:
+                    rule_class = DispatchRule.get_rule_type(rule.type)
+                    instances.append(
+                        rule_class.from_config(
+                            rule_class.config_class(**rule.config),
+                            workflow_registry,
+                            self.workflow_id,
+                        )
+                    )
+                except Exception as e:
+                    # 创建失败的规则在匹配时视为无效规则
+                    logger.error(f"Rule {rule.type} from config {rule.config} creation failed: {e}")
+            compiled_groups.append((group, instances))
+        self._compiled_groups = compiled_groups
+
+    @property
+    def compiled_groups(self) -> Optional[List[Tuple[RuleGroup, List["DispatchRule"]]]]:
+        """已编译的规则组及其规则实例，尚未编译时为 None"""
+        return self._compiled_groups
+
     def match(self, message: IMMessage, workflow_registry: WorkflowRegistry) -> bool:
         """
         判断消息是否匹配该规则。
@@ -40,46 +77,42 @@ class CombinedDispatchRule(BaseModel):
         if not self.enabled:
             return False
 
+        if self._compiled_groups is None:
+            self.compile(workflow_registry)
+
         # 所有规则组都必须匹配（AND 关系）
-        for group in self.rule_groups:
-            
+        for group, instances in self._compiled_groups:
+
             # 如果组内没有规则，视为匹配
             if len(group.rules) == 0:
                 return True
 
-            # 获取组内所有规则的匹配结果
-            rule_results = []
-            for rule in group.rules:
-                try:
-                    from ..rules.base import DispatchRule
-
-                    # 创建具体的规则实例
-                    rule_class = DispatchRule.get_rule_type(rule.type)
-                    rule_instance = rule_class.from_config(
-                        rule_class.config_class(**rule.config),
-                        workflow_registry,
-                        self.workflow_id,
-                    )
-                    rule_results.append(rule_instance.match(message))
-                except Exception as e:
-                    # 如果规则创建或匹配过程出错，视为不匹配
-                    logger.error(f"Rule {rule.type} from config {rule.config} creation or matching failed: {e}")
-                    continue
-
-            # 根据操作符确定组的匹配结果
-            if not rule_results:  # 如果组内没有有效规则，视为不匹配
+            if not self._match_group(group.operator, instances, message):
                 return False
 
-            if group.operator == "and":
-                if not all(rule_results):  # AND 关系：所有规则都必须匹配
-                    return False
-            else:  # operator == "or"
-                if not any(rule_results):  # OR 关系：至少一个规则匹配
-                    return False
-
         # 所有规则组都匹配成功
         return True
 
+    @staticmethod
+    def _match_group(operator: str, instances: List["DispatchRule"], message: IMMessage) -> bool:
+        """
+        判断规则组是否匹配，结果确定后不再检查剩余规则。
+        匹配出错的规则视为无效规则，组内没有有效规则时视为不匹配。
+        """
+        has_valid_rule = False
+        for instance in instances:
+            try:
+                result = instance.match(message)
+            except Exception as e:
+                logger.error(f"Rule {instance.type_name} matching failed: {e}")
+                continue
+            has_valid_rule = True
+            if operator == "and" and not result:  # AND 关系：所有规则都必须匹配
+                return False
+            if operator == "or" and result:  # OR 关系：至少一个规则匹配
+                return True
+        return has_valid_rule and operator == "and"
+
     def get_workflow(self, container: DependencyContainer) -> Workflow:
         """获取该规则对应的工作流实例。"""
         return container.resolve(WorkflowRegistry).get(self.workflow_id, container) 
\ No newline at end of file
@@ -0,0 +1,211 @@
+import re
+from collections import deque
+from typing import Dict, Hashable, List, Optional, Set, Tuple
+
+from kirara_ai.logger import get_logger
+
+from .models.dispatch_rules import CombinedDispatchRule
+from .rules.base import DispatchRule
+from .rules.message_rules import KeywordMatchRule, PrefixMatchRule, RegexMatchRule
+
+logger = get_logger("DispatchRulePrefilter")
+
+# 反向引用在拼接后的正则中会指向错误的分组
+_BACKREFERENCE = re.compile(r"\\[1-9]|\(\?P=")
+
+
+class PrefixTrie:
+    """前缀树，一次遍历找出所有是文本前缀的模式"""
+
+    def __init__(self):
+        self._children: List[Dict[str, int]] = [{}]
+        self._values: List[Set[Hashable]] = [set()]
+
+    def add(self, prefix: str, value: Hashable):
+        node = 0
+        for char in prefix:
+            child = self._children[node].get(char)
+            if child is None:
+                child = len(self._children)
+                self._children.append({})
+                self._values.append(set())
+                self._children[node][char] = child
+            node = child
+        self._values[node].add(value)
+
+    def search(self, text: str) -> Set[Hashable]:
+        found = set(self._values[0])
+        node = 0
+        for char in text:
+            node = self._children[node].get(char)
+            if node is None:
+                break
+            found |= self._values[node]
+        return found
+
+
+class AhoCorasick:
+    """Aho–Corasick 自动机，一次遍历找出文本中出现的所有关键词"""
+
+    def __init__(self):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Set[Hashable]] = [set()]
+
+    def add(self, keyword: str, value: Hashable):
+        node = 0
+        for char in keyword:
+            child = self._goto[node].get(char)
+            if child is None:
+                child = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append(set())
+                self._goto[node][char] = child
+            node = child
+        self._output[node].add(value)
+
+    def build(self):
+        """计算失败指针，添加完所有关键词后调用"""
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail_child = self._goto[fail].get(char, 0)
+                self._fail[child] = fail_child if fail_child != child else 0
+                self._output[child] |= self._output[self._fail[child]]
+
+    def search(self, text: str) -> Set[Hashable]:
+        found = set(self._output[0])
+        node = 0
+        for char in text:
+            while node and char not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(char, 0)
+            if self._output[node]:
+                found |= self._output[node]
+        return found
+
+
+class CombinedRegex:
+    """
+    将多个正则拼接为一个分支正则，只要有一个正则能匹配，拼接后的正则就能匹配。
+    因此未命中时可以直接排除所有正则；命中时保留全部正则，由规则自行精确匹配。
+    """
+
+    def __init__(self):
+        self._patterns: List[Tuple[str, Hashable]] = []
+        self._always: Set[Hashable] = set()
+        self._combined: Optional[re.Pattern] = None
+
+    def add(self, pattern: str, value: Hashable):
+        if _BACKREFERENCE.search(pattern):
+            self._always.add(value)
+        else:
+            self._patterns.append((pattern, value))
+
+    def build(self):
+        if not self._patterns:
+            return
+        try:
+            self._combined = re.compile("|".join(f"(?:{pattern})" for pattern, _ in self._patterns))
+        except re.error as e:
+            # 例如包含只能出现在开头的全局标志，无法拼接时退化为逐条匹配
+            logger.warning(f"Failed to combine regex patterns, fallback to per-rule matching: {e}")
+            self._always.update(value for _, value in self._patterns)
+            self._patterns = []
+
+    def search(self, text: str) -> Set[Hashable]:
+        if self._combined is not None and self._combined.search(text):
+            return self._always | {value for _, value in self._patterns}
+        return set(self._always)
+
+
+class DispatchRulePrefilter:
+    """
+    调度规则预过滤器。
+
+    对于必须满足某个关键词、前缀或正则规则才能匹配的组合规则，
+    将这些文本规则编入前缀树、Aho–Corasick 自动机和拼接正则，
+    一次遍历消息内容即可得到候选规则，其余规则不再参与匹配。
+    无法判断的组合规则始终作为候选。
+    """
+
+    def __init__(self, rules: List[CombinedDispatchRule]):
+        """
+        :param rules: 按优先级排序的已启用规则
+        """
+        self.rules = rules
+        self._prefixes = PrefixTrie()
+        self._keywords = AhoCorasick()
+        self._regexes = CombinedRegex()
+        # 无法预过滤、始终需要完整匹配的规则序号
+        self._always: Set[int] = set()
+
+        for index, rule in enumerate(rules):
+            triggers = self._get_triggers(rule)
+            if triggers is None:
+                self._always.add(index)
+                continue
+            for trigger in triggers:
+                self._add_trigger(trigger, index)
+
+        self._keywords.build()
+        self._regexes.build()
+
+    @staticmethod
+    def _get_triggers(rule: CombinedDispatchRule) -> Optional[List[DispatchRule]]:
+        """
+        找出组合规则匹配的必要条件：至少一个文本规则需要命中。
+        返回 None 表示无法判断。
+        """
+        compiled_groups = rule.compiled_groups
+        if compiled_groups is None:
+            return None
+
+        best: Optional[List[DispatchRule]] = None
+        for group, instances in compiled_groups:
+            if len(group.rules) == 0:
+                # 空规则组直接视为匹配，后续规则组不再生效
+                return best
+            text_rules = [instance for instance in instances if _is_text_rule(instance)]
+            if not text_rules:
+                continue
+            if group.operator == "or":
+                if len(text_rules) != len(instances):
+                    continue
+                triggers = text_rules
+            else:
+                # AND 关系只需要选择一个文本规则，优先选择没有正则的规则
+                triggers = [min(text_rules, key=lambda instance: isinstance(instance, RegexMatchRule))]
+            if best is None or len(triggers) < len(best):
+                best = triggers
+        return best
+
+    def _add_trigger(self, trigger: DispatchRule, index: int):
+        if type(trigger) is PrefixMatchRule:
+            self._prefixes.add(trigger.prefix, index)
+        elif type(trigger) is KeywordMatchRule:
+            for keyword in trigger.keywords:
+                self._keywords.add(keyword, index)
+        elif type(trigger) is RegexMatchRule:
+            self._regexes.add(trigger.pattern.pattern, index)
+
+    def candidates(self, content: str) -> List[CombinedDispatchRule]:
+        """获取可能匹配该内容的规则，保持优先级顺序"""
+        indexes = (
+            self._always
+            | self._prefixes.search(content)
+            | self._keywords.search(content)
+            | self._regexes.search(content)
+        )
+        return [self.rules[index] for index in sorted(indexes)]
+
+
+def _is_text_rule(instance: DispatchRule) -> bool:
+    # 子类可能重写匹配逻辑，只处理这三种规则本身
+    return type(instance) in (KeywordMatchRule, PrefixMatchRule, RegexMatchRule)
@@ -0,0 +1,189 @@
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Hashable, List, Literal, Optional, Tuple
+
+from kirara_ai.im.adapter import IMAdapter
+from kirara_ai.im.message import IMMessage, TextMessage
+from kirara_ai.im.sender import ChatSender, ChatType
+from kirara_ai.logger import get_logger
+
+OverflowPolicy = Literal["drop_newest", "drop_oldest", "merge"]
+
+
+class _PendingMessage:
+    """等待处理的消息，合并后的消息会对应多个等待结果的调用方"""
+
+    __slots__ = ("source", "message", "futures")
+
+    def __init__(self, source: IMAdapter, message: IMMessage, future: asyncio.Future):
+        self.source = source
+        self.message = message
+        self.futures: List[asyncio.Future] = [future]
+
+    def resolve(self, result: Any = None, exception: Optional[BaseException] = None):
+        for future in self.futures:
+            if future.done():
+                continue
+            if exception is not None:
+                future.set_exception(exception)
+            else:
+                future.set_result(result)
+
+
+class DispatchQueue:
+    """
+    按会话排队的消息调度队列。
+
+    同一会话（同一 IM 适配器下，群聊按群，私聊按用户）的消息按到达顺序依次处理，保证记忆的读写顺序一致；
+    不同会话之间并行处理，同时处理的消息总数受全局上限约束。
+    单个会话积压的消息超过上限时，按照溢出策略丢弃或合并消息。
+    """
+
+    def __init__(
+        self,
+        handler: Callable[[IMAdapter, IMMessage], Awaitable[Any]],
+        max_concurrency: int = 16,
+        max_pending: int = 20,
+        overflow_policy: OverflowPolicy = "drop_newest",
+    ):
+        """
+        :param handler: 实际处理消息的函数
+        :param max_concurrency: 同时处理的消息数上限，0 表示不限制
+        :param max_pending: 单个会话等待处理的消息数上限，0 表示不限制
+        :param overflow_policy: 溢出策略，drop_newest 丢弃新消息，drop_oldest 丢弃最早的消息，
+            merge 将新消息合并到同一发送者的上一条等待中的消息
+        """
+        self.handler = handler
+        self.max_concurrency = max_concurrency
+        self.max_pending = max_pending
+        self.overflow_policy = overflow_policy
+        self.logger = get_logger("DispatchQueue")
+        self._queues: Dict[Hashable, Deque[_PendingMessage]] = {}
+        self._workers: Dict[Hashable, asyncio.Task] = {}
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._running = 0
+        self._dropped = 0
+        self._merged = 0
+
+    @staticmethod
+    def get_conversation_key(source: IMAdapter, sender: ChatSender) -> Tuple[int, str, Optional[str]]:
+        """
+        获取消息所属会话的标识，群聊按群排队，私聊按用户排队。
+        不同平台的群号和用户 ID 可能相同，因此标识中包含消息来源的适配器。
+        """
+        if sender.chat_type == ChatType.GROUP:
+            return (id(source), ChatType.GROUP.value, sender.group_id)
+        return (id(source), ChatType.C2C.value, sender.user_id)
+
+    async def submit(self, source: IMAdapter, message: IMMessage) -> Any:
+        """
+        提交消息并等待处理完成。
+
+        :return: 处理结果，消息被丢弃时返回 None
+        """
+        key = self.get_conversation_key(source, message.sender)
+        future = asyncio.get_running_loop().create_future()
+        queue = self._queues.setdefault(key, deque())
+
+        if self.max_pending and len(queue) >= self.max_pending:
+            self._handle_overflow(key, queue, _PendingMessage(source, message, future))
+        else:
+            queue.append(_PendingMessage(source, message, future))
+
+        if key not in self._workers:
+            self._workers[key] = asyncio.ensure_future(self._worker(key, queue))
+        return await future
+
+    def _handle_overflow(self, key: Hashable, queue: Deque[_PendingMessage], pending: _PendingMessage):
+        policy = self.overflow_policy
+        if policy == "merge":
+            last = queue[-1]
+            if last.message.sender.user_id == pending.message.sender.user_id:
+                last.message = IMMessage(
+                    sender=pending.message.sender,
+                    message_elements=[
+                        *last.message.message_elements,
+                        TextMessage("\n"),
+                        *pending.message.message_elements,
+                    ],
+                    raw_message=pending.message.raw_message,
+                )
+                last.futures.extend(pending.futures)
+                self._merged += 1
+                self.logger.warning(f"Conversation {key} is flooding, merged message into pending one")
+                return
+            # 不同发送者的消息无法合并，退化为丢弃最早的消息
+            policy = "drop_oldest"
+
+        self._dropped += 1
+        if policy == "drop_oldest":
+            queue.popleft().resolve(None)
+            queue.append(pending)
+            self.logger.warning(f"Conversation {key} is flooding, dropped oldest pending message")
+        else:
+            pending.resolve(None)
+            self.logger.warning(f"Conversation {key} is flooding, dropped new message")
+
+    def _get_semaphore(self) -> Optional[asyncio.Semaphore]:
+        # 在事件循环中创建，避免绑定到错误的事件循环
+        if self._semaphore is None and self.max_concurrency:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._semaphore
+
+    async def _worker(self, key: Hashable, queue: Deque[_PendingMessage]):
+        """依次处理同一会话的消息，队列清空后退出"""
+        pending: Optional[_PendingMessage] = None
+        try:
+            while queue:
+                pending = queue.popleft()
+                # 所有调用方都已取消等待，不再处理
+                if all(future.done() for future in pending.futures):
+                    continue
+                semaphore = self._get_semaphore()
+                if semaphore is None:
+                    await self._process(pending)
+                else:
+                    async with semaphore:
+                        await self._process(pending)
+                pending = None
+        except asyncio.CancelledError:
+            for item in ([pending] if pending else []) + list(queue):
+                for future in item.futures:
+                    future.cancel()
+            queue.clear()
+            raise
+        finally:
+            del self._workers[key]
+            if not queue and self._queues.get(key) is queue:
+                del self._queues[key]
+
+    async def _process(self, pending: _PendingMessage):
+        self._running += 1
+        try:
+            result = await self.handler(pending.source, pending.message)
+        except Exception as e:
+            pending.resolve(exception=e)
+        else:
+            pending.resolve(result)
+        finally:
+            self._running -= 1
+
+    def cancel_all(self):
+        """取消所有会话中等待和正在处理的消息"""
+        for worker in list(self._workers.values()):
+            worker.cancel()
+
+    async def join(self):
+        """等待所有会话的处理任务结束"""
+        while self._workers:
+            await asyncio.gather(*self._workers.values(), return_exceptions=True)
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """获取队列的统计数据"""
+        return {
+            "conversations": len(self._queues),
+            "pending": sum(len(queue) for queue in self._queues.values()),
+            "running": self._running,
+            "dropped": self._dropped,
+            "merged": self._merged,
+        }
@@ -3,11 +3,13 @@ from typing import Any, Dict, List, Optional
 
 from ruamel.yaml import YAML
 
+from kirara_ai.im.message import IMMessage
 from kirara_ai.ioc.container import DependencyContainer
 from kirara_ai.logger import get_logger
 from kirara_ai.workflow.core.workflow.registry import WorkflowRegistry
 
 from .models.dispatch_rules import CombinedDispatchRule, RuleGroup, SimpleDispatchRule
+from .prefilter import DispatchRulePrefilter
 from .rules.base import DispatchRule
 from .rules.message_rules import BotMentionMatchRule, KeywordMatchRule, PrefixMatchRule, RegexMatchRule
 from .rules.sender_rules import ChatSenderMatchRule, ChatSenderMismatchRule, ChatTypeMatchRule
@@ -21,6 +23,9 @@ class DispatchRuleRegistry:
         self.container = container
         self.workflow_registry = container.resolve(WorkflowRegistry)
         self.rules: Dict[str, CombinedDispatchRule] = {}
+        # 按优先级排序的已启用规则，规则变化时失效
+        self._active_rules: Optional[List[CombinedDispatchRule]] = None
+        self._prefilter: Optional[DispatchRulePrefilter] = None
         self.logger = get_logger("DispatchRuleRegistry")
         self.rules_dir = "data/dispatch_rules"
 
@@ -28,7 +33,9 @@ class DispatchRuleRegistry:
         """注册一个调度规则"""
         if not rule.rule_id:
             raise ValueError("Rule must have an ID")
+        rule.compile(self.workflow_registry)
         self.rules[rule.rule_id] = rule
+        self._invalidate_active_rules()
         self.logger.info(f"Registered dispatch rule: {rule}")
 
     def get_rule(self, rule_id: str) -> Optional[CombinedDispatchRule]:
@@ -41,8 +48,20 @@ class DispatchRuleRegistry:
 
     def get_active_rules(self) -> List[CombinedDispatchRule]:
         """获取所有已启用的规则，按优先级降序排序"""
-        active_rules = [rule for rule in self.rules.values() if rule.enabled]
-        return sorted(active_rules, key=lambda x: x.priority, reverse=True)
+        if self._active_rules is None:
+            active_rules = [rule for rule in self.rules.values() if rule.enabled]
+            self._active_rules = sorted(active_rules, key=lambda x: x.priority, reverse=True)
+        return list(self._active_rules)
+
+    def get_candidate_rules(self, message: IMMessage) -> List[CombinedDispatchRule]:
+        """获取可能匹配该消息的已启用规则，按优先级降序排序"""
+        if self._prefilter is None:
+            self._prefilter = DispatchRulePrefilter(self.get_active_rules())
+        return self._prefilter.candidates(message.content)
+
+    def _invalidate_active_rules(self):
+        self._active_rules = None
+        self._prefilter = None
 
     def create_rule(self, rule: CombinedDispatchRule) -> CombinedDispatchRule:
         """创建并注册一个新规则"""
@@ -71,6 +90,7 @@ class DispatchRuleRegistry:
         if rule_id not in self.rules:
             raise ValueError(f"Rule {rule_id} not found")
         del self.rules[rule_id]
+        self._invalidate_active_rules()
 
     def enable_rule(self, rule_id: str):
         """启用规则"""
@@ -78,6 +98,7 @@ class DispatchRuleRegistry:
         if not rule:
             raise ValueError(f"Rule {rule_id} not found")
         rule.enabled = True
+        self._invalidate_active_rules()
 
     def disable_rule(self, rule_id: str):
         """禁用规则"""
@@ -85,6 +106,7 @@ class DispatchRuleRegistry:
         if not rule:
             raise ValueError(f"Rule {rule_id} not found")
         rule.enabled = False
+        self._invalidate_active_rules()
 
     def _convert_old_rule(self, rule_data: Dict[str, Any]) -> CombinedDispatchRule:
         """将旧版本规则数据转换为新版本格式"""
@@ -1,18 +1,26 @@
 import asyncio
-import functools
+import inspect
+import time
 from collections import defaultdict
-from concurrent.futures import ThreadPoolExecutor
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
+from kirara_ai.config.global_config import GlobalConfig
 from kirara_ai.events.event_bus import EventBus
 from kirara_ai.ioc.container import DependencyContainer
 from kirara_ai.ioc.inject import Inject
 from kirara_ai.logger import get_logger
 from kirara_ai.workflow.core.block import Block, ConditionBlock, LoopBlock
 from kirara_ai.workflow.core.block.registry import BlockRegistry
+from kirara_ai.workflow.core.execution.metrics import BlockSpan, estimate_size
+from kirara_ai.workflow.core.execution.plan import ExecutionPlan
+from kirara_ai.workflow.core.execution.thread_pool import BlockThreadPool, get_default_block_thread_pool
 from kirara_ai.workflow.core.workflow import Workflow
 
 
+class WorkflowTimeoutError(asyncio.TimeoutError):
+    """工作流或 block 执行超时"""
+
+
 class WorkflowExecutor:
     
     @Inject()
@@ -30,100 +38,260 @@ class WorkflowExecutor:
         self.event_bus = event_bus
         self.results = defaultdict(dict)
         self.variables = {}  # 存储工作流变量
+        # 每个 block 执行的耗时记录
+        self.spans: List[BlockSpan] = []
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        # 工作流的截止时间，为空表示不限制
+        self.deadline: Optional[float] = None
+        self._task: Optional[asyncio.Future] = None
+        # 工作流级别的并发上限
+        self._semaphore = (
+            asyncio.Semaphore(workflow.max_concurrency) if workflow.max_concurrency else None
+        )
         self.logger.info(
             f"Initializing WorkflowExecutor for workflow '{workflow.name}'"
         )
         # self.logger.debug(f"Workflow has {len(workflow.blocks)} blocks and {len(workflow.wires)} wires")
-        self._build_execution_graph()
-
-    def _build_execution_graph(self):
-        """构建执行图，包含并行和条件逻辑"""
-        self.execution_graph = defaultdict(list)
-        # self.logger.debug("Building execution graph...")
-
-        for wire in self.workflow.wires:
-            # self.logger.debug(f"Processing wire: {wire.source_block.name}.{wire.source_output} -> "
-            #                  f"{wire.target_block.name}.{wire.target_input}")
-
-            # 验证连线的数据类型是否匹配
-            source_output = wire.source_block.outputs[wire.source_output]
-            target_input = wire.target_block.inputs[wire.target_input]
-            
-            # 使用 BlockRegistry 的类型系统进行类型兼容性检查
-            source_type = self.registry._type_system.get_type_name(source_output.data_type)
-            target_type = self.registry._type_system.get_type_name(target_input.data_type)
-            
-            if not self.registry.is_type_compatible(source_type, target_type):
-                error_msg = (
-                    f"Type mismatch in wire: {wire.source_block.name}.{wire.source_output} "
-                    f"({source_type}) -> {wire.target_block.name}.{wire.target_input} "
-                    f"({target_type})"
-                )
-                self.logger.error(error_msg)
-                raise TypeError(error_msg)
-                
-            # 将目标块添加到源块的执行图中
-            self.execution_graph[wire.source_block].append(wire.target_block)
-            # self.logger.debug(f"Added edge: {wire.source_block.name} -> {wire.target_block.name}")
+        self._load_execution_plan()
+        self._load_thread_pool()
+        self._load_timeouts()
+
+    def _load_execution_plan(self):
+        """加载预编译的执行计划，工作流未携带计划时现场编译"""
+        self.plan = self.workflow.execution_plan
+        if self.plan is None:
+            try:
+                self.plan = ExecutionPlan.compile(self.workflow, self.registry)
+            except TypeError as e:
+                self.logger.error(str(e))
+                raise
+        self.blocks_by_name = {block.name: block for block in self.workflow.blocks}
+
+    def _load_thread_pool(self):
+        """获取应用级共享的 block 线程池"""
+        try:
+            self.thread_pool = self.container.resolve(BlockThreadPool)
+        except KeyError:
+            self.thread_pool = get_default_block_thread_pool()
+
+    def _load_timeouts(self):
+        """加载工作流和 block 的超时时间，工作流未设置时使用全局配置"""
+        try:
+            config = self.container.resolve(GlobalConfig).workflow
+            default_timeout, default_block_timeout = config.default_timeout, config.default_block_timeout
+        except KeyError:
+            default_timeout, default_block_timeout = None, None
+        self.timeout = self.workflow.timeout or default_timeout or None
+        self.block_timeout = self.workflow.block_timeout or default_block_timeout or None
+
+    def remaining_time(self) -> Optional[float]:
+        """
+        距离工作流截止时间的剩余秒数，供 block 设置下游请求的超时时间。
+
+        :return: 剩余时间，工作流未设置超时时返回 None
+        """
+        if self.deadline is None:
+            return None
+        return max(self.deadline - time.monotonic(), 0.0)
+
+    def cancel(self) -> bool:
+        """
+        取消正在执行的工作流，正在执行的异步 block 会收到 CancelledError，
+        线程中的同步 block 会被放弃。
+
+        :return: 是否成功发出取消请求
+        """
+        if self._task is None or self._task.done():
+            return False
+        self.logger.warning(f"Cancelling workflow '{self.workflow.name}'")
+        return self._task.cancel()
+
+    @property
+    def workflow_id(self) -> str:
+        """工作流在注册表中的 ID，未注册的工作流使用其名称"""
+        return self.workflow.id or self.workflow.name
+
+    @property
+    def duration(self) -> float:
+        """工作流的执行耗时"""
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.monotonic()) - self.started_at
+
+    def _successors(self, block: Block) -> List[Block]:
+        """获取块的后继节点"""
+        return [self.blocks_by_name[name] for name in self.plan.successors.get(block.name, ())]
 
     async def run(self) -> Dict[str, Any]:
         """
         执行工作流，返回每个块的执行结果。
 
-        :return: 包含每个块执行结果的字典，键为块名，值为块的输出
+        :return: 包含每个块执行结果的字典，键为块名，值为块的输出，按拓扑顺序排列
         """
         from kirara_ai.events import WorkflowExecutionBegin, WorkflowExecutionEnd
+        self.started_at = time.monotonic()
+        if self.timeout:
+            self.deadline = self.started_at + self.timeout
         self.event_bus.post(WorkflowExecutionBegin(self.workflow, self))
         self.logger.info("Starting workflow execution")
-        loop = asyncio.get_event_loop()
-        with ThreadPoolExecutor() as executor:
-            # 从入口节点开始执行
-            entry_blocks = [block for block in self.workflow.blocks if not block.inputs]
-            # self.logger.debug(f"Identified entry blocks: {[b.name for b in entry_blocks]}")
-            await self._execute_nodes(entry_blocks, executor, loop)
-
-        self.logger.info("Workflow execution completed")
+        # 从入口节点开始执行
+        entry_blocks = [self.blocks_by_name[name] for name in self.plan.entry_blocks]
+        # self.logger.debug(f"Identified entry blocks: {[b.name for b in entry_blocks]}")
+        self._task = asyncio.ensure_future(self._execute_nodes(entry_blocks))
+        try:
+            await asyncio.wait_for(self._task, self.timeout)
+        except WorkflowTimeoutError:
+            raise
+        except asyncio.TimeoutError:
+            if not self._task.cancelled():
+                raise
+            self._on_timeout(self.timeout)
+            raise WorkflowTimeoutError(
+                f"Workflow {self.workflow.name} timed out after {self.timeout}s"
+            ) from None
+        finally:
+            self.finished_at = time.monotonic()
+
+        # 并发执行时结果的写入顺序不确定，按拓扑顺序重新排列
+        self.results = defaultdict(
+            dict,
+            sorted(self.results.items(), key=lambda item: self.plan.order.get(item[0], len(self.plan.order))),
+        )
+        self.logger.info(f"Workflow execution completed in {self.duration:.3f}s")
         self.event_bus.post(WorkflowExecutionEnd(self.workflow, self, self.results))
         return self.results
 
-    async def _execute_nodes(self, blocks: List[Block], executor, loop):
-        """执行一组节点"""
-        # self.logger.debug(f"Executing node group: {[b.name for b in blocks]}")
-
-        for block in blocks:
-            # self.logger.debug(f"Processing block: {block.name} ({type(block).__name__})")
-            if isinstance(block, ConditionBlock):
-                await self._execute_conditional_branch(block, executor, loop)
-            elif isinstance(block, LoopBlock):
-                await self._execute_loop(block, executor, loop)
-            else:
-                await self._execute_normal_block(block, executor, loop)
-
-    async def _execute_conditional_branch(self, block: ConditionBlock, executor, loop):
-        """执行条件分支"""
+    async def _execute_nodes(self, blocks: List[Block]):
+        """
+        以就绪队列的方式执行一组节点及其所有可达的后继节点。
+
+        所有依赖已满足的节点会作为独立的任务并发执行，
+        某个节点完成后再检查其后继节点是否就绪。
+        """
+        pending: Dict[asyncio.Task, Block] = {}
+
+        def schedule(candidates: List[Block]):
+            running = {block.name for block in pending.values()}
+            for block in candidates:
+                if block.name in running or not self._can_execute(block):
+                    continue
+                # self.logger.debug(f"Scheduling block: {block.name} ({type(block).__name__})")
+                if isinstance(block, ConditionBlock):
+                    coro = self._execute_conditional_branch(block)
+                elif isinstance(block, LoopBlock):
+                    coro = self._execute_loop(block)
+                else:
+                    coro = self._execute_normal_block(block)
+                pending[asyncio.ensure_future(coro)] = block
+                running.add(block.name)
+
+        schedule(blocks)
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # 按拓扑顺序处理同一批完成的任务，保证调度顺序确定
+                for task in sorted(done, key=lambda t: self.plan.order.get(pending[t].name, 0)):
+                    pending.pop(task)
+                    schedule(task.result())
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    def _on_timeout(self, timeout: float, block: Optional[Block] = None):
+        from kirara_ai.events import WorkflowExecutionTimeout
+
+        target = f"Block {block.name}" if block else f"Workflow {self.workflow.name}"
+        self.logger.error(f"{target} timed out after {timeout}s")
+        self.event_bus.post(
+            WorkflowExecutionTimeout(self.workflow, self, timeout, block.name if block else None)
+        )
+
+    async def _run_block(self, block: Block, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """执行块，受工作流并发上限和超时时间约束，并记录排队、执行耗时和结果大小"""
+        from kirara_ai.events import BlockExecutionEnd
+
+        span = BlockSpan(
+            workflow_id=self.workflow_id,
+            block_name=block.name,
+            block_type=type(block).__name__,
+            ready_at=time.monotonic(),
+        )
+        # 工作流的截止时间由 run 统一控制，这里只处理 block 自身的超时
+        timeout = block.timeout or self.block_timeout
+        # 在单独的任务中执行，超时后任务被取消，以此区分 block 自身抛出的超时异常
+        task = asyncio.ensure_future(self._acquire_and_dispatch(block, inputs, span))
+        try:
+            result = await asyncio.wait_for(task, timeout)
+            span.result_size = estimate_size(result)
+            return result
+        except asyncio.TimeoutError as e:
+            span.error = e
+            if not task.cancelled():
+                # block 自身抛出的超时异常（例如 HTTP 请求超时），不属于执行器的超时控制
+                raise
+            self._on_timeout(timeout, block)
+            raise WorkflowTimeoutError(f"Block {block.name} timed out after {timeout:.3f}s") from None
+        except BaseException as e:
+            span.error = e
+            raise
+        finally:
+            span.finished_at = time.monotonic()
+            self.spans.append(span)
+            self.event_bus.post(BlockExecutionEnd(self.workflow, self, span))
+
+    async def _acquire_and_dispatch(self, block: Block, inputs: Dict[str, Any], span: BlockSpan) -> Dict[str, Any]:
+        if self._semaphore is None:
+            return await self._dispatch_block(block, inputs, span)
+        async with self._semaphore:
+            return await self._dispatch_block(block, inputs, span)
+
+    async def _dispatch_block(self, block: Block, inputs: Dict[str, Any], span: BlockSpan) -> Dict[str, Any]:
+        """
+        根据块的类型选择执行方式：
+        异步块直接在事件循环上等待，同步块交给应用级共享的线程池。
+        """
+        if inspect.iscoroutinefunction(block.execute):
+            span.started_at = time.monotonic()
+            return await block.execute(**inputs)
+
+        def execute():
+            # 在工作线程中记录开始时间，排队时间包含线程池的等待时间
+            span.started_at = time.monotonic()
+            return block.execute(**inputs)
+
+        return await self.thread_pool.run(
+            execute,
+            workflow_id=self.workflow_id,
+            cpu_bound=block.cpu_bound,
+        )
+
+    async def _execute_conditional_branch(self, block: ConditionBlock) -> List[Block]:
+        """执行条件分支，返回被选中的分支"""
         self.logger.info(f"Executing ConditionBlock: {block.name}")
         inputs = self._gather_inputs(block)
         # self.logger.debug(f"ConditionBlock inputs: {list(inputs.keys())}")
 
-        result = await loop.run_in_executor(executor, block.execute, **inputs)
+        result = await self._run_block(block, inputs)
         self.results[block.name] = result
         self.logger.info(
             f"ConditionBlock {block.name} evaluation result: {result['condition_result']}"
         )
 
-        next_blocks = self.execution_graph[block]
+        next_blocks = [self.blocks_by_name[name] for name in self.plan.condition_branches[block.name]]
         if result["condition_result"]:
             # self.logger.debug(f"Taking THEN branch: {next_blocks[0].name}")
-            await self._execute_nodes([next_blocks[0]], executor, loop)
+            return [next_blocks[0]]
         elif len(next_blocks) > 1:
             # self.logger.debug(f"Taking ELSE branch: {next_blocks[1].name}")
-            await self._execute_nodes([next_blocks[1]], executor, loop)
-        else:
-            # self.logger.debug("No ELSE branch available")
-            pass
+            return [next_blocks[1]]
+        # self.logger.debug("No ELSE branch available")
+        return []
 
-    async def _execute_loop(self, block: LoopBlock, executor, loop):
-        """执行循环"""
+    async def _execute_loop(self, block: LoopBlock) -> List[Block]:
+        """执行循环，循环体在每次迭代中作为独立的子图调度"""
         self.logger.info(f"Starting LoopBlock: {block.name}")
         iteration = 0
 
@@ -133,7 +301,7 @@ class WorkflowExecutor:
             inputs = self._gather_inputs(block)
             # self.logger.debug(f"LoopBlock inputs: {list(inputs.keys())}")
 
-            result = await loop.run_in_executor(executor, block.execute, **inputs)
+            result = await self._run_block(block, inputs)
             self.results[block.name] = result
             self.logger.info(
                 f"LoopBlock {block.name} continuation check: {result['should_continue']}"
@@ -145,49 +313,31 @@ class WorkflowExecutor:
                 )
                 break
 
-            # self.logger.debug(f"Executing loop body: {self.execution_graph[block][0].name}")
-            loop_body = self.execution_graph[block][0]
-            await self._execute_nodes([loop_body], executor, loop)
+            # self.logger.debug(f"Executing loop body: {self.plan.loop_bodies[block.name]}")
+            loop_body = self.blocks_by_name[self.plan.loop_bodies[block.name]]
+            await self._execute_nodes([loop_body])
+        return []
 
-    async def _execute_normal_block(self, block: Block, executor, loop):
-        """执行普通块"""
-        # self.logger.debug(f"Evaluating Block: {block.name}")
-        futures = []
-
-        if self._can_execute(block):
-            inputs = self._gather_inputs(block)
-            self.logger.info(f"Executing Block: {block.name}")
-            # self.logger.debug(f"Input parameters: {list(inputs.keys())}")
-
-            future = loop.run_in_executor(
-                executor, functools.partial(block.execute, **inputs)
+    async def _execute_normal_block(self, block: Block) -> List[Block]:
+        """执行普通块，返回需要继续检查的后继节点"""
+        inputs = self._gather_inputs(block)
+        self.logger.info(f"Executing Block: {block.name}")
+        # self.logger.debug(f"Input parameters: {list(inputs.keys())}")
+
+        try:
+            result = await self._run_block(block, inputs)
+        except WorkflowTimeoutError:
+            raise
+        except Exception as e:
+            self.logger.error(
+                f"Block {block.name} execution failed: {str(e)}", exc_info=True
             )
-            futures.append((future, block))
-        else:
-            # self.logger.debug(f"Block {block.name} dependencies not met, skipping execution")
-            return
+            raise RuntimeError(f"Block {block.name} execution failed: {e}")
 
-        # 等待所有并行任务完成
-        for future, block in futures:
-            try:
-                result = await future
-                self.results[block.name] = result
-                self.logger.info(f"Block [{block.name}] executed successfully")
-                if result:
-                    # self.logger.debug(f"Execution result keys: {list(result.keys())}")
-                    pass
-                next_blocks = self.execution_graph[block]
-                if next_blocks:
-                    # self.logger.debug(f"Propagating to next blocks: {[b.name for b in next_blocks]}")
-                    await self._execute_nodes(next_blocks, executor, loop)
-                else:
-                    # self.logger.debug(f"Block {block.name} is terminal node")
-                    pass
-            except Exception as e:
-                self.logger.error(
-                    f"Block {block.name} execution failed: {str(e)}", exc_info=True
-                )
-                raise RuntimeError(f"Block {block.name} execution failed: {e}")
+        self.results[block.name] = result
+        self.logger.info(f"Block [{block.name}] executed successfully")
+        # if not next_blocks: self.logger.debug(f"Block {block.name} is terminal node")
+        return self._successors(block)
 
     def _can_execute(self, block: Block) -> bool:
         """检查节点是否可以执行"""
@@ -198,29 +348,21 @@ class WorkflowExecutor:
             # self.logger.debug(f"Block {block.name} has already been executed")
             return False
 
-        # 获取所有直接前置blocks
-        predecessor_blocks = set()
-        for wire in self.workflow.wires:
-            if wire.target_block == block:
-                predecessor_blocks.add(wire.source_block)
-
-        # 确保所有前置blocks都已执行完成
-        for pred_block in predecessor_blocks:
-            if pred_block.name not in self.results:
-                # self.logger.debug(f"Predecessor block {pred_block.name} not yet executed")
+        # 确保所有直接前置blocks都已执行完成，循环回边的来源在首次迭代时尚未执行，不计入依赖
+        for pred_name in self.plan.predecessors[block.name]:
+            if (pred_name, block.name) in self.plan.loop_back_edges:
+                continue
+            if pred_name not in self.results:
+                # self.logger.debug(f"Predecessor block {pred_name} not yet executed")
                 return False
 
         # 验证所有输入是否都能从正确的前置block获取
+        input_wires = self.plan.input_wires[block.name]
         for input_name in block.inputs:
-            input_satisfied = False
-            for wire in self.workflow.wires:
-                if (
-                    wire.target_block == block
-                    and wire.target_input == input_name
-                    and wire.source_block.name in self.results
-                ):
-                    input_satisfied = True
-                    break
+            source = input_wires.get(input_name)
+            if source is not None and (source[0], block.name) in self.plan.loop_back_edges:
+                continue
+            input_satisfied = source is not None and source[0] in self.results
 
             # 如果输入没有被满足，并且输入不是可空的，则返回False
             if not input_satisfied and not block.inputs[input_name].nullable:
@@ -235,24 +377,21 @@ class WorkflowExecutor:
         # self.logger.debug(f"Gathering inputs for Block: {block.name}")
         inputs = {}
 
-        # 创建输入名称到wire的映射
-        input_wire_map = {}
-        for wire in self.workflow.wires:
-            if wire.target_block == block:
-                input_wire_map[wire.target_input] = wire
+        input_wire_map = self.plan.input_wires[block.name]
 
         # 根据wire的连接关系收集输入
         for input_name in block.inputs:
             if input_name in input_wire_map:
-                wire = input_wire_map[input_name]
-                if wire.source_block.name in self.results:
-                    inputs[input_name] = self.results[wire.source_block.name][
-                        wire.source_output
-                    ]
-                    # self.logger.debug(f"Resolved input {input_name} from {wire.source_block.name}.{wire.source_output}")
+                source_name, source_output = input_wire_map[input_name]
+                if source_name in self.results:
+                    inputs[input_name] = self.results[source_name][source_output]
+                    # self.logger.debug(f"Resolved input {input_name} from {source_name}.{source_output}")
+                elif (source_name, block.name) in self.plan.loop_back_edges:
+                    # 首次迭代时循环回边还没有数据
+                    continue
                 else:
                     raise RuntimeError(
-                        f"Source block {wire.source_block.name} not executed for input {input_name}"
+                        f"Source block {source_name} not executed for input {input_name}"
                     )
             elif not block.inputs[input_name].nullable:
                 raise RuntimeError(
@@ -0,0 +1,176 @@
+import sys
+import threading
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Any, Dict, Optional, Sequence
+
+if TYPE_CHECKING:
+    from kirara_ai.events.event_bus import EventBus
+
+# 耗时直方图的桶上界（秒）
+DURATION_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.5, 1, 2.5, 5, 10, 30, 60)
+# 结果大小直方图的桶上界（字节）
+SIZE_BUCKETS = (64, 256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+@dataclass
+class BlockSpan:
+    """单个 block 的一次执行记录，时间均为 time.monotonic() 的值"""
+
+    workflow_id: str
+    block_name: str
+    block_type: str
+    # block 就绪、开始等待执行的时间
+    ready_at: float
+    # block 真正开始执行的时间
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    # 结果的估算大小（字节）
+    result_size: int = 0
+    error: Optional[BaseException] = None
+
+    @property
+    def queue_wait(self) -> float:
+        """排队等待时间"""
+        if self.started_at is None:
+            return (self.finished_at or self.ready_at) - self.ready_at
+        return self.started_at - self.ready_at
+
+    @property
+    def duration(self) -> float:
+        """执行耗时"""
+        if self.started_at is None or self.finished_at is None:
+            return 0.0
+        return self.finished_at - self.started_at
+
+
+def estimate_size(obj: Any, depth: int = 3) -> int:
+    """估算对象占用的字节数，只递归有限的层数"""
+    size = sys.getsizeof(obj, 0)
+    if depth <= 0:
+        return size
+    if isinstance(obj, dict):
+        for key, value in obj.items():
+            size += estimate_size(key, depth - 1) + estimate_size(value, depth - 1)
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        for item in obj:
+            size += estimate_size(item, depth - 1)
+    return size
+
+
+class Histogram:
+    """固定桶的直方图"""
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[index] += 1
+                return
+        self.counts[-1] += 1
+
+    def to_dict(self) -> Dict[str, Any]:
+        buckets = {str(bound): count for bound, count in zip(self.buckets, self.counts)}
+        buckets["+Inf"] = self.counts[-1]
+        return {
+            "count": self.count,
+            "sum": self.sum,
+            "avg": self.sum / self.count if self.count else 0.0,
+            "min": self.min,
+            "max": self.max,
+            "buckets": buckets,
+        }
+
+
+class _BlockStats:
+    def __init__(self, block_type: str):
+        self.block_type = block_type
+        self.queue_wait = Histogram(DURATION_BUCKETS)
+        self.duration = Histogram(DURATION_BUCKETS)
+        self.result_size = Histogram(SIZE_BUCKETS)
+        self.errors = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "type": self.block_type,
+            "queue_wait": self.queue_wait.to_dict(),
+            "duration": self.duration.to_dict(),
+            "result_size": self.result_size.to_dict(),
+            "errors": self.errors,
+        }
+
+
+class _WorkflowStats:
+    def __init__(self):
+        self.runs = 0
+        self.duration = Histogram(DURATION_BUCKETS)
+        self.blocks: Dict[str, _BlockStats] = {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "runs": self.runs,
+            "duration": self.duration.to_dict(),
+            "blocks": {name: stats.to_dict() for name, stats in self.blocks.items()},
+        }
+
+
+class WorkflowMetrics:
+    """按工作流聚合 block 的排队、执行耗时和结果大小"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._workflows: Dict[str, _WorkflowStats] = {}
+
+    def register_listeners(self, event_bus: "EventBus"):
+        """订阅工作流执行事件"""
+        from kirara_ai.events.workflow import BlockExecutionEnd, WorkflowExecutionEnd
+
+        event_bus.register(BlockExecutionEnd, self.on_block_execution_end)
+        event_bus.register(WorkflowExecutionEnd, self.on_workflow_execution_end)
+
+    def on_block_execution_end(self, event):
+        self.record_span(event.span)
+
+    def on_workflow_execution_end(self, event):
+        self.record_workflow(event.executor.workflow_id, event.executor.duration)
+
+    def record_span(self, span: BlockSpan):
+        """记录一次 block 执行"""
+        with self._lock:
+            workflow_stats = self._workflows.setdefault(span.workflow_id, _WorkflowStats())
+            block_stats = workflow_stats.blocks.get(span.block_name)
+            if block_stats is None:
+                block_stats = workflow_stats.blocks[span.block_name] = _BlockStats(span.block_type)
+            block_stats.queue_wait.observe(span.queue_wait)
+            if span.error is not None:
+                block_stats.errors += 1
+                return
+            block_stats.duration.observe(span.duration)
+            block_stats.result_size.observe(span.result_size)
+
+    def record_workflow(self, workflow_id: str, duration: float):
+        """记录一次完整的工作流执行"""
+        with self._lock:
+            workflow_stats = self._workflows.setdefault(workflow_id, _WorkflowStats())
+            workflow_stats.runs += 1
+            workflow_stats.duration.observe(duration)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """获取所有工作流的统计数据"""
+        with self._lock:
+            return {workflow_id: stats.to_dict() for workflow_id, stats in self._workflows.items()}
+
+    def reset(self):
+        with self._lock:
+            self._workflows.clear()
+
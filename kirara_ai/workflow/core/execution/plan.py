@@ -0,0 +1,167 @@
+from collections import defaultdict
+from types import MappingProxyType
+from typing import Dict, FrozenSet, List, Mapping, Optional, Tuple
+
+from kirara_ai.workflow.core.block import ConditionBlock, LoopBlock, LoopEndBlock
+from kirara_ai.workflow.core.block.registry import BlockRegistry
+from kirara_ai.workflow.core.workflow.base import Wire, Workflow
+
+
+class ExecutionPlan:
+    """
+    工作流的预编译执行计划。
+
+    计划只依赖工作流的拓扑结构，所有映射均以 block 名称为键，
+    编译后不可变，可以在同一个工作流的多次执行之间复用。
+    """
+
+    def __init__(
+        self,
+        workflow_name: str,
+        entry_blocks: Tuple[str, ...],
+        successors: Mapping[str, Tuple[str, ...]],
+        predecessors: Mapping[str, FrozenSet[str]],
+        input_wires: Mapping[str, Mapping[str, Tuple[str, str]]],
+        levels: Tuple[Tuple[str, ...], ...],
+        condition_branches: Mapping[str, Tuple[str, ...]],
+        loop_bodies: Mapping[str, Optional[str]],
+        loop_back_edges: FrozenSet[Tuple[str, str]],
+    ):
+        self.workflow_name = workflow_name
+        # 没有输入的入口 block
+        self.entry_blocks = entry_blocks
+        # block -> 后继 block（按连线顺序去重）
+        self.successors = successors
+        # block -> 直接前置 block 集合
+        self.predecessors = predecessors
+        # block -> {输入名: (来源 block, 来源输出名)}，不保存连线本身，避免计划引用首次执行时的 block 实例
+        self.input_wires = input_wires
+        # 拓扑层级，同一层级内的 block 互不依赖（不含循环回边）
+        self.levels = levels
+        # 条件块 -> (then 分支, else 分支)
+        self.condition_branches = condition_branches
+        # 循环块 -> 循环体入口
+        self.loop_bodies = loop_bodies
+        # 循环结束块 -> 循环块 的回边
+        self.loop_back_edges = loop_back_edges
+        # block -> 拓扑序号，用于确定性地排列执行结果
+        self.order = MappingProxyType(
+            {name: index for index, name in enumerate(name for level in levels for name in level)}
+        )
+
+    @classmethod
+    def compile(cls, workflow: Workflow, registry: BlockRegistry) -> "ExecutionPlan":
+        """
+        编译工作流，校验连线类型并构建执行所需的索引。
+
+        :param workflow: 要编译的工作流
+        :param registry: Block注册表，用于类型检查
+        :return: 编译后的执行计划
+        """
+        successors: Dict[str, List[str]] = defaultdict(list)
+        predecessors: Dict[str, set] = defaultdict(set)
+        input_wires: Dict[str, Dict[str, Tuple[str, str]]] = defaultdict(dict)
+        loop_back_edges = set()
+
+        for wire in workflow.wires:
+            cls._check_wire_type(wire, registry)
+
+            source_name = wire.source_block.name
+            target_name = wire.target_block.name
+            if target_name not in successors[source_name]:
+                successors[source_name].append(target_name)
+            predecessors[target_name].add(source_name)
+            # 同一个输入被多次连接时，以最后一根连线为准
+            input_wires[target_name][wire.target_input] = (source_name, wire.source_output)
+
+            if isinstance(wire.source_block, LoopEndBlock) and isinstance(
+                wire.target_block, LoopBlock
+            ):
+                loop_back_edges.add((source_name, target_name))
+
+        condition_branches = {}
+        loop_bodies = {}
+        for block in workflow.blocks:
+            if isinstance(block, ConditionBlock):
+                condition_branches[block.name] = tuple(successors[block.name][:2])
+            elif isinstance(block, LoopBlock):
+                body = successors[block.name]
+                loop_bodies[block.name] = body[0] if body else None
+
+        levels = cls._compute_levels(workflow, successors, loop_back_edges)
+
+        return cls(
+            workflow_name=workflow.name,
+            entry_blocks=tuple(block.name for block in workflow.blocks if not block.inputs),
+            successors=MappingProxyType(
+                {block.name: tuple(successors[block.name]) for block in workflow.blocks}
+            ),
+            predecessors=MappingProxyType(
+                {block.name: frozenset(predecessors[block.name]) for block in workflow.blocks}
+            ),
+            input_wires=MappingProxyType(
+                {
+                    block.name: MappingProxyType(dict(input_wires[block.name]))
+                    for block in workflow.blocks
+                }
+            ),
+            levels=levels,
+            condition_branches=MappingProxyType(condition_branches),
+            loop_bodies=MappingProxyType(loop_bodies),
+            loop_back_edges=frozenset(loop_back_edges),
+        )
+
+    @staticmethod
+    def _check_wire_type(wire: Wire, registry: BlockRegistry):
+        """验证连线的数据类型是否匹配"""
+        source_output = wire.source_block.outputs[wire.source_output]
+        target_input = wire.target_block.inputs[wire.target_input]
+
+        # 使用 BlockRegistry 的类型系统进行类型兼容性检查
+        source_type = registry._type_system.get_type_name(source_output.data_type)
+        target_type = registry._type_system.get_type_name(target_input.data_type)
+
+        if not registry.is_type_compatible(source_type, target_type):
+            raise TypeError(
+                f"Type mismatch in wire: {wire.source_block.name}.{wire.source_output} "
+                f"({source_type}) -> {wire.target_block.name}.{wire.target_input} "
+                f"({target_type})"
+            )
+
+    @staticmethod
+    def _compute_levels(
+        workflow: Workflow,
+        successors: Dict[str, List[str]],
+        loop_back_edges: set,
+    ) -> Tuple[Tuple[str, ...], ...]:
+        """按 Kahn 算法计算拓扑层级，忽略循环回边"""
+        in_degree = {block.name: 0 for block in workflow.blocks}
+        for source_name, targets in successors.items():
+            for target_name in targets:
+                if (source_name, target_name) not in loop_back_edges:
+                    in_degree[target_name] += 1
+
+        levels = []
+        current = [name for name, degree in in_degree.items() if degree == 0]
+        visited = set()
+        while current:
+            levels.append(tuple(current))
+            visited.update(current)
+            next_level = []
+            for source_name in current:
+                for target_name in successors.get(source_name, ()):
+                    if (source_name, target_name) in loop_back_edges:
+                        continue
+                    in_degree[target_name] -= 1
+                    if in_degree[target_name] == 0:
+                        next_level.append(target_name)
+            current = next_level
+
+        # 剩余的 block 位于无法拓扑排序的环上，放到最后一层
+        remaining = tuple(name for name in in_degree if name not in visited)
+        if remaining:
+            levels.append(remaining)
+        return tuple(levels)
+
+    def __repr__(self):
+        return f"ExecutionPlan(workflow={self.workflow_name}, blocks={len(self.successors)}, levels={len(self.levels)})"
@@ -0,0 +1,176 @@
+import asyncio
+import functools
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional
+
+from kirara_ai.logger import get_logger
+
+
+class BlockThreadPool:
+    """
+    应用级共享的 block 线程池，取代每次执行都创建的临时线程池。
+
+    同步 block 在 io 线程池中执行，标记为 CPU 密集型的 block 在线程数不超过 CPU 核数的线程池中执行。
+    支持按工作流限制同时占用的线程数，并统计排队深度和等待时间。
+    等待中的调用被取消（例如超时）时，尚未开始的任务不会再执行；
+    已经开始的任务无法被中断，调用方会直接放弃结果并释放配额，线程在任务结束后归还线程池。
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 32,
+        default_quota: int = 0,
+        quotas: Optional[Dict[str, int]] = None,
+    ):
+        """
+        :param max_workers: io 线程池的线程数
+        :param default_quota: 单个工作流同时占用的线程数上限，0 表示不限制
+        :param quotas: 按工作流 ID 单独配置的线程数上限
+        """
+        self.logger = get_logger("BlockThreadPool")
+        self.max_workers = max_workers
+        self.default_quota = default_quota
+        self.quotas = quotas or {}
+        self._io_executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="block"
+        )
+        self._cpu_bound_executor = ThreadPoolExecutor(
+            max_workers=os.cpu_count() or 1, thread_name_prefix="cpu-bound-block"
+        )
+        self._quota_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._lock = threading.Lock()
+        # 统计数据
+        self._queued = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._abandoned = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+        self._running_by_workflow: Dict[str, int] = {}
+
+    def _get_quota_semaphore(self, workflow_id: Optional[str]) -> Optional[asyncio.Semaphore]:
+        quota = self.quotas.get(workflow_id, self.default_quota) if workflow_id else self.default_quota
+        if not quota or not workflow_id:
+            return None
+        if workflow_id not in self._quota_semaphores:
+            self._quota_semaphores[workflow_id] = asyncio.Semaphore(quota)
+        return self._quota_semaphores[workflow_id]
+
+    async def run(
+        self,
+        func: Callable[..., Any],
+        *args,
+        workflow_id: Optional[str] = None,
+        cpu_bound: bool = False,
+        **kwargs,
+    ) -> Any:
+        """
+        在共享线程池中执行同步函数。
+
+        :param func: 要执行的函数
+        :param workflow_id: 所属工作流的 ID，用于配额限制和统计
+        :param cpu_bound: 是否为 CPU 密集型任务
+        :return: 函数的返回值
+        """
+        # 记录任务状态，用于在任务开始前被取消时修正排队计数
+        state = {"submitted_at": time.monotonic(), "started": False, "finished": False}
+        with self._lock:
+            self._queued += 1
+
+        semaphore = self._get_quota_semaphore(workflow_id)
+        try:
+            if semaphore is None:
+                return await self._submit(func, args, kwargs, workflow_id, cpu_bound, state)
+            async with semaphore:
+                return await self._submit(func, args, kwargs, workflow_id, cpu_bound, state)
+        except asyncio.CancelledError:
+            with self._lock:
+                abandoned = state["started"] and not state["finished"]
+                if abandoned:
+                    self._abandoned += 1
+            if abandoned:
+                self.logger.warning(
+                    f"Abandoned running task {getattr(func, '__name__', func)} of workflow {workflow_id}, "
+                    "the worker thread will be released when it returns"
+                )
+            raise
+        finally:
+            with self._lock:
+                if not state["started"]:
+                    state["started"] = True
+                    self._queued -= 1
+
+    async def _submit(self, func, args, kwargs, workflow_id, cpu_bound, state) -> Any:
+        executor = self._cpu_bound_executor if cpu_bound else self._io_executor
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            executor,
+            functools.partial(self._execute, func, args, kwargs, workflow_id, state),
+        )
+
+    def _execute(self, func, args, kwargs, workflow_id, state) -> Any:
+        """在工作线程中执行，记录等待时间和运行状态"""
+        wait = time.monotonic() - state["submitted_at"]
+        with self._lock:
+            if not state["started"]:
+                state["started"] = True
+                self._queued -= 1
+            self._running += 1
+            self._total_wait += wait
+            self._max_wait = max(self._max_wait, wait)
+            if workflow_id:
+                self._running_by_workflow[workflow_id] = self._running_by_workflow.get(workflow_id, 0) + 1
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            with self._lock:
+                self._failed += 1
+            raise
+        finally:
+            with self._lock:
+                state["finished"] = True
+                self._running -= 1
+                self._completed += 1
+                if workflow_id:
+                    self._running_by_workflow[workflow_id] -= 1
+                    if self._running_by_workflow[workflow_id] == 0:
+                        del self._running_by_workflow[workflow_id]
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """获取线程池的统计数据"""
+        with self._lock:
+            started = self._completed + self._running
+            return {
+                "max_workers": self.max_workers,
+                "queue_depth": self._queued,
+                "running": self._running,
+                "completed": self._completed,
+                "failed": self._failed,
+                "abandoned": self._abandoned,
+                "avg_wait_time": self._total_wait / started if started else 0.0,
+                "max_wait_time": self._max_wait,
+                "running_by_workflow": dict(self._running_by_workflow),
+            }
+
+    def shutdown(self, wait: bool = True):
+        """关闭线程池"""
+        self.logger.info("Shutting down block thread pool")
+        self._io_executor.shutdown(wait=wait)
+        self._cpu_bound_executor.shutdown(wait=wait)
+
+
+_default_thread_pool: Optional[BlockThreadPool] = None
+_default_thread_pool_lock = threading.Lock()
+
+
+def get_default_block_thread_pool() -> BlockThreadPool:
+    """获取进程内默认的 block 线程池，供未在容器中注册线程池的场景使用"""
+    global _default_thread_pool
+    with _default_thread_pool_lock:
+        if _default_thread_pool is None:
+            _default_thread_pool = BlockThreadPool()
+        return _default_thread_pool
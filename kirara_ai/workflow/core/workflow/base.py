@@ -1,13 +1,35 @@
-from typing import List
+from typing import TYPE_CHECKING, List, Optional
 
 from kirara_ai.workflow.core.block import Block
 
+if TYPE_CHECKING:
+    from kirara_ai.workflow.core.execution.plan import ExecutionPlan
+
 
 class Workflow:
-    def __init__(self, name: str, blocks: List["Block"], wires: List["Wire"]):
+    def __init__(
+        self,
+        name: str,
+        blocks: List["Block"],
+        wires: List["Wire"],
+        execution_plan: Optional["ExecutionPlan"] = None,
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        block_timeout: Optional[float] = None,
+    ):
         self.name = name
+        # 工作流在注册表中的 ID，由 WorkflowRegistry 设置
+        self.id: Optional[str] = None
         self.blocks = blocks
         self.wires = wires
+        # 同时执行的 block 数量上限，为空表示不限制
+        self.max_concurrency = max_concurrency
+        # 整个工作流的执行超时时间（秒），为空时使用全局配置
+        self.timeout = timeout
+        # 单个 block 的默认执行超时时间（秒），为空时使用全局配置
+        self.block_timeout = block_timeout
+        # 预编译的执行计划，为空时由执行器自行编译
+        self.execution_plan = execution_plan
 
 
 class Wire:
@@ -1,9 +1,10 @@
+import copy
 import importlib
 import random
 import string
 import warnings
 from dataclasses import dataclass
-from typing import Any, Callable, Dict, List, Optional, Tuple, Type, Union
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple, Type, Union
 
 from ruamel.yaml import YAML
 
@@ -13,6 +14,9 @@ from kirara_ai.workflow.core.block.registry import BlockRegistry
 
 from .base import Wire, Workflow
 
+if TYPE_CHECKING:
+    from kirara_ai.workflow.core.execution.plan import ExecutionPlan
+
 
 @dataclass
 class BlockSpec:
@@ -143,11 +147,24 @@ class WorkflowBuilder:
     def __init__(self, name: str):
         self.name = name
         self.description = ""
+        # 同时执行的 block 数量上限，为空表示不限制
+        self.max_concurrency: Optional[int] = None
+        # 工作流和单个 block 的执行超时时间（秒），为空时使用全局配置
+        self.timeout: Optional[float] = None
+        self.block_timeout: Optional[float] = None
         self.head: Node = None
         self.current: Node = None
         self.blocks: List[Block] = []
         self.wires: List[Wire] = []
         self.nodes_by_name: Dict[str, Node] = {}
+        # 缓存的执行计划和 block 构造器，工作流结构变化时失效
+        self._execution_plan: Optional["ExecutionPlan"] = None
+        self._block_factories: Optional[List[Callable[[], Block]]] = None
+
+    def _invalidate_build_cache(self):
+        """工作流结构发生变化，丢弃缓存的执行计划和 block 构造器"""
+        self._execution_plan = None
+        self._block_factories = None
 
     def _generate_unique_name(self, base_name: str) -> str:
         """生成唯一的块名称"""
@@ -198,6 +215,7 @@ class WorkflowBuilder:
 
         node = Node(block=block, name=block.name, is_parallel=is_parallel, spec=spec)
         self.blocks.append(block)
+        self._invalidate_build_cache()
         self.nodes_by_name[node.name] = node
 
         # 处理连接
@@ -263,6 +281,7 @@ class WorkflowBuilder:
         condition_block = ConditionBlock(condition, self.current.block.outputs.copy())
         node = Node(block=condition_block, name=name, is_conditional=True)
         self.blocks.append(condition_block)
+        self._invalidate_build_cache()
         self.nodes_by_name[node.name] = node
 
         self._connect_blocks(self.current.block, condition_block)
@@ -297,6 +316,7 @@ class WorkflowBuilder:
         )
         node = Node(block=loop_block, name=name, is_loop=True)
         self.blocks.append(loop_block)
+        self._invalidate_build_cache()
         self.nodes_by_name[node.name] = node
 
         self._connect_blocks(self.current.block, loop_block)
@@ -313,6 +333,7 @@ class WorkflowBuilder:
         loop_end = LoopEndBlock(self.current.block.outputs.copy())
         node = Node(block=loop_end)
         self.blocks.append(loop_end)
+        self._invalidate_build_cache()
         self.nodes_by_name[node.name] = node
 
         self._connect_blocks(self.current.block, loop_end)
@@ -340,6 +361,7 @@ class WorkflowBuilder:
                     ):
                         is_connected = True
                         self.wires.append(wire)
+                        self._invalidate_build_cache()
                         break
             # 如果连接成功，则跳出循环
             if is_connected:
@@ -355,6 +377,7 @@ class WorkflowBuilder:
         """强制连接两个块"""
         wire = Wire(source_block, source_output, target_block, target_input)
         self.wires.append(wire)
+        self._invalidate_build_cache()
 
     def _find_parallel_nodes(self, start_node: Node) -> List[Node]:
         """查找所有并行节点"""
@@ -369,16 +392,95 @@ class WorkflowBuilder:
                 break
         return parallel_nodes
 
+    def _compile_block_factories(self) -> List[Callable[[], Block]]:
+        """
+        为每个 block 预先生成构造器。
+
+        通过 DSL 创建的 block 按照 BlockSpec 重新构造，
+        条件、循环等控制块则复制原型并复制其可变状态。
+        """
+        spec_by_block = {
+            id(node.block): node.spec for node in self.nodes_by_name.values() if node.spec
+        }
+
+        def from_spec(spec: BlockSpec, name: str) -> Callable[[], Block]:
+            def factory() -> Block:
+                block = spec.block_class(**spec.kwargs)
+                block.name = name
+                return block
+
+            return factory
+
+        def from_prototype(prototype: Block) -> Callable[[], Block]:
+            def factory() -> Block:
+                block = copy.copy(prototype)
+                for key, value in vars(prototype).items():
+                    if isinstance(value, (list, dict, set)):
+                        setattr(block, key, copy.copy(value))
+                return block
+
+            return factory
+
+        factories = []
+        for block in self.blocks:
+            spec = spec_by_block.get(id(block))
+            if spec is not None:
+                factories.append(from_spec(spec, block.name))
+            else:
+                factories.append(from_prototype(block))
+        return factories
+
     def build(self, container: DependencyContainer) -> Workflow:
-        """构建工作流"""
+        """
+        构建工作流。
+
+        builder 中的 block 只作为原型，每次构建都会创建新的 block 实例和连线，
+        因此同一个工作流可以被安全地并发执行。
+        """
+        from kirara_ai.workflow.core.execution.plan import ExecutionPlan
+
         # Add unique name for each unnamed block
         # TODO: 需要优化，不能直接修改 blocks 列表
         for block in self.blocks:
             if not block.name:
                 block.name = self._generate_unique_name(block.__class__.__name__)
-            block.container = container
+                self._invalidate_build_cache()
+
+        if self._block_factories is None:
+            self._block_factories = self._compile_block_factories()
 
-        return Workflow(self.name, self.blocks, self.wires)
+        blocks = []
+        block_map = {}
+        for prototype, factory in zip(self.blocks, self._block_factories):
+            block = factory()
+            block.container = container
+            blocks.append(block)
+            block_map[id(prototype)] = block
+
+        wires = [
+            Wire(
+                block_map.get(id(wire.source_block), wire.source_block),
+                wire.source_output,
+                block_map.get(id(wire.target_block), wire.target_block),
+                wire.target_input,
+            )
+            for wire in self.wires
+        ]
+
+        workflow = Workflow(
+            self.name,
+            blocks,
+            wires,
+            max_concurrency=self.max_concurrency,
+            timeout=self.timeout,
+            block_timeout=self.block_timeout,
+        )
+        # 执行计划只需编译一次，后续每次调度直接复用
+        if self._execution_plan is None:
+            registry: BlockRegistry = container.resolve(BlockRegistry)
+            self._execution_plan = ExecutionPlan.compile(workflow, registry)
+        workflow.execution_plan = self._execution_plan
+        return workflow
 
     def update_position(self, name: str, position: Tuple[int, int]):
         """更新节点的位置"""
@@ -396,6 +498,12 @@ class WorkflowBuilder:
             "description": self.description,
             "blocks": [],
         }
+        if self.max_concurrency:
+            workflow_data["max_concurrency"] = self.max_concurrency
+        if self.timeout:
+            workflow_data["timeout"] = self.timeout
+        if self.block_timeout:
+            workflow_data["block_timeout"] = self.block_timeout
 
         def serialize_node(node: Node) -> dict:
             block_data = {
@@ -465,6 +573,9 @@ class WorkflowBuilder:
 
         builder: WorkflowBuilder = cls(workflow_data["name"])
         builder.description = workflow_data.get("description", "")
+        builder.max_concurrency = workflow_data.get("max_concurrency")
+        builder.timeout = workflow_data.get("timeout")
+        builder.block_timeout = workflow_data.get("block_timeout")
         registry: BlockRegistry = container.resolve(BlockRegistry)
 
         def get_block_class(type_name: str) -> Type[Block]:
@@ -500,6 +611,7 @@ class WorkflowBuilder:
             builder.update_position(block_data["name"], block_data["position"])
         # 第二遍：建立连接
         builder.wires = []
+        builder._invalidate_build_cache()
         for block_data in workflow_data["blocks"]:
             if "connected_to" in block_data:
                 source_node = builder.nodes_by_name[block_data["name"]]
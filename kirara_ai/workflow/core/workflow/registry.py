@@ -79,7 +79,9 @@ class WorkflowRegistry:
         """获取工作流构建器或实例"""
         builder = self._workflows.get(name)
         if builder and container:
-            return builder.build(container)
+            workflow = builder.build(container)
+            workflow.id = name
+            return workflow
         return builder
 
     def load_workflows(self, workflows_dir: str = None):
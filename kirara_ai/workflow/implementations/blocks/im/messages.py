@@ -1,11 +1,12 @@
 import asyncio
-from typing import Annotated, Any, Dict, List, Optional
+from typing import Annotated, Any, Dict, List, Optional, Set
 
 from kirara_ai.im.adapter import IMAdapter
 from kirara_ai.im.manager import IMManager
-from kirara_ai.im.message import IMMessage, MessageElement, TextMessage
+from kirara_ai.im.message import IMMessage, IMMessageStream, MessageElement, TextMessage
 from kirara_ai.im.sender import ChatSender
 from kirara_ai.ioc.container import DependencyContainer
+from kirara_ai.logger import get_logger
 from kirara_ai.workflow.core.block import Block, Input, Output, ParamMeta
 
 
@@ -43,6 +44,8 @@ class SendIMMessage(Block):
     }
     outputs = {}
     container: DependencyContainer
+    # 正在逐段发送的任务，保留引用避免任务在完成前被回收
+    _sending_tasks: Set[asyncio.Task] = set()
 
     def __init__(
         self, im_name: Annotated[Optional[str], ParamMeta(label="聊天平台适配器名称", options_provider=im_adapter_options_provider)] = None
@@ -61,9 +64,31 @@ class SendIMMessage(Block):
         loop: asyncio.AbstractEventLoop = self.container.resolve(
             asyncio.AbstractEventLoop
         )
-        loop.create_task(adapter.send_message(msg, target or src_msg.sender))
+        if isinstance(msg, IMMessageStream):
+            task = loop.create_task(self._send_segments(adapter, msg, target or src_msg.sender))
+            self._sending_tasks.add(task)
+            task.add_done_callback(self._sending_tasks.discard)
+        else:
+            loop.create_task(adapter.send_message(msg, target or src_msg.sender))
         # return {"ok": True}
 
+    @staticmethod
+    async def _send_segments(adapter: IMAdapter, msg: IMMessageStream, target: ChatSender):
+        """每一段生成后立即作为一条消息发送，生成或发送失败时记录错误并告知用户回复不完整"""
+        try:
+            async for element in msg.segments():
+                await adapter.send_message(IMMessage(sender=msg.sender, message_elements=[element]), target)
+        except Exception as e:
+            logger = get_logger("Block.SendIMMessage")
+            logger.opt(exception=e).error(f"Failed to send streamed message: {e}")
+            try:
+                await adapter.send_message(
+                    IMMessage(sender=msg.sender, message_elements=[TextMessage("[回复生成失败，内容可能不完整]")]),
+                    target,
+                )
+            except Exception as e:
+                logger.error(f"Failed to send error message: {e}")
+
 # IMMessage 转纯文本
 
 
@@ -75,7 +100,9 @@ class IMMessageToText(Block):
     inputs = {"msg": Input("msg", "IM 消息", IMMessage, "IM 消息")}
     outputs = {"text": Output("text", "纯文本", str, "纯文本")}
 
-    def execute(self, msg: IMMessage) -> Dict[str, Any]:
+    async def execute(self, msg: IMMessage) -> Dict[str, Any]:
+        if isinstance(msg, IMMessageStream):
+            await msg.wait()
         return {"text": msg.content}
 
 
@@ -109,5 +136,7 @@ class AppendIMMessage(Block):
     }
     outputs = {"msg": Output("msg", "IM 消息", IMMessage, "IM 消息")}
 
-    def execute(self, base_msg: IMMessage, append_msg: MessageElement) -> Dict[str, Any]:
+    async def execute(self, base_msg: IMMessage, append_msg: MessageElement) -> Dict[str, Any]:
+        if isinstance(base_msg, IMMessageStream):
+            await base_msg.wait()
         return {"msg": IMMessage(sender=base_msg.sender, message_elements=base_msg.message_elements + [append_msg])}
@@ -1,14 +1,15 @@
 import re
 from datetime import datetime
-from typing import Annotated, Any, Dict, List, Optional
+from typing import Annotated, Any, AsyncIterator, Dict, List, Optional
 
-from kirara_ai.im.message import IMMessage, TextMessage
+from kirara_ai.im.message import IMMessage, IMMessageStream, MessageElement, TextMessage
 from kirara_ai.ioc.container import DependencyContainer
 from kirara_ai.llm.format.message import LLMChatMessage
 from kirara_ai.llm.format.request import LLMChatRequest
 from kirara_ai.llm.format.response import LLMChatResponse
 from kirara_ai.llm.llm_manager import LLMManager
 from kirara_ai.llm.llm_registry import LLMAbility
+from kirara_ai.llm.stream import LLMChatStream
 from kirara_ai.logger import get_logger
 from kirara_ai.workflow.core.block import Block, Input, Output, ParamMeta
 from kirara_ai.workflow.core.execution.executor import WorkflowExecutor
@@ -131,11 +132,16 @@ class ChatCompletion(Block):
             Optional[str],
             ParamMeta(label="模型 ID", description="要使用的模型 ID", options_provider=model_name_options_provider),
         ] = None,
+        stream: Annotated[
+            bool,
+            ParamMeta(label="流式输出", description="边生成边输出，配合 LLM 响应转换和发送消息 block 逐段发送回复"),
+        ] = False,
     ):
         self.model_name = model_name
+        self.stream = stream
         self.logger = get_logger("ChatCompletionBlock")
 
-    def execute(self, prompt: List[LLMChatMessage]) -> Dict[str, Any]:
+    async def execute(self, prompt: List[LLMChatMessage]) -> Dict[str, Any]:
         llm_manager = self.container.resolve(LLMManager)
         model_id = self.model_name
         if not model_id:
@@ -153,16 +159,27 @@ class ChatCompletion(Block):
         if not llm:
             raise ValueError(f"LLM {model_id} not found, please check the model name")
         req = LLMChatRequest(messages=prompt, model=model_id)
-        return {"resp": llm.chat(req)}
+        if self.stream:
+            # 立即返回流式响应，下游 block 在读取时等待后续内容
+            return {"resp": LLMChatStream.start(model_id, llm.achat_stream(req))}
+        return {"resp": await llm.achat(req)}
 
 
 class ChatResponseConverter(Block):
+    """
+    将 LLM 响应按 <break> 分段转换为 IM 消息。
+    输入为流式响应时输出 IMMessageStream，每一段生成完毕后即可发送。
+    """
+
     name = "chat_response_converter"
     inputs = {"resp": Input("resp", "LLM 响应", LLMChatResponse, "LLM 响应")}
     outputs = {"msg": Output("msg", "IM 消息", IMMessage, "IM 消息")}
     container: DependencyContainer
 
-    def execute(self, resp: LLMChatResponse) -> Dict[str, Any]:
+    async def execute(self, resp: LLMChatResponse) -> Dict[str, Any]:
+        if isinstance(resp, LLMChatStream):
+            return {"msg": IMMessageStream(sender="<@llm>", segments=lambda: self._split_stream(resp))}
+
         content = ""
         if resp.choices and resp.choices[0].message:
             content = resp.choices[0].message.content
@@ -174,3 +191,16 @@ class ChatResponseConverter(Block):
                 message_elements.append(TextMessage(element.strip()))
         msg = IMMessage(sender="<@llm>", message_elements=message_elements)
         return {"msg": msg}
+
+    @staticmethod
+    async def _split_stream(resp: LLMChatStream) -> AsyncIterator[MessageElement]:
+        buffer = ""
+        async for delta in resp.deltas():
+            buffer += delta.content
+            # 最后一段可能还没有生成完，留到下次继续拼接
+            *segments, buffer = buffer.split("<break>")
+            for segment in segments:
+                if segment.strip():
+                    yield TextMessage(segment.strip())
+        if buffer.strip():
+            yield TextMessage(buffer.strip())
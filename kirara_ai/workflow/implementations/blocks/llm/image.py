@@ -6,6 +6,7 @@ import requests
 from kirara_ai.im.message import ImageMessage
 from kirara_ai.workflow.core.block import Block
 from kirara_ai.workflow.core.block.input_output import Input, Output
+from kirara_ai.workflow.core.execution.executor import WorkflowExecutor
 
 
 class SimpleStableDiffusionWebUI(Block):
@@ -50,7 +51,12 @@ class SimpleStableDiffusionWebUI(Block):
         if self.ckpt_name:
             payload["ckpt_name"] = self.ckpt_name
         payload["clip_skip"] = self.clip_skip
-        response = requests.post(url=f"{self.api_url}/sdapi/v1/txt2img", json=payload)
+        # 请求不能超过工作流的剩余时间，避免上游无响应时一直占用线程
+        try:
+            timeout = self.container.resolve(WorkflowExecutor).remaining_time()
+        except KeyError:
+            timeout = None
+        response = requests.post(url=f"{self.api_url}/sdapi/v1/txt2img", json=payload, timeout=timeout)
 
         if response.status_code == 200:
             r = response.json()
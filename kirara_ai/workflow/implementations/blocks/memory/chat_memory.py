@@ -1,13 +1,15 @@
 from typing import Annotated, Any, Dict, List, Optional
 
-from kirara_ai.im.message import IMMessage
+from kirara_ai.im.message import IMMessage, IMMessageStream
 from kirara_ai.im.sender import ChatSender
 from kirara_ai.ioc.container import DependencyContainer
 from kirara_ai.llm.format.response import LLMChatResponse
+from kirara_ai.llm.stream import LLMChatStream
 from kirara_ai.logger import get_logger
 from kirara_ai.memory.memory_manager import MemoryManager
 from kirara_ai.memory.registry import ComposerRegistry, DecomposerRegistry, ScopeRegistry
 from kirara_ai.workflow.core.block import Block, Input, Output, ParamMeta
+from kirara_ai.workflow.implementations.blocks.llm.chat import model_name_options_provider
 
 
 def scope_type_options_provider(container: DependencyContainer, block: Block) -> List[str]:
@@ -34,10 +36,19 @@ class ChatMemoryQuery(Block):
                 options_provider=scope_type_options_provider,
             ),
         ],
+        model_name: Annotated[
+            Optional[str],
+            ParamMeta(
+                label="模型 ID",
+                description="按该模型配置的长度预算截取记忆，留空使用默认预算",
+                options_provider=model_name_options_provider,
+            ),
+        ] = None,
     ):
         self.scope_type = scope_type
+        self.model_name = model_name
 
-    def execute(self, chat_sender: ChatSender) -> Dict[str, Any]:
+    async def execute(self, chat_sender: ChatSender) -> Dict[str, Any]:
         self.memory_manager = self.container.resolve(MemoryManager)
 
         # 如果没有指定作用域类型，使用配置中的默认值
@@ -51,8 +62,13 @@ class ChatMemoryQuery(Block):
         # 获取解析器实例
         decomposer_registry = self.container.resolve(DecomposerRegistry)
 
-        self.decomposer = decomposer_registry.get_decomposer("default")
-        entries = self.memory_manager.query(self.scope, chat_sender)
+        decomposer_config = self.memory_manager.config.decomposer
+        budget = decomposer_config.model_budgets.get(self.model_name, decomposer_config.default_budget)
+        self.decomposer = decomposer_registry.get_decomposer("default").with_budget(
+            budget, decomposer_config.budget_unit
+        )
+        # 在事件循环中异步读取，未缓存的记忆不会占用线程池等待持久化层
+        entries = await self.memory_manager.aquery(self.scope, chat_sender)
         memory_content = self.decomposer.decompose(entries)
         return {"memory_content": memory_content}
 
@@ -83,7 +99,7 @@ class ChatMemoryStore(Block):
         self.scope_type = scope_type
         self.logger = get_logger("Block.ChatMemoryStore")
 
-    def execute(
+    async def execute(
         self,
         user_msg: Optional[IMMessage] = None,
         llm_resp: Optional[LLMChatResponse] = None,
@@ -106,8 +122,12 @@ class ChatMemoryStore(Block):
         if user_msg is None:
             composed_messages = []
         else:
+            if isinstance(user_msg, IMMessageStream):
+                await user_msg.wait()
             composed_messages = [user_msg]
         if llm_resp is not None:
+            if isinstance(llm_resp, LLMChatStream):
+                await llm_resp.wait()
             if llm_resp.choices and llm_resp.choices[0].message:
                 composed_messages.append(llm_resp.choices[0].message)
         if not composed_messages:
@@ -115,6 +135,6 @@ class ChatMemoryStore(Block):
             return {}
         self.logger.debug(f"Composed messages: {composed_messages}")
         memory_entries = self.composer.compose(user_msg.sender, composed_messages)
-        self.memory_manager.store(self.scope, memory_entries)
+        await self.memory_manager.astore(self.scope, memory_entries)
 
         return {}
@@ -0,0 +1,219 @@
+import asyncio
+import time
+from collections import Counter
+
+import pytest
+from pydantic import BaseModel
+
+from kirara_ai.config.global_config import GlobalConfig, LLMBackendConfig
+from kirara_ai.events.event_bus import EventBus
+from kirara_ai.ioc.container import DependencyContainer
+from kirara_ai.llm.adapter import LLMBackendAdapter
+from kirara_ai.llm.balancer import (BackendHealth, EWMALatencyStrategy, LeastInFlightStrategy, LLMBackendRouter,
+                                    TrackedLLMBackend, WeightedRoundRobinStrategy)
+from kirara_ai.llm.format.message import LLMChatMessage
+from kirara_ai.llm.format.request import LLMChatRequest
+from kirara_ai.llm.format.response import LLMChatResponse
+from kirara_ai.llm.llm_manager import LLMManager
+from kirara_ai.llm.llm_registry import LLMAbility, LLMBackendRegistry
+
+
+class FlakyConfig(BaseModel):
+    fail: bool = False
+    delay: float = 0
+
+
+class FlakyAdapter(LLMBackendAdapter):
+    """按配置成功或失败的测试适配器"""
+
+    def __init__(self, config: FlakyConfig):
+        self.config = config
+
+    def chat(self, req: LLMChatRequest) -> LLMChatResponse:
+        if self.config.fail:
+            raise RuntimeError("backend unavailable")
+        return LLMChatResponse(model=req.model)
+
+    async def achat(self, req: LLMChatRequest) -> LLMChatResponse:
+        await asyncio.sleep(self.config.delay)
+        return self.chat(req)
+
+
+def make_router(configs, **kwargs) -> LLMBackendRouter:
+    """用给定配置的后端创建路由，按顺序选择未排除的后端"""
+    backends = [
+        TrackedLLMBackend(FlakyAdapter(config), BackendHealth(f"backend{i}"))
+        for i, config in enumerate(configs)
+    ]
+
+    def select(exclude):
+        return next((backend for backend in backends if backend.health.name not in exclude), None)
+
+    return LLMBackendRouter("test-model", backends[0], select, retry_backoff=0, **kwargs)
+
+
+def make_request() -> LLMChatRequest:
+    return LLMChatRequest(messages=[LLMChatMessage(role="user", content="hi")], model="test-model")
+
+
+@pytest.fixture
+def llm_manager():
+    container = DependencyContainer()
+    container.register(DependencyContainer, container)
+    config = GlobalConfig()
+    config.llms.balancer.strategy = "weighted_round_robin"
+    config.llms.balancer.failure_threshold = 2
+    config.llms.api_backends = [
+        LLMBackendConfig(name="good", adapter="flaky", config={}, models=["test-model"]),
+        LLMBackendConfig(name="bad", adapter="flaky", config={"fail": True}, models=["test-model"]),
+    ]
+    registry = LLMBackendRegistry()
+    registry.register("flaky", FlakyAdapter, FlakyConfig, LLMAbility.TextChat)
+    container.register(GlobalConfig, config)
+    container.register(LLMBackendRegistry, registry)
+    container.register(EventBus, EventBus())
+    manager = LLMManager(container)
+    manager.load_config()
+    return manager
+
+
+def test_weighted_round_robin_follows_weights():
+    """测试加权轮询按权重分配且不连续集中"""
+    strategy = WeightedRoundRobinStrategy()
+    candidates = [BackendHealth("a", weight=3), BackendHealth("b", weight=1)]
+
+    picks = [strategy.select("model", candidates).name for _ in range(8)]
+
+    assert Counter(picks) == {"a": 6, "b": 2}
+    assert picks[:4] == ["a", "a", "b", "a"]
+
+
+def test_least_in_flight_and_ewma_latency():
+    """测试最少进行中请求和最低延迟策略"""
+    busy, idle = BackendHealth("busy"), BackendHealth("idle")
+    busy.begin()
+    assert LeastInFlightStrategy().select("model", [busy, idle]) is idle
+
+    slow, fast = BackendHealth("slow"), BackendHealth("fast")
+    slow.ewma_latency, fast.ewma_latency = 5.0, 1.0
+    assert EWMALatencyStrategy().select("model", [slow, fast]) is fast
+    # 没有延迟数据的后端优先尝试
+    assert EWMALatencyStrategy().select("model", [slow, fast, BackendHealth("new")]).name == "new"
+
+
+def test_circuit_breaker_half_open_probe():
+    """测试连续失败后熔断，冷却结束后只放行一个探测请求"""
+    health = BackendHealth("backend", failure_threshold=2, recovery_timeout=0.05)
+    for _ in range(2):
+        health.end(health.begin(), RuntimeError("boom"))
+    assert health.state == BackendHealth.OPEN
+    assert not health.try_probe()
+
+    time.sleep(0.06)
+    assert health.try_probe()
+    assert health.state == BackendHealth.HALF_OPEN
+    assert not health.try_probe()
+
+    # 探测失败重新熔断，探测成功恢复
+    health.end(health.begin(), RuntimeError("boom"))
+    assert health.state == BackendHealth.OPEN
+    time.sleep(0.06)
+    assert health.try_probe()
+    health.end(health.begin())
+    assert health.state == BackendHealth.CLOSED
+    assert health.snapshot()["consecutive_failures"] == 0
+
+
+def test_get_llm_ejects_failing_backend(llm_manager):
+    """测试 get_llm 记录调用结果，并摘除连续失败的后端"""
+    llm_manager.config.llms.balancer.max_retries = 0
+    for _ in range(4):
+        llm = llm_manager.get_llm("test-model")
+        assert isinstance(llm, LLMBackendRouter)
+        try:
+            llm.chat(make_request())
+        except RuntimeError:
+            pass
+
+    metrics = llm_manager.get_metrics()
+    assert metrics["bad"]["state"] == "open"
+    assert metrics["bad"]["failures"] == 2
+    assert metrics["good"]["requests"] == 2
+    assert metrics["good"]["ewma_latency"] is not None
+    assert all(llm_manager.get_llm("test-model").health.name == "good" for _ in range(5))
+
+
+@pytest.mark.asyncio
+async def test_tracked_backend_records_async_calls(llm_manager):
+    """测试异步和流式调用都会记录到健康统计"""
+    health = llm_manager.backend_health["good"]
+    llm = TrackedLLMBackend(llm_manager.get("good"), health)
+
+    await llm.achat(make_request())
+    deltas = [delta async for delta in llm.achat_stream(make_request())]
+
+    assert len(deltas) == 1
+    assert health.requests == 2
+    assert health.in_flight == 0
+    assert llm.config is llm_manager.get("good").config
+
+
+def test_get_llm_fails_over_to_another_backend(llm_manager):
+    """测试请求失败后换用同一模型的其他后端"""
+    llm_manager.config.llms.balancer.retry_backoff = 0
+    for _ in range(4):
+        assert llm_manager.get_llm("test-model").chat(make_request()).model == "test-model"
+
+    metrics = llm_manager.get_metrics()
+    assert metrics["good"]["requests"] == 4
+    assert metrics["bad"]["failures"] == 2
+
+
+@pytest.mark.asyncio
+async def test_router_raises_when_all_backends_fail():
+    """测试所有后端都失败时抛出最后一个后端的异常，且不会重试同一个后端"""
+    router = make_router([FlakyConfig(fail=True), FlakyConfig(fail=True)], max_retries=3)
+
+    with pytest.raises(RuntimeError):
+        await router.achat(make_request())
+    assert router.backend.health.requests == 1
+    assert router.select(set()).health.requests == 1
+
+
+@pytest.mark.asyncio
+async def test_router_hedges_slow_backend():
+    """测试首个后端超过 p95 延迟时向另一个后端发出对冲请求"""
+    router = make_router([FlakyConfig(delay=5), FlakyConfig()], hedge=True, hedge_min_samples=1)
+    slow = router.backend.health
+    slow._latencies.append(0.01)
+
+    started = time.monotonic()
+    await router.achat(make_request())
+    await asyncio.sleep(0)
+
+    assert time.monotonic() - started < 1
+    hedge = router.select({slow.name}).health
+    assert hedge.requests == 1 and hedge.failures == 0
+    # 落后的请求被取消，不计为失败
+    assert slow.in_flight == 0 and slow.failures == 0
+
+
+@pytest.mark.asyncio
+async def test_router_does_not_hedge_without_samples():
+    """测试没有足够的延迟样本时不发出对冲请求"""
+    router = make_router([FlakyConfig(delay=0.05), FlakyConfig()], hedge=True, hedge_min_samples=5)
+
+    await router.achat(make_request())
+
+    assert router.select({router.backend.health.name}).health.requests == 0
+
+
+@pytest.mark.asyncio
+async def test_router_stream_fails_over_before_first_delta():
+    """测试流式请求在收到内容之前失败时换用其他后端"""
+    router = make_router([FlakyConfig(fail=True), FlakyConfig()])
+
+    deltas = [delta async for delta in router.achat_stream(make_request())]
+
+    assert len(deltas) == 1
+    assert router.backend.health.failures == 1
@@ -0,0 +1,153 @@
+import asyncio
+
+import pytest
+from pydantic import BaseModel
+
+from kirara_ai.config.global_config import GlobalConfig, LLMBackendConfig, LLMRateLimitConfig
+from kirara_ai.events.event_bus import EventBus
+from kirara_ai.ioc.container import DependencyContainer
+from kirara_ai.llm.adapter import LLMBackendAdapter
+from kirara_ai.llm.balancer import BackendHealth, LLMBackendRouter, TrackedLLMBackend
+from kirara_ai.llm.format.message import LLMChatMessage
+from kirara_ai.llm.format.request import LLMChatRequest
+from kirara_ai.llm.format.response import LLMChatResponse, Usage
+from kirara_ai.llm.llm_manager import LLMManager
+from kirara_ai.llm.llm_registry import LLMAbility, LLMBackendRegistry
+from kirara_ai.llm.rate_limiter import RateLimiter, RateLimitExceeded, estimate_request_tokens
+
+
+class EchoConfig(BaseModel):
+    name: str = ""
+
+
+class EchoAdapter(LLMBackendAdapter):
+    """返回后端名称和固定用量的测试适配器"""
+
+    def __init__(self, config: EchoConfig):
+        self.config = config
+
+    def chat(self, req: LLMChatRequest) -> LLMChatResponse:
+        return LLMChatResponse(model=self.config.name, usage=Usage(total_tokens=5))
+
+
+def make_request(content: str = "hello", max_tokens: int = 0) -> LLMChatRequest:
+    return LLMChatRequest(
+        messages=[LLMChatMessage(role="user", content=content)], model="test-model", max_tokens=max_tokens
+    )
+
+
+def test_estimate_request_tokens():
+    """测试请求的 token 数包含 max_tokens"""
+    assert estimate_request_tokens(make_request("你好", max_tokens=100)) == 102
+
+
+@pytest.mark.asyncio
+async def test_requests_queue_in_arrival_order():
+    """测试超出配额的请求按到达顺序排队，大请求不会被小请求插队"""
+    limiter = RateLimiter("test", tpm=6000)
+    assert await limiter.acquire(6000) == 0
+    finished = []
+
+    async def request(name: str, tokens: int):
+        await limiter.acquire(tokens)
+        finished.append(name)
+
+    await asyncio.gather(request("large", 10), request("small", 1))
+
+    assert finished == ["large", "small"]
+    snapshot = limiter.snapshot()
+    assert snapshot["acquired"] == 3
+    assert snapshot["waiting"] == 0
+    assert snapshot["queue_time"]["count"] == 3
+    assert snapshot["queue_time"]["max"] == pytest.approx(0.11, abs=0.01)
+
+
+@pytest.mark.asyncio
+async def test_request_rejected_beyond_max_wait():
+    """测试预计等待时间超过 max_wait 时立即拒绝且不占用配额"""
+    limiter = RateLimiter("test", rpm=60, tpm=6000, max_wait=0.05)
+    await limiter.acquire(6000)
+
+    with pytest.raises(RateLimitExceeded):
+        await limiter.acquire(100)
+    assert limiter.snapshot()["rejected"] == 1
+    assert limiter.snapshot()["available_requests"] == pytest.approx(59, abs=0.1)
+
+
+def test_settle_refunds_unused_tokens():
+    """测试按实际用量归还预支的 token"""
+    limiter = RateLimiter("test", tpm=1000)
+    limiter.acquire_sync(800)
+    assert limiter.snapshot()["available_tokens"] == pytest.approx(200, abs=1)
+
+    limiter.settle(800, Usage(total_tokens=100))
+    assert limiter.snapshot()["available_tokens"] == pytest.approx(900, abs=1)
+
+
+def test_settle_keeps_estimate_without_usage():
+    """测试用量为 0 或缺失时保留预支的 token"""
+    limiter = RateLimiter("test", tpm=1000, max_wait=0.01)
+    limiter.acquire_sync(900)
+
+    limiter.settle(900, Usage(total_tokens=0))
+    limiter.settle(900, Usage())
+    assert limiter.snapshot()["available_tokens"] == pytest.approx(100, abs=1)
+    with pytest.raises(RateLimitExceeded):
+        limiter.acquire_sync(900)
+
+
+@pytest.mark.asyncio
+async def test_router_fails_over_when_rate_limited():
+    """测试限流等待过长时换用其他后端"""
+    limited = TrackedLLMBackend(
+        EchoAdapter(EchoConfig(name="limited")),
+        BackendHealth("limited"),
+        RateLimiter("limited/test-model", rpm=1, max_wait=0.01),
+    )
+    other = TrackedLLMBackend(EchoAdapter(EchoConfig(name="other")), BackendHealth("other"))
+    backends = [limited, other]
+    router = LLMBackendRouter(
+        "test-model",
+        limited,
+        lambda exclude: next((b for b in backends if b.health.name not in exclude), None),
+        retry_backoff=0,
+    )
+
+    assert (await router.achat(make_request())).model == "limited"
+    assert (await router.achat(make_request())).model == "other"
+    # 限流拒绝不计入后端的失败次数
+    assert limited.health.failures == 0
+
+
+def test_manager_prefers_backends_with_quota():
+    """测试 LLMManager 按后端和模型创建限流器，并优先选择有配额的后端"""
+    container = DependencyContainer()
+    container.register(DependencyContainer, container)
+    config = GlobalConfig()
+    config.llms.balancer.strategy = "weighted_round_robin"
+    config.llms.api_backends = [
+        LLMBackendConfig(
+            name="limited",
+            adapter="echo",
+            config={"name": "limited"},
+            models=["test-model", "other-model"],
+            model_rate_limits={"test-model": LLMRateLimitConfig(rpm=1)},
+        ),
+        LLMBackendConfig(name="other", adapter="echo", config={"name": "other"}, models=["test-model"]),
+    ]
+    registry = LLMBackendRegistry()
+    registry.register("echo", EchoAdapter, EchoConfig, LLMAbility.TextChat)
+    container.register(GlobalConfig, config)
+    container.register(LLMBackendRegistry, registry)
+    container.register(EventBus, EventBus())
+    manager = LLMManager(container)
+    manager.load_config()
+
+    assert list(manager.rate_limiters) == [("limited", "test-model")]
+    served = [manager.get_llm("test-model").chat(make_request()).model for _ in range(10)]
+
+    assert served.count("limited") == 1
+    assert served.count("other") == 9
+    metrics = manager.get_metrics()
+    assert metrics["limited"]["rate_limits"]["test-model"]["acquired"] == 1
+    assert "rate_limits" not in metrics["other"]
@@ -0,0 +1,81 @@
+import asyncio
+
+import pytest
+
+from kirara_ai.llm.adapter import LLMBackendAdapter
+from kirara_ai.llm.format.message import LLMChatMessage
+from kirara_ai.llm.format.request import LLMChatRequest
+from kirara_ai.llm.format.response import LLMChatResponse, LLMChatResponseDelta
+from kirara_ai.llm.stream import LLMChatStream
+
+
+class EchoAdapter(LLMBackendAdapter):
+    """只实现非流式接口的测试适配器"""
+
+    def chat(self, req: LLMChatRequest) -> LLMChatResponse:
+        return LLMChatResponse(
+            choices=[
+                {
+                    "index": 0,
+                    "message": {"role": "assistant", "content": req.messages[-1].content},
+                    "finish_reason": "stop",
+                }
+            ],
+            model=req.model,
+            usage={"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+        )
+
+
+@pytest.mark.asyncio
+async def test_stream_replays_for_every_reader():
+    """测试多个读取方都能从头读取全部增量，结束后填充完整响应"""
+    gate = asyncio.Event()
+
+    async def deltas():
+        yield LLMChatResponseDelta(content="你好")
+        await gate.wait()
+        yield LLMChatResponseDelta(content="，世界", finish_reason="stop", usage={"total_tokens": 3})
+
+    stream = LLMChatStream.start("test-model", deltas())
+
+    async def read():
+        return [delta.content async for delta in stream.deltas()]
+
+    readers = [asyncio.ensure_future(read()) for _ in range(2)]
+    await asyncio.sleep(0)
+    assert not stream.done and stream.choices is None
+    gate.set()
+
+    assert await asyncio.gather(*readers) == [["你好", "，世界"], ["你好", "，世界"]]
+    assert await read() == ["你好", "，世界"]
+    assert stream.choices[0].message.content == "你好，世界"
+    assert stream.choices[0].finish_reason == "stop"
+    assert stream.usage.total_tokens == 3
+
+
+@pytest.mark.asyncio
+async def test_stream_error_raised_on_wait():
+    """测试读取失败时 wait 抛出异常，已读取的内容保留"""
+
+    async def deltas():
+        yield LLMChatResponseDelta(content="部分")
+        raise RuntimeError("connection reset")
+
+    stream = LLMChatStream.start("test-model", deltas())
+
+    with pytest.raises(RuntimeError):
+        await stream.wait()
+    assert stream.choices[0].message.content == "部分"
+
+
+@pytest.mark.asyncio
+async def test_default_achat_stream_yields_full_response():
+    """测试不支持流式输出的适配器将完整响应作为一段返回"""
+    req = LLMChatRequest(messages=[LLMChatMessage(role="user", content="hello")], model="test-model")
+
+    deltas = [delta async for delta in EchoAdapter().achat_stream(req)]
+
+    assert len(deltas) == 1
+    assert deltas[0].content == "hello"
+    assert deltas[0].finish_reason == "stop"
+    assert deltas[0].usage.total_tokens == 2
@@ -0,0 +1,154 @@
+import asyncio
+
+import pytest
+import pytest_asyncio
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from kirara_ai.config.global_config import LLMTransportConfig
+from kirara_ai.llm.adapter import LLMBackendAdapter
+from kirara_ai.llm.format.message import LLMChatMessage
+from kirara_ai.llm.format.request import LLMChatRequest
+from kirara_ai.llm.format.response import LLMChatResponse
+from kirara_ai.llm.transport import LLMTransport
+
+
+class HTTPAdapter(LLMBackendAdapter):
+    """通过 transport 调用 OpenAI 格式接口的测试适配器"""
+
+    def __init__(self, api_base: str):
+        self.api_base = api_base
+
+    def chat(self, req: LLMChatRequest) -> LLMChatResponse:
+        raise NotImplementedError
+
+    async def achat(self, req: LLMChatRequest) -> LLMChatResponse:
+        response_data = await self.transport.post_json(
+            f"{self.api_base}/chat/completions", req.model_dump(mode="json", exclude_none=True)
+        )
+        return LLMChatResponse(**response_data)
+
+
+@pytest_asyncio.fixture(loop_scope="function")
+async def openai_server():
+    """模拟 OpenAI 接口，记录每个请求使用的客户端端口"""
+    peers = []
+
+    async def chat_completions(request: web.Request):
+        peers.append(request.transport.get_extra_info("peername"))
+        body = await request.json()
+        return web.json_response(
+            {
+                "id": "test",
+                "object": "chat.completion",
+                "model": body["model"],
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": body["messages"][-1]["content"]},
+                        "finish_reason": "stop",
+                    }
+                ],
+                "usage": {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2},
+            }
+        )
+
+    async def error(request: web.Request):
+        return web.json_response({"error": "rate limited"}, status=429)
+
+    async def stream(request: web.Request):
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        for payload in ['{"content": "你"}', '{"content": "好"}', "[DONE]", '{"content": "!"}']:
+            await response.write(f": keep-alive\n\ndata: {payload}\n\n".encode("utf-8"))
+        return response
+
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", chat_completions)
+    app.router.add_post("/v1/stream", stream)
+    app.router.add_post("/error/chat/completions", error)
+    server = TestServer(app)
+    await server.start_server()
+    yield server, peers
+    await server.close()
+
+
+def make_request(content: str) -> LLMChatRequest:
+    return LLMChatRequest(
+        messages=[LLMChatMessage(role="user", content=content)], model="gpt-4o"
+    )
+
+
+@pytest.mark.asyncio
+async def test_achat_reuses_connection(openai_server):
+    """测试异步对话复用同一个连接"""
+    server, peers = openai_server
+    adapter = HTTPAdapter(str(server.make_url("/v1")))
+    adapter.transport = LLMTransport(LLMTransportConfig(pool_size=1))
+
+    first = await adapter.achat(make_request("hello"))
+    second = await adapter.achat(make_request("world"))
+    await adapter.transport.close()
+
+    assert first.choices[0].message.content == "hello"
+    assert second.choices[0].message.content == "world"
+    assert len(peers) == 2
+    assert peers[0] == peers[1]
+
+
+@pytest.mark.asyncio
+async def test_achat_raises_on_error(openai_server):
+    """测试接口返回错误时抛出异常"""
+    server, _ = openai_server
+    adapter = HTTPAdapter(str(server.make_url("/error")))
+
+    with pytest.raises(Exception):
+        await adapter.achat(make_request("hello"))
+    await adapter.transport.close()
+
+
+@pytest.mark.asyncio
+async def test_stream_sse_stops_at_done(openai_server):
+    """测试读取 SSE 事件的 data 字段，遇到 [DONE] 结束"""
+    server, _ = openai_server
+    transport = LLMTransport()
+
+    payloads = [payload async for payload in transport.stream_sse(str(server.make_url("/v1/stream")), {})]
+    await transport.close()
+
+    assert payloads == ['{"content": "你"}', '{"content": "好"}']
+
+
+@pytest.mark.asyncio
+async def test_transport_close_recreates_session():
+    """测试关闭后再次使用时重新创建会话"""
+    transport = LLMTransport()
+    session = transport.session
+    assert transport.session is session
+
+    await transport.close()
+    assert session.closed
+    assert transport.session is not session
+    await transport.close()
+
+
+def test_transport_rejects_other_event_loop():
+    """测试会话未关闭时不能在其他事件循环中使用，在原事件循环中关闭后可以切换"""
+    transport = LLMTransport()
+
+    async def get_session():
+        return transport.session
+
+    first_loop, second_loop = asyncio.new_event_loop(), asyncio.new_event_loop()
+    try:
+        session = first_loop.run_until_complete(get_session())
+        with pytest.raises(RuntimeError, match="another event loop"):
+            second_loop.run_until_complete(get_session())
+        assert not session.closed
+
+        first_loop.run_until_complete(transport.close())
+        assert second_loop.run_until_complete(get_session()) is not session
+        second_loop.run_until_complete(transport.close())
+    finally:
+        first_loop.close()
+        second_loop.close()
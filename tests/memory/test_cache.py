@@ -0,0 +1,77 @@
+import time
+from datetime import datetime
+
+from kirara_ai.memory.cache import MemoryCache, estimate_entries_size
+from kirara_ai.memory.entry import MemoryEntry
+
+
+def create_entries(count: int, content: str = "message"):
+    return [
+        MemoryEntry(sender="user1", content=content, timestamp=datetime.now(), metadata={})
+        for _ in range(count)
+    ]
+
+
+class TestMemoryCache:
+    def test_hit_and_miss_counters(self):
+        """测试命中和未命中计数"""
+        cache = MemoryCache()
+        assert cache.get("scope1") is None
+        cache.put("scope1", create_entries(1), dirty=False)
+        assert len(cache.get("scope1")) == 1
+
+        metrics = cache.get_metrics()
+        assert metrics["hits"] == 1
+        assert metrics["misses"] == 1
+        assert metrics["hit_rate"] == 0.5
+
+    def test_lru_eviction_by_scopes(self):
+        """测试按作用域数量淘汰最久未访问的作用域"""
+        cache = MemoryCache(max_scopes=2)
+        cache.put("scope1", create_entries(1), dirty=False)
+        cache.put("scope2", create_entries(1), dirty=False)
+        cache.get("scope1")
+        cache.put("scope3", create_entries(1), dirty=False)
+
+        assert list(cache) == ["scope1", "scope3"]
+        assert cache.get_metrics()["evictions"] == 1
+
+    def test_eviction_by_entries_and_bytes(self):
+        """测试按记忆总条数和字节数淘汰"""
+        cache = MemoryCache(max_entries=5)
+        cache.put("scope1", create_entries(3), dirty=False)
+        cache.put("scope2", create_entries(3), dirty=False)
+        assert list(cache) == ["scope2"]
+        assert cache.get_metrics()["entries"] == 3
+
+        entries = create_entries(2, content="x" * 1000)
+        cache = MemoryCache(max_bytes=estimate_entries_size(entries) + 1)
+        cache.put("scope1", entries, dirty=False)
+        cache.put("scope2", create_entries(1), dirty=False)
+        assert list(cache) == ["scope2"]
+
+    def test_newest_scope_is_kept_even_if_over_budget(self):
+        """测试单个作用域超出预算时仍然保留"""
+        cache = MemoryCache(max_entries=1)
+        cache.put("scope1", create_entries(3), dirty=False)
+        assert list(cache) == ["scope1"]
+
+    def test_ttl_eviction(self):
+        """测试长时间未访问的作用域被淘汰"""
+        cache = MemoryCache(ttl=0.05)
+        cache.put("scope1", create_entries(1), dirty=False)
+        time.sleep(0.1)
+        assert cache.get("scope1") is None
+        assert cache.get_metrics()["evictions"] == 1
+
+    def test_dirty_scope_written_back_before_eviction(self):
+        """测试未持久化的作用域在淘汰前回写"""
+        written = {}
+        cache = MemoryCache(max_scopes=1, on_evict=lambda key, entries: written.update({key: entries}))
+        dirty_entries = create_entries(1)
+        cache["dirty"] = dirty_entries
+        cache.put("clean", create_entries(1), dirty=False)
+        cache.put("other", create_entries(1), dirty=False)
+
+        assert written == {"dirty": dirty_entries}
+        assert cache.get_metrics()["dirty"] == 0
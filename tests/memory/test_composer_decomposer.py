@@ -1,5 +1,6 @@
+import gc
 from datetime import datetime
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 import pytest
 
@@ -7,6 +8,8 @@ from kirara_ai.im.message import IMMessage, TextMessage
 from kirara_ai.im.sender import ChatSender
 from kirara_ai.llm.format.response import Message
 from kirara_ai.memory.composes import DefaultMemoryComposer, DefaultMemoryDecomposer
+from kirara_ai.memory.composes.budget import RenderCache, estimate_tokens
+from kirara_ai.memory.entry import MemoryEntry
 
 
 @pytest.fixture
@@ -104,3 +107,53 @@ class TestDefaultMemoryDecomposer:
         # 验证只返回最后10条
         assert len(result_lines) == 10
         assert "message 11" in result_lines[-1]
+
+    def test_decompose_budget(self, decomposer, c2c_sender):
+        entries = [
+            MagicMock(sender=c2c_sender, content=f"消息{i}" * 10, timestamp=datetime.now())
+            for i in range(5)
+        ]
+
+        result = decomposer.with_budget(70).decompose(entries)
+        result_lines = result.split("\n")
+
+        # 每条约 33 个 token，预算内只能放下最新的 2 条，并保持时间顺序
+        assert len(result_lines) == 2
+        assert "消息3" in result_lines[0]
+        assert "消息4" in result_lines[1]
+
+    def test_decompose_budget_truncates_newest_entry(self, decomposer, c2c_sender):
+        entries = [MagicMock(sender=c2c_sender, content="很长的消息" * 100, timestamp=datetime.now())]
+
+        result = decomposer.with_budget(50, "chars").decompose(entries)
+
+        assert len(result) == 50
+        assert result.startswith("刚刚，")
+
+    def test_estimate_tokens(self):
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("你好，世界") == 5
+        assert estimate_tokens("hello world") == 3
+
+    def test_render_cache(self, c2c_sender):
+        cache = RenderCache()
+        entry = MagicMock(sender=c2c_sender, content="hello", timestamp=datetime.now())
+
+        with patch("kirara_ai.memory.composes.budget.measure", return_value=2) as measure:
+            assert cache.measure(entry, "tokens") == 2
+            assert cache.measure(entry, "tokens") == 2
+            entry.content = "changed"
+            cache.measure(entry, "tokens")
+
+        assert measure.call_count == 2
+
+    def test_render_cache_releases_entries(self, c2c_sender):
+        cache = RenderCache()
+        entry = MemoryEntry(sender=c2c_sender, content="hello", timestamp=datetime.now())
+        cache.measure(entry, "tokens")
+        cache.measure(entry, "chars")
+        assert len(cache) == 2
+
+        del entry
+        gc.collect()
+        assert len(cache) == 0
@@ -166,3 +166,56 @@ class TestMemoryManager:
         persistence = memory_manager.persistence
         assert isinstance(persistence, DummyMemoryPersistence)
         assert persistence.storage["test_scope"] == []
+
+    def test_query_only_reads_scope_bucket(self, memory_manager, test_entry, mock_scope):
+        """测试查询只读取对应作用域的记忆"""
+        memory_manager.memories["other_scope"] = [test_entry]
+        memory_manager.store(mock_scope, test_entry)
+
+        results = memory_manager.query(mock_scope, "user1")
+
+        assert results == [test_entry]
+        mock_scope.is_in_scope.assert_called_once()
+
+    def test_store_keeps_time_order(self, memory_manager, mock_scope):
+        """测试乱序存储的记忆按时间顺序排列"""
+        entries = [
+            MemoryEntry(sender="user1", content=str(i), timestamp=datetime(2024, 1, 1, 0, 0, i), metadata={})
+            for i in range(3)
+        ]
+        for entry in (entries[0], entries[2], entries[1]):
+            memory_manager.store(mock_scope, entry)
+
+        assert [entry.content for entry in memory_manager.query(mock_scope, "user1")] == ["0", "1", "2"]
+
+    def test_evicted_scope_reloaded_from_persistence(self, container, test_entry):
+        """测试被淘汰的作用域再次查询时从持久化层重新加载"""
+        container.resolve.return_value.memory.cache.max_scopes = 1
+        manager = MemoryManager(container, persistence=DummyMemoryPersistence())
+        scope1, scope2 = MagicMock(spec=MemoryScope), MagicMock(spec=MemoryScope)
+        scope1.get_scope_key.return_value = "scope1"
+        scope2.get_scope_key.return_value = "scope2"
+        scope1.is_in_scope.return_value = scope2.is_in_scope.return_value = True
+
+        manager.store(scope1, test_entry)
+        manager.store(scope2, test_entry)
+        assert "scope1" not in manager.memories
+
+        assert manager.query(scope1, "user1") == [test_entry]
+        metrics = manager.memories.get_metrics()
+        assert metrics["evictions"] == 2
+        assert metrics["misses"] == 3
+
+    @pytest.mark.asyncio
+    async def test_astore_and_aquery(self, container, test_entry, mock_scope):
+        """测试异步存储和查询，未缓存时通过 aload 加载"""
+        persistence = DummyMemoryPersistence()
+        persistence.storage["test_scope"] = [test_entry]
+        manager = MemoryManager(container, persistence=persistence)
+        new_entry = MemoryEntry(sender="user1", content="new", timestamp=datetime.now(), metadata={})
+
+        await manager.astore(mock_scope, new_entry)
+
+        assert await manager.aquery(mock_scope, "user1") == [test_entry, new_entry]
+        assert persistence.storage["test_scope"] == [test_entry, new_entry]
+        assert manager.memories.get_metrics()["dirty"] == 0
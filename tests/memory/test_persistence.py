@@ -1,14 +1,23 @@
 import os
 import shutil
 import tempfile
-from datetime import datetime
-from unittest.mock import MagicMock, patch
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
 
 from kirara_ai.im.sender import ChatSender, ChatType
 from kirara_ai.memory.entry import MemoryEntry
-from kirara_ai.memory.persistences import FileMemoryPersistence, RedisMemoryPersistence
+from kirara_ai.memory.persistences import (
+    AsyncMemoryPersistence,
+    FileMemoryPersistence,
+    LogFileMemoryPersistence,
+    RedisMemoryPersistence,
+    SqliteMemoryPersistence,
+)
+from kirara_ai.memory.persistences.codecs import BinaryMemoryCodec, JSONMemoryCodec
 
 # ==================== 常量区 ====================
 TEST_USER_1 = "user1"
@@ -37,6 +46,18 @@ def file_persistence(test_dir):
     return FileMemoryPersistence(test_dir)
 
 
+@pytest.fixture
+def log_persistence(test_dir):
+    return LogFileMemoryPersistence(test_dir, max_entries=2)
+
+
+@pytest.fixture
+def sqlite_persistence(test_dir):
+    persistence = SqliteMemoryPersistence(os.path.join(test_dir, "memory.db"), max_entries=2)
+    yield persistence
+    persistence.conn.close()
+
+
 @pytest.fixture
 def chat_senders():
     sender1 = ChatSender.from_group_chat(TEST_USER_1, TEST_GROUP, TEST_DISPLAY_NAME)
@@ -71,7 +92,7 @@ def redis_mock():
 @pytest.fixture
 def redis_persistence(redis_mock):
     with patch("redis.Redis", return_value=redis_mock):
-        return RedisMemoryPersistence(host="localhost")
+        return RedisMemoryPersistence(host="localhost", max_entries=2)
 
 
 # ==================== 测试逻辑 ====================
@@ -102,14 +123,254 @@ class TestFileMemoryPersistence:
         assert entries == []
 
 
+class TestBinaryMemoryCodec:
+    def test_round_trip(self, test_entries):
+        codec = BinaryMemoryCodec()
+        aware_entry = MemoryEntry(
+            sender="user3",
+            content="带时区的消息",
+            timestamp=datetime(2024, 1, 1, 20, 0, 0, 123456, tzinfo=timezone(timedelta(hours=8))),
+            metadata={},
+        )
+        entries = test_entries + [aware_entry]
+
+        decoded_entries = codec.decode(codec.encode(entries))
+
+        assert len(decoded_entries) == len(entries)
+        for original, decoded in zip(entries, decoded_entries):
+            assert original.sender == decoded.sender
+            assert original.content == decoded.content
+            assert original.timestamp == decoded.timestamp
+            assert original.metadata == decoded.metadata
+        assert decoded_entries[2].timestamp.utcoffset() == timedelta(hours=8)
+
+    def test_intern_senders(self, test_entries):
+        codec = BinaryMemoryCodec()
+        entries = [test_entries[i % 2] for i in range(100)]
+
+        data = codec.encode(entries)
+        decoded_entries = codec.decode(data)
+
+        # 同一发送者只保存一次，解码后共用同一个对象
+        assert data.count(TEST_USER_1.encode()) == 1
+        assert decoded_entries[0].sender is decoded_entries[2].sender
+        assert len(data) < len(JSONMemoryCodec().encode(entries)) / 3
+
+    def test_read_json(self, test_entries):
+        data = JSONMemoryCodec().encode(test_entries)
+
+        decoded_entries = BinaryMemoryCodec().decode(data)
+
+        assert [entry.content for entry in decoded_entries] == [TEST_CONTENT_1, TEST_CONTENT_2]
+
+    def test_file_persistence_switch_codec(self, file_persistence, test_entries, test_dir):
+        file_persistence.save(TEST_SCOPE, test_entries)
+        binary_persistence = FileMemoryPersistence(test_dir, codec="binary")
+
+        # 切换编码后仍能读取已有的 JSON 文件
+        assert len(binary_persistence.load(TEST_SCOPE)) == 2
+        binary_persistence.save(TEST_SCOPE, test_entries[:1])
+
+        assert os.path.exists(os.path.join(test_dir, f"{TEST_SCOPE}.bin"))
+        assert not os.path.exists(os.path.join(test_dir, f"{TEST_SCOPE}.json"))
+        assert [entry.content for entry in binary_persistence.load(TEST_SCOPE)] == [TEST_CONTENT_1]
+
+    def test_unknown_codec(self, test_dir):
+        with pytest.raises(ValueError):
+            FileMemoryPersistence(test_dir, codec="unknown")
+
+
+class TestLogFileMemoryPersistence:
+    def test_append_only_writes_new_entries(self, log_persistence, test_entries, test_dir):
+        log_persistence.append(TEST_SCOPE, test_entries[:1], test_entries[:1])
+        file_path = os.path.join(test_dir, f"{TEST_SCOPE}.jsonl")
+        size = os.path.getsize(file_path)
+
+        log_persistence.append(TEST_SCOPE, test_entries[1:], test_entries)
+
+        with open(file_path, "rb") as f:
+            lines = f.read().splitlines()
+        assert len(lines) == 2
+        assert os.path.getsize(file_path) == size + len(lines[1]) + 1
+
+        # 使用新实例模拟重启后加载
+        loaded_entries = LogFileMemoryPersistence(test_dir, max_entries=2).load(TEST_SCOPE)
+        assert [entry.content for entry in loaded_entries] == [TEST_CONTENT_1, TEST_CONTENT_2]
+        assert loaded_entries[0].sender.user_id == TEST_USER_1
+        assert loaded_entries[1].timestamp == TEST_TIMESTAMP_2
+
+    def test_compact(self, log_persistence, test_entries, test_dir):
+        entries = []
+        for i in range(5):
+            entry = MemoryEntry(
+                sender=test_entries[0].sender,
+                content=str(i),
+                timestamp=TEST_TIMESTAMP_1,
+                metadata={},
+            )
+            entries = (entries + [entry])[-2:]
+            log_persistence.append(TEST_SCOPE, [entry], entries)
+
+        with open(os.path.join(test_dir, f"{TEST_SCOPE}.jsonl"), "rb") as f:
+            assert len(f.read().splitlines()) == 2
+        assert [entry.content for entry in log_persistence.load(TEST_SCOPE)] == ["3", "4"]
+
+    def test_truncate_partial_record(self, log_persistence, test_entries, test_dir):
+        log_persistence.save(TEST_SCOPE, test_entries[:1])
+        file_path = os.path.join(test_dir, f"{TEST_SCOPE}.jsonl")
+        size = os.path.getsize(file_path)
+        with open(file_path, "ab") as f:
+            f.write(b'{"sender": {"__type__": "Chat')
+
+        persistence = LogFileMemoryPersistence(test_dir)
+        assert len(persistence.load(TEST_SCOPE)) == 1
+        assert os.path.getsize(file_path) == size
+
+        persistence.append(TEST_SCOPE, test_entries[1:], test_entries)
+        assert [entry.content for entry in persistence.load(TEST_SCOPE)] == [TEST_CONTENT_1, TEST_CONTENT_2]
+
+    def test_skip_invalid_middle_record(self, log_persistence, test_entries, test_dir):
+        log_persistence.save(TEST_SCOPE, test_entries[:1])
+        file_path = os.path.join(test_dir, f"{TEST_SCOPE}.jsonl")
+        with open(file_path, "ab") as f:
+            f.write(b'{"sender": {"__type__": "Chat\n')
+        log_persistence.append(TEST_SCOPE, test_entries[1:], test_entries)
+        size = os.path.getsize(file_path)
+
+        # 中间损坏的记录被跳过，之后的记录仍然可以读取，文件不会被截断
+        persistence = LogFileMemoryPersistence(test_dir)
+        assert [entry.content for entry in persistence.load(TEST_SCOPE)] == [TEST_CONTENT_1, TEST_CONTENT_2]
+        assert os.path.getsize(file_path) == size
+
+        persistence.append(TEST_SCOPE, test_entries[:1], test_entries)
+        assert len(persistence.load(TEST_SCOPE)) == 3
+
+    def test_tails_bounded(self, test_entries, test_dir):
+        persistence = LogFileMemoryPersistence(test_dir, max_tails=2)
+        for scope_key in ("scope1", "scope2", "scope3"):
+            persistence.append(scope_key, test_entries[:1], test_entries[:1])
+
+        assert list(persistence._tails) == ["scope2", "scope3"]
+        # 被淘汰的作用域再次写入时重新读取日志末尾
+        persistence.append("scope1", test_entries[1:], test_entries)
+        assert [entry.content for entry in persistence.load("scope1")] == [TEST_CONTENT_1, TEST_CONTENT_2]
+
+    def test_migrate_json_file(self, file_persistence, log_persistence, test_entries, test_dir):
+        file_persistence.save(TEST_SCOPE, test_entries)
+
+        loaded_entries = log_persistence.load(TEST_SCOPE)
+
+        assert [entry.content for entry in loaded_entries] == [TEST_CONTENT_1, TEST_CONTENT_2]
+        assert os.path.exists(os.path.join(test_dir, f"{TEST_SCOPE}.jsonl"))
+        assert not os.path.exists(os.path.join(test_dir, f"{TEST_SCOPE}.json"))
+
+
+class TestSqliteMemoryPersistence:
+    def test_save_and_load(self, sqlite_persistence, test_entries):
+        sqlite_persistence.save(TEST_SCOPE, test_entries)
+
+        loaded_entries = sqlite_persistence.load(TEST_SCOPE)
+
+        assert len(loaded_entries) == len(test_entries)
+        for original, loaded in zip(test_entries, loaded_entries):
+            assert original.sender.user_id == loaded.sender.user_id
+            assert original.sender.chat_type == loaded.sender.chat_type
+            assert original.content == loaded.content
+            assert original.timestamp == loaded.timestamp
+            assert original.metadata == loaded.metadata
+        assert sqlite_persistence.load("nonexistent") == []
+
+    def test_wal_mode(self, sqlite_persistence):
+        assert sqlite_persistence.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    def test_append_trims_old_entries(self, sqlite_persistence, test_entries):
+        for i in range(4):
+            entry = MemoryEntry(
+                sender=test_entries[0].sender,
+                content=str(i),
+                timestamp=datetime(2024, 1, 1, 12, i),
+                metadata={},
+            )
+            sqlite_persistence.append(TEST_SCOPE, [entry], [entry])
+        sqlite_persistence.append("other_scope", test_entries[:1], test_entries[:1])
+
+        assert [entry.content for entry in sqlite_persistence.load(TEST_SCOPE)] == ["2", "3"]
+        count = sqlite_persistence.conn.execute(
+            "SELECT COUNT(*) FROM memories WHERE scope_key = ?", (TEST_SCOPE,)
+        ).fetchone()[0]
+        assert count == 2
+        assert len(sqlite_persistence.load("other_scope")) == 1
+
+    def test_write_batch(self, sqlite_persistence, test_entries):
+        sqlite_persistence.write_batch(
+            [
+                ("save", TEST_SCOPE, (test_entries,)),
+                ("save", TEST_SCOPE, ([],)),
+                ("append", "other_scope", (test_entries[1:], test_entries)),
+            ]
+        )
+
+        assert sqlite_persistence.load(TEST_SCOPE) == []
+        assert [entry.content for entry in sqlite_persistence.load("other_scope")] == [TEST_CONTENT_2]
+
+
 class TestRedisMemoryPersistence:
     def test_save(self, redis_persistence, redis_mock, test_entries):
         # 测试保存
         redis_persistence.save(TEST_SCOPE, test_entries)
-        redis_mock.set.assert_called_once()
+
+        pipe = redis_mock.pipeline.return_value
+        pipe.delete.assert_called_once_with(f"memory:list:{TEST_SCOPE}", TEST_SCOPE)
+        pipe.rpush.assert_called_once()
+        assert len(pipe.rpush.call_args.args) == 1 + len(test_entries)
+        pipe.ltrim.assert_called_once_with(f"memory:list:{TEST_SCOPE}", -2, -1)
+        pipe.execute.assert_called_once()
+        redis_mock.set.assert_not_called()
+
+    def test_append_only_pushes_new_entries(self, redis_persistence, redis_mock, test_entries):
+        redis_persistence.append(TEST_SCOPE, test_entries[1:], test_entries)
+
+        pipe = redis_mock.pipeline.return_value
+        pipe.delete.assert_not_called()
+        assert len(pipe.rpush.call_args.args) == 2
+        pipe.ltrim.assert_called_once_with(f"memory:list:{TEST_SCOPE}", -2, -1)
+
+    def test_write_batch_uses_one_pipeline(self, redis_persistence, redis_mock, test_entries):
+        redis_persistence.write_batch(
+            [
+                ("save", TEST_SCOPE, (test_entries,)),
+                ("append", "other_scope", (test_entries[1:], test_entries)),
+            ]
+        )
+
+        redis_mock.pipeline.assert_called_once()
+        redis_mock.pipeline.return_value.execute.assert_called_once()
 
     def test_load_with_data(self, redis_persistence, redis_mock, chat_senders):
-        # Mock Redis 返回数据
+        sender, _ = chat_senders
+        entry = MemoryEntry(
+            sender=sender, content=TEST_CONTENT_1, timestamp=TEST_TIMESTAMP_1, metadata=TEST_METADATA_TEXT
+        )
+        pipe = redis_mock.pipeline.return_value
+        pipe.execute.return_value = [[redis_persistence._encode(entry).encode("utf-8")], None]
+
+        # 测试加载
+        loaded_entries = redis_persistence.load(TEST_SCOPE)
+
+        # 只读取最新的 max_entries 条
+        pipe.lrange.assert_called_once_with(f"memory:list:{TEST_SCOPE}", -2, -1)
+        assert len(loaded_entries) == 1
+        entry = loaded_entries[0]
+        assert entry.sender.user_id == TEST_USER_1
+        assert entry.sender.chat_type == ChatType.GROUP
+        assert entry.sender.group_id == TEST_GROUP
+        assert entry.sender.display_name == TEST_DISPLAY_NAME
+        assert entry.content == TEST_CONTENT_1
+        assert entry.timestamp == TEST_TIMESTAMP_1
+        assert entry.metadata == TEST_METADATA_TEXT
+
+    def test_migrate_legacy_blob(self, redis_persistence, redis_mock, chat_senders):
+        # 旧版本将整个作用域保存为一个 JSON 字符串
         import json
 
         from kirara_ai.memory.persistences.codecs import MemoryJSONEncoder
@@ -130,21 +391,109 @@ class TestRedisMemoryPersistence:
                 "metadata": TEST_METADATA_TEXT,
             }
         ]
-        redis_mock.get.return_value = json.dumps(serialized_data, cls=MemoryJSONEncoder)
+        pipe = redis_mock.pipeline.return_value
+        pipe.execute.return_value = [[], json.dumps(serialized_data, cls=MemoryJSONEncoder)]
 
-        # 测试加载
         loaded_entries = redis_persistence.load(TEST_SCOPE)
 
-        # 验证数据
-        assert len(loaded_entries) == 1
-        entry = loaded_entries[0]
-        assert entry.sender.user_id == TEST_USER_1
-        assert entry.sender.chat_type == ChatType.GROUP
-        assert entry.sender.group_id == TEST_GROUP
-        assert entry.sender.display_name == TEST_DISPLAY_NAME
-        assert entry.content == TEST_CONTENT_1
-        assert entry.metadata == TEST_METADATA_TEXT
+        assert [entry.content for entry in loaded_entries] == [TEST_CONTENT_1]
+        assert loaded_entries[0].sender.user_id == TEST_USER_1
+        # 迁移到列表并删除旧键
+        pipe.delete.assert_called_once_with(f"memory:list:{TEST_SCOPE}", TEST_SCOPE)
+        assert len(pipe.rpush.call_args.args) == 2
+
+    @pytest.mark.asyncio
+    async def test_async_client(self, redis_persistence, test_entries):
+        pipe = MagicMock()
+        pipe.execute = AsyncMock(
+            return_value=[[redis_persistence._encode(entry) for entry in test_entries], None]
+        )
+        redis_persistence.aredis = MagicMock(pipeline=MagicMock(return_value=pipe))
+
+        loaded_entries = await redis_persistence.aload(TEST_SCOPE)
+        await redis_persistence.aappend(TEST_SCOPE, test_entries[1:], test_entries)
+
+        assert [entry.content for entry in loaded_entries] == [TEST_CONTENT_1, TEST_CONTENT_2]
+        pipe.lrange.assert_called_once_with(f"memory:list:{TEST_SCOPE}", -2, -1)
+        assert len(pipe.rpush.call_args.args) == 2
+        assert pipe.execute.await_count == 2
 
     def test_load_no_data(self, redis_persistence, redis_mock):
-        redis_mock.get.return_value = None
+        redis_mock.pipeline.return_value.execute.return_value = [[], None]
         assert redis_persistence.load(TEST_SCOPE) == []
+
+
+class TestAsyncMemoryPersistence:
+    def test_writes_in_batch(self, sqlite_persistence, test_entries):
+        async_persistence = AsyncMemoryPersistence(sqlite_persistence)
+        with patch.object(
+            sqlite_persistence, "write_batch", wraps=sqlite_persistence.write_batch
+        ) as write_batch:
+            async_persistence.save(TEST_SCOPE, test_entries[:1])
+            async_persistence.append("other_scope", test_entries[1:], test_entries)
+            assert async_persistence.flush(timeout=5)
+            async_persistence.stop()
+
+        write_batch.assert_called_once()
+        assert [operation[0] for operation in write_batch.call_args.args[0]] == ["save", "append"]
+        assert len(sqlite_persistence.load(TEST_SCOPE)) == 1
+        assert len(sqlite_persistence.load("other_scope")) == 1
+
+    def test_coalesce_by_scope(self, test_entries):
+        persistence = MagicMock()
+        async_persistence = AsyncMemoryPersistence(persistence, flush_interval=60)
+        entries = []
+        for entry in test_entries:
+            entries.append(entry)
+            async_persistence.append(TEST_SCOPE, [entry], entries)
+        async_persistence.save("other_scope", test_entries[:1])
+        async_persistence.append("other_scope", test_entries[1:], test_entries)
+
+        # 等待写入时从快照读取，不访问持久化层
+        assert async_persistence.load(TEST_SCOPE) == test_entries
+        persistence.load.assert_not_called()
+        metrics = async_persistence.get_metrics()
+        assert metrics["queue_depth"] == 2
+        assert metrics["coalesced"] == 2
+
+        async_persistence.stop()
+
+        persistence.write_batch.assert_called_once_with(
+            [
+                ("append", TEST_SCOPE, (test_entries, test_entries)),
+                ("save", "other_scope", (test_entries,)),
+            ]
+        )
+        metrics = async_persistence.get_metrics()
+        assert metrics["queue_depth"] == 0
+        assert metrics["written"] == 2
+        assert metrics["batches"] == 1
+
+    def test_flush_on_batch_size(self, test_entries):
+        persistence = MagicMock()
+        written = threading.Event()
+        persistence.write_batch.side_effect = lambda operations: written.set()
+        async_persistence = AsyncMemoryPersistence(persistence, max_batch_size=2, flush_interval=60)
+
+        async_persistence.save(TEST_SCOPE, test_entries)
+        async_persistence.save("other_scope", test_entries)
+        assert written.wait(timeout=5)
+
+        persistence.write_batch.assert_called_once()
+        async_persistence.stop()
+
+    def test_flush_on_interval(self, test_entries):
+        persistence = MagicMock()
+        written = threading.Event()
+        persistence.write_batch.side_effect = lambda operations: written.set()
+        async_persistence = AsyncMemoryPersistence(persistence, flush_interval=0.2)
+
+        # 空闲时的单次写入也应在 flush_interval 后写入，而不是等到批量或停止时
+        started_at = time.monotonic()
+        async_persistence.save(TEST_SCOPE, test_entries)
+        assert written.wait(timeout=2)
+        elapsed = time.monotonic() - started_at
+
+        assert 0.15 <= elapsed < 1.0
+        persistence.write_batch.assert_called_once_with([("save", TEST_SCOPE, (test_entries,))])
+        async_persistence.stop()
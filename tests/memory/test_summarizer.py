@@ -0,0 +1,173 @@
+import threading
+from datetime import datetime
+from unittest.mock import MagicMock
+
+import pytest
+
+from kirara_ai.config.global_config import GlobalConfig
+from kirara_ai.ioc.container import DependencyContainer
+from kirara_ai.llm.format.response import LLMChatResponse
+from kirara_ai.llm.llm_manager import LLMManager
+from kirara_ai.memory.composes import DefaultMemoryDecomposer
+from kirara_ai.memory.entry import MemoryEntry, is_summary_entry
+from kirara_ai.memory.memory_manager import MemoryManager
+from kirara_ai.memory.scopes import MemoryScope
+
+from .test_memory_manager import DummyMemoryPersistence
+
+
+# ==================== Fixtures ====================
+@pytest.fixture
+def llm():
+    llm = MagicMock()
+    llm.chat.return_value = LLMChatResponse(
+        choices=[{"message": {"content": "摘要内容", "role": "assistant"}}],
+        model="test-model",
+    )
+    return llm
+
+
+@pytest.fixture
+def container(llm):
+    container = DependencyContainer()
+    config = GlobalConfig()
+    config.memory.max_entries = 2
+    config.memory.summary.enable = True
+    config.memory.summary.batch_size = 2
+    config.memory.summary.model_name = "test-model"
+    container.register(GlobalConfig, config)
+    llm_manager = MagicMock(spec=LLMManager)
+    llm_manager.get_llm.return_value = llm
+    container.register(LLMManager, llm_manager)
+    return container
+
+
+@pytest.fixture
+def memory_manager(container):
+    manager = MemoryManager(container, persistence=DummyMemoryPersistence())
+    yield manager
+    manager.summarizer.shutdown()
+
+
+@pytest.fixture
+def mock_scope():
+    mock_scope = MagicMock(spec=MemoryScope)
+    mock_scope.get_scope_key.return_value = "test_scope"
+    mock_scope.is_in_scope.return_value = True
+    return mock_scope
+
+
+def store_messages(memory_manager, mock_scope, count):
+    for i in range(count):
+        entry = MemoryEntry(
+            sender="user1", content=f"message {i}", timestamp=datetime(2024, 1, 1, 0, 0, i), metadata={}
+        )
+        memory_manager.store(mock_scope, entry)
+
+
+def wait_summarizer(memory_manager):
+    # 摘要器只有一个工作线程，提交的空任务完成时之前的任务都已完成
+    memory_manager.summarizer._executor.submit(lambda: None).result(timeout=5)
+
+
+# ==================== 测试用例 ====================
+class TestMemorySummarizer:
+    def test_summarize_overflow(self, memory_manager, mock_scope, llm):
+        """测试溢出的旧记忆被合并为摘要"""
+        store_messages(memory_manager, mock_scope, 4)
+        wait_summarizer(memory_manager)
+
+        llm.chat.assert_called_once()
+        request = llm.chat.call_args.args[0]
+        assert request.model == "test-model"
+        assert "message 0\nmessage 1" in request.messages[1].content
+
+        results = memory_manager.query(mock_scope, "user1")
+        assert [entry.content for entry in results] == ["摘要内容", "message 2", "message 3"]
+        assert is_summary_entry(results[0])
+        assert results[0].metadata["summarized"] == 2
+        # 摘要通过持久化层保存
+        assert memory_manager.persistence.storage["test_scope:summary"] == [results[0]]
+
+    def test_wait_for_batch(self, memory_manager, mock_scope, llm):
+        """测试旧记忆不足一批时不生成摘要"""
+        store_messages(memory_manager, mock_scope, 3)
+        wait_summarizer(memory_manager)
+
+        llm.chat.assert_not_called()
+        assert len(memory_manager.query(mock_scope, "user1")) == 2
+
+    def test_retry_after_failure(self, memory_manager, mock_scope, llm):
+        """测试生成失败时旧记忆保留到下次重试"""
+        llm.chat.side_effect = Exception("LLM error")
+        store_messages(memory_manager, mock_scope, 4)
+        wait_summarizer(memory_manager)
+
+        assert memory_manager.get_summary("test_scope") is None
+        assert len(memory_manager.summarizer._pending["test_scope"]) == 2
+
+    def test_clear_memory_clears_summary(self, memory_manager, mock_scope):
+        store_messages(memory_manager, mock_scope, 4)
+        wait_summarizer(memory_manager)
+
+        memory_manager.clear_memory(mock_scope, "user1")
+
+        assert memory_manager.query(mock_scope, "user1") == []
+
+    def test_shutdown_saves_backlog(self, container, mock_scope, llm):
+        """测试关闭时尚未合并的旧记忆被保存，重启后合并到摘要中"""
+        persistence = DummyMemoryPersistence()
+        manager = MemoryManager(container, persistence=persistence)
+        store_messages(manager, mock_scope, 3)
+        manager.shutdown()
+
+        llm.chat.assert_not_called()
+        assert [entry.content for entry in persistence.storage["test_scope:summary_pending"]] == ["message 0"]
+
+        manager = MemoryManager(container, persistence=persistence)
+        for i in range(3, 5):
+            manager.store(
+                mock_scope,
+                MemoryEntry(sender="user1", content=f"message {i}", timestamp=datetime(2024, 1, 1, 0, 0, i)),
+            )
+        wait_summarizer(manager)
+        manager.summarizer.shutdown()
+
+        request = llm.chat.call_args.args[0]
+        assert "message 0\nmessage 1\nmessage 2" in request.messages[1].content
+        assert manager.get_summary("test_scope").metadata["summarized"] == 3
+        assert persistence.storage["test_scope:summary_pending"] == []
+
+    def test_clear_memory_discards_running_summary(self, memory_manager, mock_scope, llm):
+        """测试生成摘要期间清空记忆时不保存摘要"""
+        started, release = threading.Event(), threading.Event()
+        response = llm.chat.return_value
+
+        def chat(req):
+            started.set()
+            release.wait(timeout=5)
+            return response
+
+        llm.chat.side_effect = chat
+        store_messages(memory_manager, mock_scope, 4)
+        assert started.wait(timeout=5)
+
+        memory_manager.clear_memory(mock_scope, "user1")
+        release.set()
+        wait_summarizer(memory_manager)
+
+        assert memory_manager.get_summary("test_scope") is None
+        assert memory_manager.query(mock_scope, "user1") == []
+
+    def test_decompose_summary_first(self):
+        entries = [
+            MemoryEntry(sender="user1", content="摘要内容", metadata={"type": "summary"}),
+            *[MemoryEntry(sender="user1", content=f"message {i}") for i in range(12)],
+        ]
+
+        result_lines = DefaultMemoryDecomposer().decompose(entries).split("\n")
+
+        # 摘要不计入条数上限
+        assert len(result_lines) == 11
+        assert result_lines[0] == "更早之前的对话摘要：摘要内容"
+        assert result_lines[-1].endswith("message 11")
@@ -4,11 +4,14 @@ import pytest
 
 from kirara_ai.im.adapter import IMAdapter
 from kirara_ai.im.manager import IMManager
-from kirara_ai.im.message import IMMessage, TextMessage
+from kirara_ai.im.message import IMMessage, IMMessageStream, TextMessage
 from kirara_ai.im.sender import ChatSender
 from kirara_ai.ioc.container import DependencyContainer
+from kirara_ai.llm.format.response import LLMChatResponseDelta
+from kirara_ai.llm.stream import LLMChatStream
 from kirara_ai.workflow.implementations.blocks.im.messages import (AppendIMMessage, GetIMMessage, IMMessageToText,
                                                                    SendIMMessage, TextToIMMessage)
+from kirara_ai.workflow.implementations.blocks.llm.chat import ChatResponseConverter
 
 
 # 创建模拟的 IMAdapter 类
@@ -34,6 +37,63 @@ class MockIMManager(IMManager):
         return self.adapters.get(name)
 
 
+@pytest.mark.asyncio
+async def test_send_im_message_stream():
+    """测试流式消息逐段发送"""
+    container = DependencyContainer()
+    sent = []
+
+    class RecordingIMAdapter(MockIMAdapter):
+        async def send_message(self, message, target=None):
+            sent.append((message.content, target))
+
+    async def segments():
+        yield TextMessage("第一段")
+        yield TextMessage("第二段")
+
+    target = ChatSender.from_c2c_chat(user_id="test_user", display_name="Test User")
+    container.register(IMAdapter, RecordingIMAdapter())
+    container.register(IMMessage, IMMessage(sender=target, message_elements=[TextMessage("你好")]))
+    container.register(asyncio.AbstractEventLoop, asyncio.get_running_loop())
+
+    block = SendIMMessage()
+    block.container = container
+    block.execute(msg=IMMessageStream(sender=ChatSender.get_bot_sender(), segments=segments))
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+    assert sent == [("第一段", target), ("第二段", target)]
+
+
+@pytest.mark.asyncio
+async def test_send_im_message_stream_failure():
+    """测试流式消息生成失败时告知用户回复不完整"""
+    container = DependencyContainer()
+    sent = []
+
+    class RecordingIMAdapter(MockIMAdapter):
+        async def send_message(self, message, target=None):
+            sent.append(message.content)
+
+    async def segments():
+        yield TextMessage("第一段")
+        raise RuntimeError("stream broken")
+
+    target = ChatSender.from_c2c_chat(user_id="test_user", display_name="Test User")
+    container.register(IMAdapter, RecordingIMAdapter())
+    container.register(IMMessage, IMMessage(sender=target, message_elements=[TextMessage("你好")]))
+    container.register(asyncio.AbstractEventLoop, asyncio.get_running_loop())
+
+    block = SendIMMessage()
+    block.container = container
+    block.execute(msg=IMMessageStream(sender=ChatSender.get_bot_sender(), segments=segments))
+    assert len(SendIMMessage._sending_tasks) == 1
+    await asyncio.gather(*SendIMMessage._sending_tasks)
+
+    assert sent == ["第一段", "[回复生成失败，内容可能不完整]"]
+    assert not SendIMMessage._sending_tasks
+
+
 @pytest.fixture
 def container():
     """创建一个带有模拟消息的容器"""
@@ -113,7 +173,8 @@ def test_get_im_message(container):
     assert result["msg"].content == "测试消息内容"
 
 
-def test_im_message_to_text(container):
+@pytest.mark.asyncio
+async def test_im_message_to_text(container):
     """测试 IMMessage 转文本块"""
     # 创建消息
     message = IMMessage(
@@ -126,7 +187,7 @@ def test_im_message_to_text(container):
     block.container = container
     
     # 执行块
-    result = block.execute(msg=message)
+    result = await block.execute(msg=message)
     
     # 验证结果
     assert "text" in result
@@ -162,7 +223,8 @@ def test_text_to_im_message():
     assert result["msg"].message_elements[2].text == "Line 3"
 
 
-def test_append_im_message():
+@pytest.mark.asyncio
+async def test_append_im_message():
     """测试补充 IMMessage 消息块"""
     # 创建基础消息
     base_message = IMMessage(
@@ -177,7 +239,7 @@ def test_append_im_message():
     block = AppendIMMessage()
     
     # 执行块
-    result = block.execute(base_msg=base_message, append_msg=append_element)
+    result = await block.execute(base_msg=base_message, append_msg=append_element)
     
     # 验证结果
     assert "msg" in result
@@ -185,4 +247,21 @@ def test_append_im_message():
     assert isinstance(result["msg"].sender, ChatSender)
     assert len(result["msg"].message_elements) == 2
     assert result["msg"].message_elements[0].text == "基础消息"
-    assert result["msg"].message_elements[1].text == "追加内容" 
\ No newline at end of file
+    assert result["msg"].message_elements[1].text == "追加内容" 
+
+
+@pytest.mark.asyncio
+async def test_stream_response_to_text():
+    """测试流式回复转换的消息在转文本和补充消息时包含完整内容"""
+    async def deltas():
+        yield LLMChatResponseDelta(content="你好<break>")
+        yield LLMChatResponseDelta(content="最近怎么样", finish_reason="stop")
+
+    converter = ChatResponseConverter()
+    msg = (await converter.execute(resp=LLMChatStream.start("gpt-3.5-turbo", deltas())))["msg"]
+    result = await IMMessageToText().execute(msg=msg)
+    assert result["text"] == "你好最近怎么样"
+
+    msg = (await converter.execute(resp=LLMChatStream.start("gpt-3.5-turbo", deltas())))["msg"]
+    result = await AppendIMMessage().execute(base_msg=msg, append_msg=TextMessage("追加内容"))
+    assert [element.text for element in result["msg"].message_elements] == ["你好", "最近怎么样", "追加内容"]
@@ -11,7 +11,8 @@ def container():
     return DependencyContainer()
 
 
-def test_llm_response_to_text():
+@pytest.mark.asyncio
+async def test_llm_response_to_text():
     """测试 LLM 响应转文本块"""
     # 创建一个模拟的 LLMChatResponse
     chat_response = LLMChatResponse(
@@ -31,7 +32,7 @@ def test_llm_response_to_text():
     block = LLMResponseToText()
     
     # 执行块
-    result = block.execute(response=chat_response)
+    result = await block.execute(response=chat_response)
     
     # 验证结果
     assert "text" in result
@@ -51,5 +52,5 @@ def test_llm_response_to_text():
         usage={"prompt_tokens": 5, "completion_tokens": 0, "total_tokens": 5}
     )
     
-    result = block.execute(response=empty_response)
+    result = await block.execute(response=empty_response)
     assert result["text"] == "" 
\ No newline at end of file
@@ -3,19 +3,21 @@ from unittest.mock import MagicMock, patch
 
 import pytest
 
-from kirara_ai.im.message import IMMessage, TextMessage
+from kirara_ai.im.message import IMMessage, IMMessageStream, TextMessage
 from kirara_ai.im.sender import ChatSender
 from kirara_ai.ioc.container import DependencyContainer
+from kirara_ai.llm.adapter import LLMBackendAdapter
 from kirara_ai.llm.format.message import LLMChatMessage
-from kirara_ai.llm.format.response import LLMChatResponse
+from kirara_ai.llm.format.response import LLMChatResponse, LLMChatResponseDelta
 from kirara_ai.llm.llm_manager import LLMManager
+from kirara_ai.llm.stream import LLMChatStream
 from kirara_ai.workflow.core.execution.executor import WorkflowExecutor
 from kirara_ai.workflow.implementations.blocks.llm.chat import (ChatCompletion, ChatMessageConstructor,
                                                                 ChatResponseConverter)
 
 
 # 创建模拟的 LLM 类
-class MockLLM:
+class MockLLM(LLMBackendAdapter):
     def chat(self, request):
         return LLMChatResponse(
             choices=[
@@ -147,7 +149,7 @@ async def test_chat_completion_async():
     block.container = container
     
     # 执行块
-    result = block.execute(prompt=messages)
+    result = await block.execute(prompt=messages)
     
     # 验证结果
     assert "resp" in result
@@ -155,7 +157,8 @@ async def test_chat_completion_async():
     assert result["resp"].choices[0].message.content == "这是 AI 的回复"
 
 
-def test_chat_response_converter():
+@pytest.mark.asyncio
+async def test_chat_response_converter():
     """测试聊天响应转换器"""
     # 创建聊天响应
     chat_response = LLMChatResponse(
@@ -182,9 +185,54 @@ def test_chat_response_converter():
     block.container = mock_container
     
     # 执行块
-    result = block.execute(resp=chat_response)
+    result = await block.execute(resp=chat_response)
     
     # 验证结果
     assert "msg" in result
     assert isinstance(result["msg"], IMMessage)
-    assert "这是 AI 的回复" in result["msg"].content 
\ No newline at end of file
+    assert "这是 AI 的回复" in result["msg"].content 
+
+
+@pytest.mark.asyncio
+async def test_chat_completion_stream():
+    """测试流式对话返回流式响应"""
+    container = DependencyContainer()
+    container.register(LLMManager, MockLLMManager())
+
+    block = ChatCompletion(stream=True)
+    block.container = container
+    result = await block.execute(prompt=[LLMChatMessage(role="user", content="你好，AI！")])
+
+    assert isinstance(result["resp"], LLMChatStream)
+    await result["resp"].wait()
+    assert result["resp"].choices[0].message.content == "这是 AI 的回复"
+
+
+@pytest.mark.asyncio
+async def test_chat_response_converter_stream():
+    """测试流式响应在每段 <break> 结束时输出"""
+    gate = asyncio.Event()
+
+    async def deltas():
+        for content in ["你好", "呀<br", "eak>最近", "在看番"]:
+            yield LLMChatResponseDelta(content=content)
+        await gate.wait()
+        yield LLMChatResponseDelta(content="<break>你呢？", finish_reason="stop")
+
+    block = ChatResponseConverter()
+    result = await block.execute(resp=LLMChatStream.start("gpt-3.5-turbo", deltas()))
+    msg = result["msg"]
+    assert isinstance(msg, IMMessageStream)
+
+    segments = msg.segments()
+    assert (await segments.__anext__()).text == "你好呀"
+    # 第二段要等到下一个 <break> 或响应结束才输出
+    pending = asyncio.ensure_future(segments.__anext__())
+    await asyncio.sleep(0)
+    assert not pending.done()
+    gate.set()
+    assert (await pending).text == "最近在看番"
+    assert (await segments.__anext__()).text == "你呢？"
+
+    await msg.wait()
+    assert [element.text for element in msg.message_elements] == ["你好呀", "最近在看番", "你呢？"]
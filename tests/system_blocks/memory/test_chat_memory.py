@@ -6,6 +6,7 @@ from kirara_ai.im.message import IMMessage, TextMessage
 from kirara_ai.im.sender import ChatSender
 from kirara_ai.ioc.container import DependencyContainer
 from kirara_ai.llm.format.response import LLMChatResponse
+from kirara_ai.memory.composes import MemoryDecomposer
 from kirara_ai.memory.memory_manager import MemoryManager
 from kirara_ai.memory.registry import ComposerRegistry, DecomposerRegistry, ScopeRegistry
 from kirara_ai.workflow.implementations.blocks.memory.chat_memory import ChatMemoryQuery, ChatMemoryStore
@@ -22,6 +23,12 @@ class MockMemoryManager(MemoryManager):
     
     def store(self, *args, **kwargs):
         return None
+
+    async def aquery(self, *args, **kwargs):
+        return self.query(*args, **kwargs)
+
+    async def astore(self, *args, **kwargs):
+        return self.store(*args, **kwargs)
     
     def clear(self, *args, **kwargs):
         return None
@@ -52,7 +59,7 @@ class MockComposerRegistry(ComposerRegistry):
 
 
 # 创建模拟的 Decomposer 类
-class MockDecomposer:
+class MockDecomposer(MemoryDecomposer):
     def decompose(self, memory_entries):
         return "系统：你是一个助手\n用户：你好\n助手：你好！有什么可以帮助你的吗？"
 
@@ -82,7 +89,7 @@ async def test_chat_memory_query_async():
     block.container = container
     
     # 执行块
-    result = block.execute(chat_sender=chat_sender)
+    result = await block.execute(chat_sender=chat_sender)
     
     # 验证结果
     assert "memory_content" in result
@@ -126,13 +133,13 @@ async def test_chat_memory_store_async():
     block.container = container
     
     # 执行块 - 存储用户消息
-    result = block.execute(user_msg=user_msg)
+    result = await block.execute(user_msg=user_msg)
     
     # 验证结果
     assert result == {}
     
     # 执行块 - 存储 LLM 响应
-    result = block.execute(
+    result = await block.execute(
         user_msg=user_msg,
         llm_resp=llm_resp
     )
@@ -5,7 +5,7 @@ from typing import Any, Dict
 import pytest
 
 from kirara_ai.ioc.container import DependencyContainer
-from kirara_ai.workflow.core.block import Block
+from kirara_ai.workflow.core.block import Block, LoopEndBlock
 from kirara_ai.workflow.core.block.input_output import Input, Output
 from kirara_ai.workflow.core.block.registry import BlockRegistry
 from kirara_ai.workflow.core.workflow.builder import WorkflowBuilder
@@ -207,3 +207,31 @@ class TestWorkflowBuilder:
             warnings.simplefilter("error")
             builder = WorkflowBuilder("test_workflow").use(SimpleInputBlock)
             builder.save_to_yaml(yaml_path, container)
+
+    def test_build_creates_fresh_blocks(self, container):
+        """测试每次构建都会创建新的 block 实例，避免并发执行时共享状态"""
+        builder = (
+            WorkflowBuilder("test_workflow")
+            .use(SimpleInputBlock, name="input1", param1="test")
+            .loop(lambda ctx: False, name="loop")
+            .chain(SimpleProcessBlock, name="process1", multiplier=2)
+            .end_loop()
+        )
+
+        first = builder.build(container)
+        second = builder.build(container)
+
+        for first_block, second_block in zip(first.blocks, second.blocks):
+            assert first_block is not second_block
+            assert first_block.name == second_block.name
+            assert type(first_block) is type(second_block)
+
+        process1 = next(b for b in second.blocks if b.name == "process1")
+        assert process1.multiplier == 2
+        assert all(wire.target_block in second.blocks for wire in second.wires)
+        assert all(wire.source_block in second.blocks for wire in second.wires)
+
+        first_loop_end = next(b for b in first.blocks if isinstance(b, LoopEndBlock))
+        second_loop_end = next(b for b in second.blocks if isinstance(b, LoopEndBlock))
+        first_loop_end.execute(out1="value")
+        assert second_loop_end.results == []
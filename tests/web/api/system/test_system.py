@@ -7,8 +7,13 @@ from kirara_ai.config.global_config import GlobalConfig, WebConfig
 from kirara_ai.im.manager import IMManager
 from kirara_ai.ioc.container import DependencyContainer
 from kirara_ai.llm.llm_manager import LLMManager
+from kirara_ai.memory.memory_manager import MemoryManager
+from kirara_ai.memory.persistences import AsyncMemoryPersistence
 from kirara_ai.plugin_manager.plugin_loader import PluginLoader
 from kirara_ai.web.app import WebServer
+from kirara_ai.workflow.core.dispatch import WorkflowDispatcher
+from kirara_ai.workflow.core.execution.metrics import BlockSpan, WorkflowMetrics
+from kirara_ai.workflow.core.execution.thread_pool import BlockThreadPool
 from kirara_ai.workflow.core.workflow import WorkflowRegistry
 from tests.utils.auth_test_utils import auth_headers, setup_auth_service  # noqa
 
@@ -43,6 +48,7 @@ def app():
 
     llm_manager = MagicMock(spec=LLMManager)
     llm_manager.active_backends = {"backend1": [], "backend2": []}
+    llm_manager.get_metrics.return_value = {"backend1": {"state": "closed"}}
     container.register(LLMManager, llm_manager)
 
     plugin_loader = MagicMock(spec=PluginLoader)
@@ -53,6 +59,31 @@ def app():
     workflow_registry._workflows = {"workflow1": MagicMock(), "workflow2": MagicMock()}
     container.register(WorkflowRegistry, workflow_registry)
 
+    workflow_metrics = WorkflowMetrics()
+    workflow_metrics.record_span(
+        BlockSpan(
+            workflow_id="workflow1",
+            block_name="block1",
+            block_type="TestBlock",
+            ready_at=0.0,
+            started_at=0.5,
+            finished_at=2.0,
+            result_size=100,
+        )
+    )
+    workflow_metrics.record_workflow("workflow1", 2.0)
+    container.register(WorkflowMetrics, workflow_metrics)
+    container.register(BlockThreadPool, MagicMock(spec=BlockThreadPool, get_metrics=MagicMock(return_value={"queue_depth": 0})))
+    dispatcher = MagicMock(spec=WorkflowDispatcher)
+    dispatcher.queue = MagicMock(get_metrics=MagicMock(return_value={"pending": 0}))
+    container.register(WorkflowDispatcher, dispatcher)
+    memory_manager = MagicMock(spec=MemoryManager)
+    memory_manager.memories = MagicMock(get_metrics=MagicMock(return_value={"hits": 1}))
+    memory_manager.persistence = MagicMock(
+        spec=AsyncMemoryPersistence, get_metrics=MagicMock(return_value={"queue_depth": 2})
+    )
+    container.register(MemoryManager, memory_manager)
+
     web_server = WebServer(container)
     container.register(WebServer, web_server)
     return web_server.app
@@ -116,6 +147,27 @@ class TestSystemStatus:
         assert "error" in data
 
 
+    @pytest.mark.asyncio
+    async def test_get_system_metrics(self, test_client, auth_headers):
+        """测试获取工作流执行指标"""
+        response = test_client.get("/backend-api/api/system/metrics", headers=auth_headers)
+
+        assert response.status_code == 200
+        data = response.json()
+        workflow = data["workflows"]["workflow1"]
+        assert workflow["runs"] == 1
+        block = workflow["blocks"]["block1"]
+        assert block["type"] == "TestBlock"
+        assert block["queue_wait"]["sum"] == 0.5
+        assert block["duration"]["sum"] == 1.5
+        assert block["duration"]["buckets"]["2.5"] == 1
+        assert block["result_size"]["max"] == 100
+        assert data["thread_pool"] == {"queue_depth": 0}
+        assert data["dispatch"] == {"pending": 0}
+        assert data["memory"] == {"hits": 1}
+        assert data["memory_persistence"] == {"queue_depth": 2}
+        assert data["llm_backends"] == {"backend1": {"state": "closed"}}
+
     @pytest.mark.asyncio
     async def test_check_update(self, test_client, auth_headers):
         """测试检查更新"""
@@ -0,0 +1,154 @@
+import asyncio
+
+import pytest
+
+from kirara_ai.im.message import IMMessage, TextMessage
+from kirara_ai.im.sender import ChatSender
+from kirara_ai.workflow.core.dispatch.queue import DispatchQueue
+
+
+def create_group_message(content: str, group_id: str = "group1", user_id: str = "user1") -> IMMessage:
+    return IMMessage(
+        sender=ChatSender.from_group_chat(user_id=user_id, group_id=group_id, display_name=user_id),
+        message_elements=[TextMessage(content)],
+    )
+
+
+class RecordingHandler:
+    def __init__(self, delay: float = 0.05):
+        self.delay = delay
+        self.events = []
+        self.running = 0
+        self.max_running = 0
+
+    async def __call__(self, source, message: IMMessage):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        self.events.append(("start", message.content))
+        await asyncio.sleep(self.delay)
+        self.events.append(("end", message.content))
+        self.running -= 1
+        return message.content
+
+
+@pytest.mark.asyncio
+async def test_same_conversation_is_serialized():
+    """测试同一会话的消息按顺序依次处理"""
+    handler = RecordingHandler()
+    queue = DispatchQueue(handler)
+
+    results = await asyncio.gather(
+        queue.submit(None, create_group_message("a", user_id="user1")),
+        queue.submit(None, create_group_message("b", user_id="user2")),
+    )
+
+    assert results == ["a", "b"]
+    assert handler.events == [("start", "a"), ("end", "a"), ("start", "b"), ("end", "b")]
+    assert queue.get_metrics()["conversations"] == 0
+
+
+@pytest.mark.asyncio
+async def test_same_group_id_on_different_adapters():
+    """测试不同适配器中相同群号的消息属于不同会话，互不合并或丢弃"""
+    handler = RecordingHandler()
+    queue = DispatchQueue(handler, max_pending=2, overflow_policy="merge")
+    qq, telegram = object(), object()
+
+    results = await asyncio.gather(
+        queue.submit(qq, create_group_message("qq1")),
+        queue.submit(telegram, create_group_message("tg1")),
+        queue.submit(qq, create_group_message("qq2")),
+        queue.submit(telegram, create_group_message("tg2")),
+    )
+
+    assert results == ["qq1", "tg1", "qq2", "tg2"]
+    assert handler.max_running == 2
+    assert queue.get_metrics()["merged"] == 0
+
+
+@pytest.mark.asyncio
+async def test_different_conversations_run_in_parallel_up_to_cap():
+    """测试不同会话并行处理，并受全局并发上限约束"""
+    handler = RecordingHandler()
+    queue = DispatchQueue(handler, max_concurrency=2)
+
+    await asyncio.gather(
+        *(queue.submit(None, create_group_message(str(i), group_id=f"group{i}")) for i in range(4))
+    )
+
+    assert handler.max_running == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "policy, expected",
+    [
+        ("drop_newest", ["first", "second", None]),
+        ("drop_oldest", ["first", None, "third"]),
+        ("merge", ["first", "second\nthird", "second\nthird"]),
+    ],
+)
+async def test_overflow_policies(policy, expected):
+    """测试会话积压时的丢弃和合并策略"""
+    handler = RecordingHandler()
+    queue = DispatchQueue(handler, max_pending=1, overflow_policy=policy)
+
+    first = asyncio.ensure_future(queue.submit(None, create_group_message("first")))
+    await asyncio.sleep(0.01)
+    second = asyncio.ensure_future(queue.submit(None, create_group_message("second")))
+    third = asyncio.ensure_future(queue.submit(None, create_group_message("third")))
+
+    assert await asyncio.gather(first, second, third) == expected
+    metrics = queue.get_metrics()
+    assert metrics["dropped"] == (0 if policy == "merge" else 1)
+    assert metrics["merged"] == (1 if policy == "merge" else 0)
+
+
+@pytest.mark.asyncio
+async def test_merge_falls_back_for_different_senders():
+    """测试不同发送者的消息无法合并时丢弃最早的消息"""
+    handler = RecordingHandler()
+    queue = DispatchQueue(handler, max_pending=1, overflow_policy="merge")
+
+    first = asyncio.ensure_future(queue.submit(None, create_group_message("first")))
+    await asyncio.sleep(0.01)
+    second = asyncio.ensure_future(queue.submit(None, create_group_message("second", user_id="user1")))
+    third = asyncio.ensure_future(queue.submit(None, create_group_message("third", user_id="user2")))
+
+    assert await asyncio.gather(first, second, third) == ["first", None, "third"]
+
+
+@pytest.mark.asyncio
+async def test_handler_exception_is_propagated():
+    """测试处理失败时异常传递给调用方，且不影响后续消息"""
+
+    async def handler(source, message):
+        if message.content == "bad":
+            raise RuntimeError("boom")
+        return message.content
+
+    queue = DispatchQueue(handler)
+    bad = asyncio.ensure_future(queue.submit(None, create_group_message("bad")))
+    good = asyncio.ensure_future(queue.submit(None, create_group_message("good")))
+
+    with pytest.raises(RuntimeError, match="boom"):
+        await bad
+    assert await good == "good"
+
+
+@pytest.mark.asyncio
+async def test_cancel_all():
+    """测试取消所有等待和处理中的消息"""
+    handler = RecordingHandler(delay=10)
+    queue = DispatchQueue(handler)
+
+    first = asyncio.ensure_future(queue.submit(None, create_group_message("first")))
+    second = asyncio.ensure_future(queue.submit(None, create_group_message("second")))
+    await asyncio.sleep(0.01)
+    queue.cancel_all()
+
+    await queue.join()
+    assert queue.get_metrics()["running"] == 0
+    results = await asyncio.gather(first, second, return_exceptions=True)
+    assert all(isinstance(result, asyncio.CancelledError) for result in results)
+    assert queue.get_metrics()["conversations"] == 0
@@ -0,0 +1,102 @@
+import random
+
+from kirara_ai.workflow.core.dispatch import CombinedDispatchRule, RuleGroup, SimpleDispatchRule
+from kirara_ai.workflow.core.dispatch.prefilter import AhoCorasick, CombinedRegex, DispatchRulePrefilter, PrefixTrie
+from tests.workflow_dispatch.test_rule_registry import create_message, create_rule, registry  # noqa
+
+
+def test_prefix_trie():
+    """测试前缀树返回所有是文本前缀的模式"""
+    trie = PrefixTrie()
+    trie.add("/", "slash")
+    trie.add("/chat", "chat")
+    trie.add("/cha", "cha")
+    trie.add("/help", "help")
+
+    assert trie.search("/chat hello") == {"slash", "cha", "chat"}
+    assert trie.search("/he") == {"slash"}
+    assert trie.search("hello") == set()
+
+
+def test_aho_corasick_matches_naive_search():
+    """测试 Aho–Corasick 与逐个关键词查找的结果一致"""
+    rng = random.Random(42)
+    keywords = ["".join(rng.choice("abc") for _ in range(rng.randint(1, 4))) for _ in range(30)]
+    automaton = AhoCorasick()
+    for index, keyword in enumerate(keywords):
+        automaton.add(keyword, index)
+    automaton.build()
+
+    for _ in range(200):
+        text = "".join(rng.choice("abcd") for _ in range(rng.randint(0, 12)))
+        expected = {index for index, keyword in enumerate(keywords) if keyword in text}
+        assert automaton.search(text) == expected
+
+
+def test_combined_regex():
+    """测试拼接正则未命中时排除所有正则，无法拼接的正则始终保留"""
+    regexes = CombinedRegex()
+    regexes.add(r"^\d+$", "digits")
+    regexes.add(r"hello\s+world", "hello")
+    regexes.add(r"(a)\1", "backref")
+    regexes.build()
+
+    assert regexes.search("nothing") == {"backref"}
+    assert regexes.search("123") == {"digits", "hello", "backref"}
+
+
+def test_prefilter_candidates(registry):  # noqa: F811
+    """测试预过滤器只返回可能匹配的规则，并保持优先级顺序"""
+    keyword = SimpleDispatchRule(type="keyword", config={"keywords": ["天气", "weather"]})
+    bot_mention = SimpleDispatchRule(type="bot_mention", config={})
+    rules = [
+        create_rule("help", priority=10),
+        create_rule("weather", priority=8, rules=[keyword]),
+        create_rule("mention", priority=6, operator="and", rules=[bot_mention, SimpleDispatchRule(type="prefix", config={"prefix": "/ask"})]),
+        create_rule("mention_or", priority=4, rules=[bot_mention, keyword]),
+        create_rule("regex", priority=2, rules=[SimpleDispatchRule(type="regex", config={"pattern": "^[0-9]+$"})]),
+        CombinedDispatchRule(
+            rule_id="fallback",
+            name="fallback",
+            workflow_id="test:workflow",
+            priority=0,
+            rule_groups=[RuleGroup(rules=[SimpleDispatchRule(type="fallback", config={})])],
+        ),
+    ]
+    for rule in rules:
+        registry.register(rule)
+
+    def candidates(content):
+        return [rule.rule_id for rule in registry.get_candidate_rules(create_message(content))]
+
+    assert candidates("/help") == ["help", "mention_or", "fallback"]
+    assert candidates("今天天气如何") == ["weather", "mention_or", "fallback"]
+    assert candidates("/ask 天气") == ["weather", "mention", "mention_or", "fallback"]
+    assert candidates("12345") == ["mention_or", "regex", "fallback"]
+
+    # 候选规则之外的规则一定不匹配
+    for content in ["/help", "今天天气如何", "/ask 天气", "12345", "hello"]:
+        message = create_message(content)
+        filtered = {rule.rule_id for rule in registry.get_candidate_rules(message)}
+        for rule in registry.get_active_rules():
+            if rule.rule_id not in filtered:
+                assert not rule.match(message, registry.workflow_registry)
+
+
+def test_prefilter_rebuilt_after_change(registry):  # noqa: F811
+    """测试规则变化后重新构建预过滤器"""
+    registry.register(create_rule("help"))
+    assert [rule.rule_id for rule in registry.get_candidate_rules(create_message("/new"))] == []
+
+    registry.register(create_rule("new"))
+    assert [rule.rule_id for rule in registry.get_candidate_rules(create_message("/new"))] == ["new"]
+
+    registry.disable_rule("new")
+    assert registry.get_candidate_rules(create_message("/new")) == []
+
+
+def test_prefilter_without_compiled_rules():
+    """测试未编译的规则始终作为候选"""
+    rule = create_rule("raw")
+    prefilter = DispatchRulePrefilter([rule])
+    assert prefilter.candidates("anything") == [rule]
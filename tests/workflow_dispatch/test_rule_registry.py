@@ -0,0 +1,98 @@
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from kirara_ai.im.message import IMMessage, TextMessage
+from kirara_ai.im.sender import ChatSender
+from kirara_ai.ioc.container import DependencyContainer
+from kirara_ai.workflow.core.dispatch import CombinedDispatchRule, DispatchRuleRegistry, RuleGroup, SimpleDispatchRule
+from kirara_ai.workflow.core.dispatch.rules.message_rules import RegexMatchRule
+from kirara_ai.workflow.core.workflow import WorkflowRegistry
+
+
+@pytest.fixture
+def registry():
+    container = DependencyContainer()
+    container.register(WorkflowRegistry, MagicMock(spec=WorkflowRegistry))
+    return DispatchRuleRegistry(container)
+
+
+def create_message(content: str) -> IMMessage:
+    return IMMessage(
+        sender=ChatSender.from_c2c_chat(user_id="test_user", display_name="Test User"),
+        message_elements=[TextMessage(content)],
+    )
+
+
+def create_rule(rule_id: str, priority: int = 5, operator: str = "or", rules=None) -> CombinedDispatchRule:
+    return CombinedDispatchRule(
+        rule_id=rule_id,
+        name=rule_id,
+        workflow_id="test:workflow",
+        priority=priority,
+        rule_groups=[
+            RuleGroup(
+                operator=operator,
+                rules=rules or [SimpleDispatchRule(type="prefix", config={"prefix": f"/{rule_id}"})],
+            )
+        ],
+    )
+
+
+def test_active_rules_cached_and_invalidated(registry):
+    """测试已启用规则列表被缓存，并在规则变化时重新排序"""
+    registry.register(create_rule("low", priority=1))
+    registry.register(create_rule("high", priority=10))
+
+    assert [rule.rule_id for rule in registry.get_active_rules()] == ["high", "low"]
+    assert registry._active_rules is not None
+
+    registry.disable_rule("high")
+    assert [rule.rule_id for rule in registry.get_active_rules()] == ["low"]
+
+    registry.enable_rule("high")
+    registry.register(create_rule("middle", priority=5))
+    assert [rule.rule_id for rule in registry.get_active_rules()] == ["high", "middle", "low"]
+
+    registry.delete_rule("middle")
+    assert [rule.rule_id for rule in registry.get_active_rules()] == ["high", "low"]
+
+
+def test_match_reuses_compiled_rules(registry):
+    """测试匹配时复用注册时创建的规则实例"""
+    rule = create_rule("regex", rules=[SimpleDispatchRule(type="regex", config={"pattern": "^hello"})])
+    registry.register(rule)
+
+    with patch.object(RegexMatchRule, "from_config", side_effect=AssertionError("should not rebuild")):
+        assert rule.match(create_message("hello world"), registry.workflow_registry)
+        assert not rule.match(create_message("world"), registry.workflow_registry)
+
+
+def test_match_group_operators(registry):
+    """测试规则组的 AND / OR 逻辑以及无效规则的处理"""
+    prefix = SimpleDispatchRule(type="prefix", config={"prefix": "/chat"})
+    keyword = SimpleDispatchRule(type="keyword", config={"keywords": ["hello"]})
+    invalid = SimpleDispatchRule(type="unknown", config={})
+
+    and_rule = create_rule("and", operator="and", rules=[prefix, keyword, invalid])
+    or_rule = create_rule("or", operator="or", rules=[invalid, prefix, keyword])
+    invalid_rule = create_rule("invalid", rules=[invalid])
+    for rule in (and_rule, or_rule, invalid_rule):
+        registry.register(rule)
+
+    workflow_registry = registry.workflow_registry
+    assert and_rule.match(create_message("/chat hello"), workflow_registry)
+    assert not and_rule.match(create_message("/chat hi"), workflow_registry)
+    assert or_rule.match(create_message("hello"), workflow_registry)
+    assert not or_rule.match(create_message("hi"), workflow_registry)
+    assert not invalid_rule.match(create_message("anything"), workflow_registry)
+
+
+def test_update_rule_recompiles(registry):
+    """测试更新规则后使用新的配置匹配"""
+    registry.register(create_rule("cmd"))
+    registry.update_rule("cmd", create_rule("cmd", rules=[SimpleDispatchRule(type="prefix", config={"prefix": "/new"})]))
+
+    rule = registry.get_active_rules()[0]
+    assert rule.match(create_message("/new"), registry.workflow_registry)
+    assert not rule.match(create_message("/cmd"), registry.workflow_registry)
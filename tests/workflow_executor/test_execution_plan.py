@@ -0,0 +1,122 @@
+import gc
+import weakref
+
+import pytest
+
+from kirara_ai.ioc.container import DependencyContainer
+from kirara_ai.workflow.core.block import Block, Input, Output
+from kirara_ai.workflow.core.block.registry import BlockRegistry
+from kirara_ai.workflow.core.execution.plan import ExecutionPlan
+from kirara_ai.workflow.core.workflow import Wire, Workflow, WorkflowBuilder
+from tests.utils.test_block_registry import create_test_block_registry
+
+
+class SourceBlock(Block):
+    name = "source"
+    outputs = {"out": Output("out", "输出", str, "输出")}
+
+    def execute(self, **kwargs):
+        return {"out": "value"}
+
+
+class SinkBlock(Block):
+    name = "sink"
+    inputs = {"in1": Input("in1", "输入", str, "输入")}
+    outputs = {"out": Output("out", "输出", str, "输出")}
+
+    def execute(self, in1: str, **kwargs):
+        return {"out": in1}
+
+
+class MergeBlock(Block):
+    name = "merge"
+    inputs = {
+        "a": Input("a", "输入A", str, "输入A"),
+        "b": Input("b", "输入B", str, "输入B"),
+    }
+    outputs = {"out": Output("out", "输出", str, "输出")}
+
+    def execute(self, a: str, b: str, **kwargs):
+        return {"out": a + b}
+
+
+def create_diamond_workflow() -> Workflow:
+    source = SourceBlock(name="source")
+    left = SinkBlock(name="left")
+    right = SinkBlock(name="right")
+    merge = MergeBlock(name="merge")
+    return Workflow(
+        name="diamond",
+        blocks=[source, left, right, merge],
+        wires=[
+            Wire(source, "out", left, "in1"),
+            Wire(source, "out", right, "in1"),
+            Wire(left, "out", merge, "a"),
+            Wire(right, "out", merge, "b"),
+        ],
+    )
+
+
+def test_compile_builds_indexes():
+    """测试编译后的前置、后继和输入索引"""
+    plan = ExecutionPlan.compile(create_diamond_workflow(), create_test_block_registry())
+
+    assert plan.entry_blocks == ("source",)
+    assert plan.successors["source"] == ("left", "right")
+    assert plan.predecessors["merge"] == frozenset({"left", "right"})
+    assert plan.input_wires["merge"]["a"] == ("left", "out")
+    assert plan.input_wires["source"] == {}
+    assert plan.levels == (("source",), ("left", "right"), ("merge",))
+
+
+def test_compile_is_immutable():
+    """测试执行计划不可修改"""
+    plan = ExecutionPlan.compile(create_diamond_workflow(), create_test_block_registry())
+
+    with pytest.raises(TypeError):
+        plan.successors["source"] = ()
+    with pytest.raises(TypeError):
+        plan.input_wires["merge"]["a"] = None
+
+
+def test_plan_does_not_reference_blocks():
+    """测试执行计划不持有工作流中的 block 实例"""
+    workflow = create_diamond_workflow()
+    plan = ExecutionPlan.compile(workflow, create_test_block_registry())
+    merge = weakref.ref(workflow.blocks[3])
+
+    del workflow
+    gc.collect()
+
+    assert merge() is None
+    assert plan.input_wires["merge"]["b"] == ("right", "out")
+
+
+def test_compile_rejects_type_mismatch():
+    """测试编译时检查连线类型"""
+    source = SourceBlock(name="source")
+    bad = Block(
+        name="bad",
+        inputs={"in1": Input("in1", "输入", int, "输入")},
+        outputs={},
+    )
+    workflow = Workflow("bad", [source, bad], [Wire(source, "out", bad, "in1")])
+
+    with pytest.raises(TypeError, match="Type mismatch"):
+        ExecutionPlan.compile(workflow, create_test_block_registry())
+
+
+def test_builder_caches_plan():
+    """测试 WorkflowBuilder 缓存执行计划，并在结构变化时重新编译"""
+    container = DependencyContainer()
+    container.register(BlockRegistry, create_test_block_registry())
+
+    builder = WorkflowBuilder("cached").use(SourceBlock, name="source").chain(SinkBlock, name="sink")
+    first = builder.build(container)
+    second = builder.build(container)
+    assert first.execution_plan is second.execution_plan
+
+    builder.chain(SinkBlock, name="sink2")
+    third = builder.build(container)
+    assert third.execution_plan is not first.execution_plan
+    assert third.execution_plan.successors["sink"] == ("sink2",)
@@ -1,10 +1,15 @@
+import asyncio
+import threading
+import time
+
 import pytest
 
 from kirara_ai.events.event_bus import EventBus
 from kirara_ai.ioc.container import DependencyContainer
-from kirara_ai.workflow.core.block import Block, Input, Output
+from kirara_ai.workflow.core.block import Block, Input, LoopBlock, LoopEndBlock, Output
 from kirara_ai.workflow.core.block.registry import BlockRegistry
 from kirara_ai.workflow.core.execution.executor import WorkflowExecutor
+from kirara_ai.workflow.core.execution.metrics import WorkflowMetrics
 from kirara_ai.workflow.core.workflow import Wire, Workflow
 from tests.utils.test_block_registry import create_test_block_registry
 
@@ -140,6 +145,52 @@ async def test_executor_with_failing_block():
         await executor.run()
 
 
+class LoopBodyBlock(Block):
+    name = "LoopBodyBlock"
+    inputs = {"iteration": Input("iteration", "迭代数据", dict, "Test input")}
+    outputs = {"output1": Output("output1", "输出1", str, "Test output")}
+
+    def execute(self, iteration: dict, **kwargs):
+        return {"output1": f"iteration {iteration['index']}"}
+
+
+@pytest.mark.asyncio
+async def test_executor_loop_with_back_edge():
+    """Test that a loop whose end block feeds back into it is scheduled."""
+    loop_block = LoopBlock(
+        # 首次迭代时回边没有数据，第二次迭代时结束循环
+        condition_func=lambda inputs: "previous" not in inputs,
+        inputs={
+            "input1": Input("input1", "输入1", str, "Test input"),
+            "previous": Input("previous", "上次的结果", list, "Test input"),
+        },
+    )
+    body_block = LoopBodyBlock(name="body1")
+    loop_end_block = LoopEndBlock(inputs={"input1": Input("input1", "输入1", str, "Test input")})
+    loop_workflow = Workflow(
+        name="loop_workflow",
+        blocks=[input_block, loop_block, body_block, loop_end_block],
+        wires=[
+            Wire(input_block, "output1", loop_block, "input1"),
+            Wire(loop_block, "iteration", body_block, "iteration"),
+            Wire(body_block, "output1", loop_end_block, "input1"),
+            Wire(loop_end_block, "loop_results", loop_block, "previous"),
+        ],
+    )
+    container = DependencyContainer()
+    container.register(DependencyContainer, container)
+    container.register(EventBus, EventBus())
+    container.register(BlockRegistry, test_registry)
+    container.register(Workflow, loop_workflow)
+
+    result = await WorkflowExecutor(container).run()
+
+    assert loop_block.iteration_count == 2
+    assert result["loop"]["should_continue"] is False
+    assert result["body1"]["output1"] == "iteration 1"
+    assert result["loop_end"]["loop_results"] == [{"input1": "iteration 1"}]
+
+
 @pytest.mark.asyncio
 async def test_executor_with_no_blocks():
     """Test workflow executor with no blocks."""
@@ -200,3 +251,289 @@ async def test_executor_with_multiple_outputs():
     executor = WorkflowExecutor(container)
     result = await executor.run()
     assert "MultiOutputBlock" in result
+
+
+class SleepBlock(Block):
+    name = "SleepBlock"
+    inputs = {
+        "input1": Input(
+            name="input1", label="输入1", data_type=str, description="Test input"
+        )
+    }
+    outputs = {
+        "output1": Output(
+            name="output1", label="输出1", data_type=str, description="Test output"
+        )
+    }
+
+    def execute(self, input1: str, **kwargs):
+        time.sleep(0.2)
+        return {"output1": self.name}
+
+
+def create_parallel_workflow(max_concurrency=None) -> Workflow:
+    sleep_blocks = [SleepBlock(name=f"sleep{i}") for i in range(3)]
+    return Workflow(
+        name="parallel_workflow",
+        blocks=[input_block, *sleep_blocks],
+        wires=[
+            Wire(
+                source_block=input_block,
+                source_output="output1",
+                target_block=sleep_block,
+                target_input="input1",
+            )
+            for sleep_block in sleep_blocks
+        ],
+        max_concurrency=max_concurrency,
+    )
+
+
+@pytest.mark.asyncio
+async def test_executor_runs_independent_blocks_concurrently():
+    """Test that independent branches overlap and results keep topological order."""
+    container = DependencyContainer()
+    container.register(DependencyContainer, container)
+    container.register(EventBus, EventBus())
+    container.register(BlockRegistry, test_registry)
+    container.register(Workflow, create_parallel_workflow())
+    executor = WorkflowExecutor(container)
+
+    start = time.monotonic()
+    result = await executor.run()
+    elapsed = time.monotonic() - start
+
+    assert elapsed < 0.5
+    assert list(result.keys()) == ["input1", "sleep0", "sleep1", "sleep2"]
+
+
+@pytest.mark.asyncio
+async def test_executor_respects_max_concurrency():
+    """Test that the per-workflow concurrency limit serializes blocks."""
+    container = DependencyContainer()
+    container.register(DependencyContainer, container)
+    container.register(EventBus, EventBus())
+    container.register(BlockRegistry, test_registry)
+    container.register(Workflow, create_parallel_workflow(max_concurrency=1))
+    executor = WorkflowExecutor(container)
+
+    start = time.monotonic()
+    await executor.run()
+    elapsed = time.monotonic() - start
+
+    assert elapsed >= 0.6
+
+
+class AsyncProcessBlock(ProcessBlock):
+    name = "AsyncProcessBlock"
+
+    async def execute(self, input1: str, **kwargs):
+        await asyncio.sleep(0)
+        return {"output1": threading.current_thread().name}
+
+
+class CpuBoundProcessBlock(ProcessBlock):
+    name = "CpuBoundProcessBlock"
+    cpu_bound = True
+
+    def execute(self, input1: str, **kwargs):
+        return {"output1": threading.current_thread().name}
+
+
+@pytest.mark.asyncio
+async def test_executor_dispatches_async_and_cpu_bound_blocks():
+    """Test that async blocks run on the loop and CPU-bound blocks use the shared pool."""
+    async_block = AsyncProcessBlock(name="async1")
+    cpu_block = CpuBoundProcessBlock(name="cpu1")
+    mixed_workflow = Workflow(
+        name="mixed_workflow",
+        blocks=[input_block, async_block, cpu_block],
+        wires=[
+            Wire(input_block, "output1", async_block, "input1"),
+            Wire(input_block, "output1", cpu_block, "input1"),
+        ],
+    )
+
+    container = DependencyContainer()
+    container.register(DependencyContainer, container)
+    container.register(EventBus, EventBus())
+    container.register(BlockRegistry, test_registry)
+    container.register(Workflow, mixed_workflow)
+    executor = WorkflowExecutor(container)
+    result = await executor.run()
+
+    assert result["async1"]["output1"] == threading.current_thread().name
+    assert result["cpu1"]["output1"].startswith("cpu-bound-block")
+
+
+@pytest.mark.asyncio
+async def test_executor_records_block_spans():
+    """Test that every block execution posts a span and metrics are aggregated."""
+    event_bus = EventBus()
+    metrics = WorkflowMetrics()
+    metrics.register_listeners(event_bus)
+
+    container = DependencyContainer()
+    container.register(DependencyContainer, container)
+    container.register(EventBus, event_bus)
+    container.register(BlockRegistry, test_registry)
+    container.register(Workflow, create_parallel_workflow())
+    executor = WorkflowExecutor(container)
+    await executor.run()
+
+    assert {span.block_name for span in executor.spans} == {"input1", "sleep0", "sleep1", "sleep2"}
+    assert all(span.duration >= 0.2 for span in executor.spans if span.block_name.startswith("sleep"))
+    assert all(span.result_size > 0 for span in executor.spans)
+
+    snapshot = metrics.snapshot()["parallel_workflow"]
+    assert snapshot["runs"] == 1
+    assert snapshot["duration"]["sum"] == executor.duration
+    assert snapshot["blocks"]["sleep0"]["type"] == "SleepBlock"
+    assert snapshot["blocks"]["sleep0"]["duration"]["count"] == 1
+
+
+@pytest.mark.asyncio
+async def test_executor_records_failed_block_span():
+    """Test that failing blocks are counted as errors."""
+    event_bus = EventBus()
+    metrics = WorkflowMetrics()
+    metrics.register_listeners(event_bus)
+
+    container = DependencyContainer()
+    container.register(DependencyContainer, container)
+    container.register(EventBus, event_bus)
+    container.register(BlockRegistry, test_registry)
+    container.register(Workflow, failing_workflow)
+    executor = WorkflowExecutor(container)
+    with pytest.raises(RuntimeError):
+        await executor.run()
+
+    failing_span = next(span for span in executor.spans if span.block_name == "failing1")
+    assert isinstance(failing_span.error, RuntimeError)
+    block_stats = metrics.snapshot()["failing_workflow"]["blocks"]["failing1"]
+    assert block_stats["errors"] == 1
+    assert block_stats["duration"]["count"] == 0
+
+
+class HangingBlock(ProcessBlock):
+    name = "HangingBlock"
+
+    async def execute(self, input1: str, **kwargs):
+        await asyncio.sleep(10)
+        return {"output1": input1}
+
+
+def create_timeout_container(workflow: Workflow, event_bus: EventBus) -> DependencyContainer:
+    container = DependencyContainer()
+    container.register(DependencyContainer, container)
+    container.register(EventBus, event_bus)
+    container.register(BlockRegistry, test_registry)
+    container.register(Workflow, workflow)
+    return container
+
+
+@pytest.mark.asyncio
+async def test_executor_block_timeout():
+    """Test that a block exceeding its timeout fails the workflow and posts a timeout event."""
+    from kirara_ai.events import WorkflowExecutionTimeout
+    from kirara_ai.workflow.core.execution.executor import WorkflowTimeoutError
+
+    hanging_block = HangingBlock(name="hanging1")
+    hanging_block.timeout = 0.1
+    hanging_workflow = Workflow(
+        name="hanging_workflow",
+        blocks=[input_block, hanging_block],
+        wires=[Wire(input_block, "output1", hanging_block, "input1")],
+    )
+    event_bus = EventBus()
+    timeouts = []
+    event_bus.register(WorkflowExecutionTimeout, timeouts.append)
+    executor = WorkflowExecutor(create_timeout_container(hanging_workflow, event_bus))
+
+    start = time.monotonic()
+    with pytest.raises(WorkflowTimeoutError, match="Block hanging1 timed out"):
+        await executor.run()
+
+    assert time.monotonic() - start < 1
+    assert [(event.block_name, event.timeout) for event in timeouts] == [("hanging1", 0.1)]
+
+
+class TimeoutRaisingBlock(ProcessBlock):
+    name = "TimeoutRaisingBlock"
+
+    async def execute(self, input1: str, **kwargs):
+        raise asyncio.TimeoutError("upstream read timed out")
+
+
+@pytest.mark.asyncio
+async def test_executor_block_own_timeout_error():
+    """Test that a TimeoutError raised by the block itself is not reported as a block timeout."""
+    from kirara_ai.events import WorkflowExecutionTimeout
+    from kirara_ai.workflow.core.execution.executor import WorkflowTimeoutError
+
+    timeout_block = TimeoutRaisingBlock(name="timeout1")
+    timeout_block.timeout = 5
+    workflow = Workflow(
+        name="timeout_workflow",
+        blocks=[input_block, timeout_block],
+        wires=[Wire(input_block, "output1", timeout_block, "input1")],
+    )
+    event_bus = EventBus()
+    timeouts = []
+    event_bus.register(WorkflowExecutionTimeout, timeouts.append)
+    executor = WorkflowExecutor(create_timeout_container(workflow, event_bus))
+
+    # 与其他异常一样按 block 执行失败处理，原始异常保留在异常链中
+    with pytest.raises(RuntimeError, match="Block timeout1 execution failed: upstream read timed out") as exc_info:
+        await executor.run()
+
+    cause = exc_info.value.__context__
+    assert isinstance(cause, asyncio.TimeoutError)
+    assert not isinstance(cause, WorkflowTimeoutError)
+    assert timeouts == []
+
+
+@pytest.mark.asyncio
+async def test_executor_workflow_timeout_abandons_threads():
+    """Test that the workflow deadline releases thread blocks instead of waiting for them."""
+    from kirara_ai.events import WorkflowExecutionTimeout
+    from kirara_ai.workflow.core.execution.executor import WorkflowTimeoutError
+    from kirara_ai.workflow.core.execution.thread_pool import BlockThreadPool
+
+    workflow = create_parallel_workflow()
+    workflow.timeout = 0.1
+    event_bus = EventBus()
+    timeouts = []
+    event_bus.register(WorkflowExecutionTimeout, timeouts.append)
+    container = create_timeout_container(workflow, event_bus)
+    thread_pool = BlockThreadPool(max_workers=4)
+    container.register(BlockThreadPool, thread_pool)
+    executor = WorkflowExecutor(container)
+
+    with pytest.raises(WorkflowTimeoutError, match="Workflow parallel_workflow timed out"):
+        await executor.run()
+
+    assert executor.duration < 0.2
+    assert executor.remaining_time() == 0
+    assert [(event.block_name, event.timeout) for event in timeouts] == [(None, 0.1)]
+    assert thread_pool.get_metrics()["abandoned"] == 3
+    thread_pool.shutdown(wait=True)
+
+
+@pytest.mark.asyncio
+async def test_executor_cancel():
+    """Test that a running workflow can be cancelled."""
+    hanging_block = HangingBlock(name="hanging1")
+    hanging_workflow = Workflow(
+        name="hanging_workflow",
+        blocks=[input_block, hanging_block],
+        wires=[Wire(input_block, "output1", hanging_block, "input1")],
+    )
+    executor = WorkflowExecutor(create_timeout_container(hanging_workflow, EventBus()))
+
+    task = asyncio.ensure_future(executor.run())
+    await asyncio.sleep(0.05)
+    assert executor.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+    assert not executor.cancel()
@@ -0,0 +1,60 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from kirara_ai.workflow.core.execution.thread_pool import BlockThreadPool
+
+
+@pytest.mark.asyncio
+async def test_run_returns_result_and_records_metrics():
+    """测试执行结果和统计数据"""
+    pool = BlockThreadPool(max_workers=2)
+    try:
+        result = await pool.run(lambda x: x * 2, 21, workflow_id="test:double")
+        assert result == 42
+
+        with pytest.raises(ValueError):
+            await pool.run(lambda: (_ for _ in ()).throw(ValueError("boom")))
+
+        metrics = pool.get_metrics()
+        assert metrics["completed"] == 2
+        assert metrics["failed"] == 1
+        assert metrics["queue_depth"] == 0
+        assert metrics["running"] == 0
+        assert metrics["running_by_workflow"] == {}
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_cpu_bound_tasks_use_dedicated_pool():
+    """测试 CPU 密集型任务使用独立线程池"""
+    pool = BlockThreadPool(max_workers=2)
+    try:
+        name = await pool.run(lambda: threading.current_thread().name, cpu_bound=True)
+        assert name.startswith("cpu-bound-block")
+    finally:
+        pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_workflow_quota_limits_concurrency():
+    """测试按工作流限制并发线程数"""
+    pool = BlockThreadPool(max_workers=4, quotas={"test:limited": 1})
+    try:
+        start = time.monotonic()
+        await asyncio.gather(
+            *[pool.run(time.sleep, 0.1, workflow_id="test:limited") for _ in range(3)]
+        )
+        assert time.monotonic() - start >= 0.3
+
+        start = time.monotonic()
+        await asyncio.gather(
+            *[pool.run(time.sleep, 0.1, workflow_id="test:unlimited") for _ in range(3)]
+        )
+        assert time.monotonic() - start < 0.3
+        assert pool.get_metrics()["max_wait_time"] > 0
+    finally:
+        pool.shutdown()